@@ -0,0 +1,256 @@
+"""
+JSONL 배치 실행기 (무인 실행).
+입력 파일을 한 줄씩 읽어 태스크마다 별도 thread_id 와 격리된 워크스페이스 하위 디렉토리에서
+그래프를 실행하고, 결과를 완료되는 즉시 출력 JSONL 에 한 줄씩 기록합니다.
+
+입력 한 줄: {"id" | "request_id" | "task_id": ..., "message" | "prompt": ...}
+           (message 가 없으면 "title" + "body" 사용 — requests.jsonl 형식)
+출력 한 줄: task_id, status, final_message, routing, nodes, timings, usage, workspace, error
+
+재실행 시:
+- 체크포인트 DB 에서 이미 완료된 태스크는 건너뜀 (출력에 없으면 체크포인트로 결과를 기록)
+- 중간에 중단된 태스크는 마지막 체크포인트부터 이어서 실행
+
+실행: python batch_runner.py tasks.jsonl results.jsonl [--concurrency 2]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Set
+
+from langchain_core.messages import HumanMessage
+
+from coding_agent import DB_PATH, open_graph
+from config import ObservabilityConfig, OllamaConfig
+from core.metrics import track_usage
+from core.workspace import use_workspace
+
+logger = logging.getLogger(__name__)
+
+_ID_KEYS = ("id", "request_id", "task_id")
+_UNSAFE_CHARS = re.compile(r"[^\w.-]")
+
+
+class BatchTask(NamedTuple):
+    task_id: str
+    message: str
+
+
+def _task_from_record(record: Dict[str, Any], line_no: int) -> BatchTask:
+    task_id = next((str(record[k]) for k in _ID_KEYS if record.get(k)), None)
+    message = record.get("message") or record.get("prompt")
+    if not message:
+        parts = [record.get("title"), record.get("body")]
+        message = "\n\n".join(str(p) for p in parts if p)
+    if not message:
+        raise ValueError("missing 'message' (or 'prompt' / 'title' + 'body')")
+    return BatchTask(task_id or f"line-{line_no}", str(message))
+
+
+def read_tasks(path: str) -> Iterator[BatchTask]:
+    """태스크를 한 줄씩 읽음 (파일 전체를 메모리에 올리지 않음, 잘못된 줄은 건너뜀)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield _task_from_record(json.loads(line), line_no)
+            except (ValueError, TypeError, AttributeError) as e:
+                logger.error("Skipping %s line %d: %s", path, line_no, e)
+
+
+def recorded_task_ids(output_path: str) -> Set[str]:
+    """출력 파일에 이미 완료(done)로 기록된 태스크 ID"""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 중단으로 잘린 마지막 줄
+            if record.get("status") == "done":
+                done.add(record.get("task_id"))
+    return done
+
+
+def _final_message(values: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """마지막 워커(Supervisor 제외)의 메시지"""
+    for message in reversed(values.get("messages") or []):
+        if getattr(message, "name", None) not in (None, "Supervisor"):
+            return {"sender": message.name, "content": message.content}
+    return {"sender": None, "content": None}
+
+
+class BatchRunner:
+    """공유 그래프로 태스크를 최대 concurrency 개까지 동시에 실행하고 결과를 기록"""
+
+    def __init__(
+        self,
+        graph,
+        output_path: str,
+        workspace_root: str,
+        concurrency: int = 2,
+        thread_prefix: str = "batch-",
+        recursion_limit: Optional[int] = None,
+    ):
+        self.graph = graph
+        self.output_path = output_path
+        self.workspace_root = workspace_root
+        self.concurrency = concurrency
+        self.thread_prefix = thread_prefix
+        self.recursion_limit = recursion_limit
+        self._write_lock = threading.Lock()
+
+    def _config(self, task: BatchTask) -> Dict[str, Any]:
+        config: Dict[str, Any] = {
+            "configurable": {"thread_id": f"{self.thread_prefix}{task.task_id}"}
+        }
+        if self.recursion_limit:
+            config["recursion_limit"] = self.recursion_limit
+        return config
+
+    def workspace_for(self, task: BatchTask) -> str:
+        name = _UNSAFE_CHARS.sub("_", task.task_id)[:100]
+        return os.path.join(self.workspace_root, name)
+
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._write_lock, open(self.output_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+
+    def _record(self, task: BatchTask, status: str, **fields: Any) -> Dict[str, Any]:
+        record = {
+            "task_id": task.task_id,
+            "thread_id": self._config(task)["configurable"]["thread_id"],
+            "status": status,
+            "workspace": self.workspace_for(task),
+        }
+        record.update(fields)
+        return record
+
+    def run_task(self, task: BatchTask) -> Dict[str, Any]:
+        """태스크 1건 실행 (완료된 체크포인트가 있으면 실행하지 않음)"""
+        config = self._config(task)
+        snapshot = self.graph.get_state(config)
+        if snapshot.values and not snapshot.next:
+            final = _final_message(snapshot.values)
+            return self._record(task, "done", from_checkpoint=True, final_message=final)
+
+        # 중단된 태스크는 입력 없이 마지막 체크포인트부터 재개
+        inputs = None if snapshot.next else {"messages": [HumanMessage(task.message)]}
+        nodes, routing = [], []
+        node_seconds: Dict[str, float] = defaultdict(float)
+        started = last = time.perf_counter()
+        error = None
+        with use_workspace(self.workspace_for(task)), track_usage() as usage:
+            try:
+                for update in self.graph.stream(inputs, config, stream_mode="updates"):
+                    now = time.perf_counter()
+                    for node, values in update.items():
+                        # 업데이트 간 간격 (체크포인트 저장 시간 포함)
+                        node_seconds[node] += now - last
+                        nodes.append(node)
+                        if isinstance(values, dict) and "next" in values:
+                            routing.append(values["next"])
+                    last = now
+            except Exception as e:
+                logger.exception("Task %s failed", task.task_id)
+                error = str(e)
+
+        values = self.graph.get_state(config).values
+        return self._record(
+            task,
+            "error" if error else "done",
+            resumed=inputs is None,
+            final_message=_final_message(values),
+            routing=routing,
+            nodes=nodes,
+            timings={
+                "wall_seconds": round(time.perf_counter() - started, 3),
+                "node_seconds": {k: round(v, 3) for k, v in node_seconds.items()},
+            },
+            usage=dict(usage),
+            error=error,
+        )
+
+    def run(self, tasks: Iterable[BatchTask]) -> Counter:
+        """
+        태스크를 순서대로 제출하되 동시에 대기 / 실행 중인 태스크는 concurrency 개로 제한.
+        반환값: 상태별 태스크 수 (done / error / skipped)
+        """
+        recorded = recorded_task_ids(self.output_path)
+        summary: Counter = Counter()
+        slots = threading.BoundedSemaphore(self.concurrency)
+
+        def execute(task: BatchTask):
+            try:
+                record = self.run_task(task)
+                if record.get("from_checkpoint") and task.task_id in recorded:
+                    status = "skipped"
+                else:
+                    self._write(record)
+                    status = record["status"]
+            except Exception:
+                logger.exception("Task %s could not be recorded", task.task_id)
+                status = "error"
+            finally:
+                slots.release()
+            with self._write_lock:
+                summary[status] += 1
+
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="batch") as pool:
+            for task in tasks:
+                slots.acquire()
+                pool.submit(execute, task)
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run coding tasks from a JSONL file")
+    parser.add_argument("tasks", help="input JSONL (one task per line)")
+    parser.add_argument("output", help="results JSONL (appended, used for resume)")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument(
+        "--workspace-root",
+        default=os.path.join(OllamaConfig.WORKSPACE_DIR, "batch"),
+        help="each task gets <root>/<task id>",
+    )
+    parser.add_argument("--thread-prefix", default="batch-")
+    parser.add_argument("--recursion-limit", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=ObservabilityConfig.LOG_LEVEL, format=ObservabilityConfig.LOG_FORMAT
+    )
+    with open_graph(args.db) as graph:
+        runner = BatchRunner(
+            graph,
+            args.output,
+            args.workspace_root,
+            args.concurrency,
+            args.thread_prefix,
+            args.recursion_limit,
+        )
+        started = time.perf_counter()
+        summary = runner.run(read_tasks(args.tasks))
+
+    print(
+        f"Finished in {time.perf_counter() - started:.1f}s: "
+        f"{summary['done']} done, {summary['error']} failed, "
+        f"{summary['skipped']} already completed"
+    )
+
+
+if __name__ == "__main__":
+    main()
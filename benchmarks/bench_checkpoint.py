@@ -0,0 +1,117 @@
+"""
+체크포인트 쓰기 지연 벤치마크: SqliteSaver.from_conn_string (기존) vs open_checkpointer
+LLM 없이 Supervisor -> Worker 홉을 반복하는 그래프를 실행하며 슈퍼스텝당 시간을 측정합니다.
+(durability="sync": 각 슈퍼스텝이 체크포인트 저장 완료를 기다림)
+
+실행: python -m benchmarks.bench_checkpoint [--hops 200] [--threads 4]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, List, Sequence, TypedDict
+
+from langchain_core.messages import BaseMessage, HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from core.checkpoint import open_checkpointer
+
+
+class State(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+    hops: int
+
+
+def build_graph(hops: int):
+    def supervisor(state: State):
+        return {"hops": state.get("hops", 0) + 1}
+
+    def worker(state: State):
+        content = f"step {state['hops']}: " + "x" * 400
+        return {"messages": [HumanMessage(content=content, name="Coder")]}
+
+    def route(state: State) -> str:
+        return "worker" if state["hops"] < hops else END
+
+    workflow = StateGraph(State)
+    workflow.add_node("supervisor", supervisor)
+    workflow.add_node("worker", worker)
+    workflow.add_edge(START, "supervisor")
+    workflow.add_conditional_edges("supervisor", route)
+    workflow.add_edge("worker", "supervisor")
+    return workflow
+
+
+def _instrument(saver) -> List[float]:
+    """put / put_writes 호출 시간 기록 (인스턴스 메소드 래핑)"""
+    samples: List[float] = []
+    for method in ("put", "put_writes"):
+        original = getattr(saver, method)
+
+        def timed(*args, _original=original, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        setattr(saver, method, timed)
+    return samples
+
+
+def _run(saver, hops: int, threads: int) -> List[float]:
+    """스레드(세션)별 그래프 실행 시간 (초)"""
+    graph = build_graph(hops).compile(checkpointer=saver)
+
+    def session(i: int) -> float:
+        config = {
+            "configurable": {"thread_id": f"bench-{i}"},
+            "recursion_limit": 10_000,
+        }
+        start = time.perf_counter()
+        graph.invoke(
+            {"messages": [HumanMessage(content="go")], "hops": 0},
+            config,
+            durability="sync",
+        )
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(session, range(threads)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hops", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    steps = args.hops * 2  # supervisor + worker
+    print(
+        f"{'saver':<22}{'total(s)':>10}{'per step(ms)':>14}"
+        f"{'write p50(ms)':>15}{'write p99(ms)':>15}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = {
+            "SqliteSaver (before)": lambda p: SqliteSaver.from_conn_string(p),
+            "open_checkpointer": open_checkpointer,
+        }
+        for name, factory in cases.items():
+            path = os.path.join(tmp, f"{name.split()[0]}.sqlite")
+            with factory(path) as saver:
+                samples = _instrument(saver)
+                durations = _run(saver, args.hops, args.threads)
+            total = max(durations)
+            per_step = sum(durations) / (steps * args.threads) * 1000
+            samples.sort()
+            p50 = samples[len(samples) // 2] * 1000
+            p99 = samples[int(len(samples) * 0.99)] * 1000
+            print(f"{name:<22}{total:>10.2f}{per_step:>14.3f}{p50:>15.3f}{p99:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
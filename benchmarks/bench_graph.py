@@ -0,0 +1,461 @@
+"""
+전체 그래프(Supervisor / Planner / Coder / Reviewer) 오프라인 벤치마크.
+Ollama 대신 스크립트된 가짜 LLM(결정적 응답, 지연 / 응답 길이 조절)으로
+create_graph() 를 graph.stream 으로 끝까지 실행합니다.
+
+측정 항목:
+- 노드별 실행 시간, ReAct 반복(iteration)별 시간, 역할별 LLM 시간
+- 도구별 실행 시간 / 에러 수, 체크포인트 put / put_writes 시간
+- 최대 메모리 (tracemalloc peak, 프로세스 maxrss)
+- N개 스레드(세션) 동시 실행 시 처리량 (turns/s)
+
+결과를 JSON 으로 저장하고 이전 결과와 비교할 수 있습니다.
+
+실행: python -m benchmarks.bench_graph [--threads 4] [--turns 3] [--output run.json]
+비교: python -m benchmarks.bench_graph --compare base.json [--max-regression 20]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+from unittest.mock import patch
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+)
+from langchain_core.runnables import Runnable
+
+import core.agent_runtime as agent_runtime
+import core.tool_executor as tool_executor
+from benchmarks.bench_checkpoint import _instrument
+from coding_agent import create_graph
+from config import AgentConfig, OllamaConfig
+from core.checkpoint import open_checkpointer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+WORKERS = ("Planner", "Coder", "Reviewer")
+_FILE_NAME = re.compile(r"[\w-]+\.py")
+_FILLER = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do".split()
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    """초 단위 샘플 -> ms 단위 요약"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    n = len(ordered)
+    return {
+        "count": n,
+        "total_ms": round(sum(ordered) * 1000, 3),
+        "mean_ms": round(sum(ordered) / n * 1000, 3),
+        "p50_ms": round(ordered[n // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(n - 1, int(n * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+# =============================================================================
+# Scripted LLM
+# =============================================================================
+class ScriptedLLM(Runnable):
+    """
+    역할(시스템 프롬프트)과 대화 상태만으로 응답을 정하는 상태 없는 가짜 LLM.
+    여러 스레드가 공유해도 각 세션의 응답 순서가 결정적입니다.
+    - ttft_ms: 첫 토큰까지의 지연, ms_per_token: 토큰당 생성 지연
+    - tokens: 응답마다 덧붙이는 토큰(단어) 수, file_lines: Coder가 쓰는 파일 줄 수
+    """
+
+    def __init__(
+        self,
+        ttft_ms: float = 20.0,
+        ms_per_token: float = 0.5,
+        tokens: int = 200,
+        file_lines: int = 40,
+    ):
+        self.ttft_ms = ttft_ms
+        self.ms_per_token = ms_per_token
+        self.tokens = tokens
+        self.file_lines = file_lines
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    # --- 응답 스크립트 ---
+    @staticmethod
+    def role_of(messages: List[BaseMessage]) -> str:
+        system = messages[0].content if messages else ""
+        for role in WORKERS:
+            if AgentConfig.PROMPTS[role] in system:
+                return role
+        return "Supervisor"
+
+    @staticmethod
+    def _observed(messages: List[BaseMessage]) -> bool:
+        """현재 ReAct 루프에서 도구를 이미 실행했는지"""
+        return any(
+            isinstance(m, SystemMessage) and m.content.startswith("TOOL OBSERVATION")
+            for m in messages
+        )
+
+    @staticmethod
+    def _target_file(messages: List[BaseMessage]) -> str:
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage) and message.name is None:
+                match = _FILE_NAME.search(message.content)
+                if match:
+                    return match.group(0)
+        return "hello.py"
+
+    def _filler(self) -> str:
+        words = (_FILLER[i % len(_FILLER)] for i in range(self.tokens))
+        return "\n" + " ".join(words) if self.tokens else ""
+
+    def _source(self) -> str:
+        return "\n".join(f"VALUE_{i} = {i}" for i in range(self.file_lines)) + "\n"
+
+    @staticmethod
+    def _tool_call(name: str, arguments: Dict) -> str:
+        call = json.dumps([{"name": name, "arguments": arguments}])
+        return f"Thinking...\n```json\n{call}\n```"
+
+    def _supervisor(self, messages: List[BaseMessage]) -> str:
+        last = next((m.name for m in reversed(messages) if m.name in WORKERS), None)
+        return {"Planner": "Coder", "Coder": "Reviewer", "Reviewer": "FINISH"}.get(
+            last, "Planner"
+        )
+
+    def respond(self, messages: List[BaseMessage]) -> str:
+        role = self.role_of(messages)
+        if role == "Supervisor":
+            return self._supervisor(messages)
+        if role == "Planner":
+            return "1. Write the module\n2. Lint it\nPLAN_CREATED" + self._filler()
+        path = self._target_file(messages)
+        if role == "Coder" and not self._observed(messages):
+            call = {"file_path": path, "content": self._source()}
+            return self._tool_call("file_write", call) + self._filler()
+        if role == "Reviewer" and not self._observed(messages):
+            return self._tool_call("run_linter", {"file_path": path}) + self._filler()
+        final = "Code written successfully." if role == "Coder" else "Approved"
+        return final + self._filler()
+
+    # --- Runnable 인터페이스 ---
+    @staticmethod
+    def _messages(input) -> List[BaseMessage]:
+        # PromptValue 입력도 허용 (ChatPromptTemplate | llm 체인)
+        return input.to_messages() if hasattr(input, "to_messages") else list(input)
+
+    def _record(self, role: str, start: float):
+        with self._lock:
+            self.samples[role].append(time.perf_counter() - start)
+
+    def invoke(self, input, config=None, **kwargs) -> AIMessage:
+        start = time.perf_counter()
+        messages = self._messages(input)
+        text = self.respond(messages)
+        n_tokens = len(text.split())
+        time.sleep((self.ttft_ms + self.ms_per_token * n_tokens) / 1000)
+        self._record(self.role_of(messages), start)
+        return AIMessage(content=text)
+
+    def stream(self, input, config=None, **kwargs) -> Iterator[AIMessageChunk]:
+        start = time.perf_counter()
+        messages = self._messages(input)
+        text = self.respond(messages)
+        time.sleep(self.ttft_ms / 1000)
+        try:
+            # 단어(토큰) 단위 청크, 소비자가 중단하면 생성도 중단
+            for token in re.findall(r"\S+\s*|\s+", text):
+                time.sleep(self.ms_per_token / 1000)
+                yield AIMessageChunk(content=token)
+        finally:
+            self._record(self.role_of(messages), start)
+
+
+# =============================================================================
+# Instrumentation
+# =============================================================================
+class _Recorder(BaseCallbackHandler):
+    """
+    노드 실행 시간 (LangGraph 노드 Runnable 의 chain start / end 콜백)과
+    노드 내 ReAct 반복 시간 (LLM 호출 시작 간격, 마지막 반복은 노드 종료까지)을 기록.
+    """
+
+    def __init__(self):
+        self.nodes: Dict[str, List[float]] = defaultdict(list)
+        self.iterations: Dict[str, List[float]] = defaultdict(list)
+        self.tools: Dict[str, List[float]] = defaultdict(list)
+        self.tool_errors: Dict[str, int] = defaultdict(int)
+        self._runs: Dict[UUID, tuple] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node is None or kwargs.get("name") != node:
+            return
+        calls: List[float] = []
+        self._local.calls = calls
+        with self._lock:
+            self._runs[run_id] = (node, time.perf_counter(), calls)
+
+    def _finish(self, run_id: UUID):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        node, start, calls = run
+        end = time.perf_counter()
+        with self._lock:
+            self.nodes[node].append(end - start)
+            bounds = calls + [end]
+            for a, b in zip(bounds, bounds[1:]):
+                self.iterations[node].append(b - a)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def llm_call_started(self):
+        calls = getattr(self._local, "calls", None)
+        if calls is not None:
+            calls.append(time.perf_counter())
+
+    def tool_done(self, name: str, start: float, output: str):
+        with self._lock:
+            self.tools[name].append(time.perf_counter() - start)
+            if output.startswith(f"Tool '{name}' Error") or output.startswith("Error"):
+                self.tool_errors[name] += 1
+
+
+@contextlib.contextmanager
+def _instrumented(llm: ScriptedLLM, recorder: _Recorder, workspace: str):
+    """가짜 LLM 주입 + LLM / 도구 호출 계측 + 임시 워크스페이스"""
+    invoke_llm = agent_runtime._invoke_llm
+    invoke_tool = tool_executor._invoke_tool
+
+    def timed_llm(*args, **kwargs):
+        recorder.llm_call_started()
+        return invoke_llm(*args, **kwargs)
+
+    def timed_tool(call, tools_map):
+        start = time.perf_counter()
+        output = invoke_tool(call, tools_map)
+        recorder.tool_done(str(call.get("name")), start, output)
+        return output
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(patch("coding_agent.get_llm", return_value=llm))
+        stack.enter_context(patch("core.agent_runtime.get_llm", return_value=llm))
+        stack.enter_context(patch.object(agent_runtime, "_invoke_llm", timed_llm))
+        stack.enter_context(patch.object(tool_executor, "_invoke_tool", timed_tool))
+        stack.enter_context(patch.object(OllamaConfig, "WORKSPACE_DIR", workspace))
+        yield
+
+
+# =============================================================================
+# Runner
+# =============================================================================
+def run_benchmark(
+    llm: ScriptedLLM, threads: int, turns: int, workdir: str
+) -> Dict[str, object]:
+    """threads 개 세션이 각각 turns 번의 요청을 동시에 실행"""
+    recorder = _Recorder()
+    workspace = os.path.join(workdir, "workspace")
+    os.makedirs(workspace, exist_ok=True)
+    db_path = os.path.join(workdir, "agent_memory.sqlite")
+
+    def session(graph, i: int) -> int:
+        config = {"configurable": {"thread_id": f"bench-{i}"}, "callbacks": [recorder]}
+        steps = 0
+        for turn in range(turns):
+            request = f"Create module_{i}_{turn}.py with some constants."
+            inputs = {"messages": [HumanMessage(content=request)]}
+            for _ in graph.stream(inputs, config=config, stream_mode="updates"):
+                steps += 1
+        return steps
+
+    with _instrumented(llm, recorder, workspace), open_checkpointer(db_path) as saver:
+        checkpoint_samples = _instrument(saver)
+        graph = create_graph().compile(checkpointer=saver)
+
+        tracemalloc.start()
+        # 에이전트 로그 출력은 측정에서 제외
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                steps = sum(pool.map(lambda i: session(graph, i), range(threads)))
+            wall = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    maxrss_mb = None
+    if resource is not None:
+        # Linux: KB, macOS: bytes
+        scale = 1 if sys.platform == "darwin" else 1024
+        maxrss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+    total_turns = threads * turns
+    return {
+        "wall_s": round(wall, 4),
+        "turns": total_turns,
+        "steps": steps,
+        "throughput_turns_per_s": round(total_turns / wall, 3),
+        "node": {k: _stats(v) for k, v in sorted(recorder.nodes.items())},
+        "iteration": {k: _stats(v) for k, v in sorted(recorder.iterations.items())},
+        "llm": {k: _stats(v) for k, v in sorted(llm.samples.items())},
+        "tool": {k: _stats(v) for k, v in sorted(recorder.tools.items())},
+        "tool_errors": dict(recorder.tool_errors),
+        "checkpoint": _stats(checkpoint_samples),
+        "memory": {
+            "tracemalloc_peak_mb": round(peak / 2**20, 3),
+            "maxrss_mb": round(maxrss_mb, 3) if maxrss_mb is not None else None,
+        },
+    }
+
+
+# =============================================================================
+# Comparison
+# =============================================================================
+def _flatten(results: Dict[str, object]) -> Dict[str, float]:
+    """비교용 지표: 그룹별 p50 / p95 와 처리량"""
+    flat = {"throughput_turns_per_s": results["throughput_turns_per_s"]}
+    for group in ("node", "iteration", "llm", "tool"):
+        for name, stats in results[group].items():
+            for key in ("p50_ms", "p95_ms"):
+                if key in stats:
+                    flat[f"{group}.{name}.{key}"] = stats[key]
+    for key in ("p50_ms", "p95_ms"):
+        if key in results["checkpoint"]:
+            flat[f"checkpoint.{key}"] = results["checkpoint"][key]
+    flat["memory.tracemalloc_peak_mb"] = results["memory"]["tracemalloc_peak_mb"]
+    return flat
+
+
+def compare(base: Dict[str, object], current: Dict[str, object]) -> List[tuple]:
+    """
+    (지표, 이전 값, 현재 값, 악화율 %) 목록.
+    처리량은 감소, 나머지(시간 / 메모리)는 증가가 악화입니다.
+    """
+    old, new = _flatten(base), _flatten(current)
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        if not before:
+            continue
+        change = (after - before) / before * 100
+        if key == "throughput_turns_per_s":
+            change = -change
+        rows.append((key, before, after, round(change, 1)))
+    return rows
+
+
+def _print_summary(results: Dict[str, object]):
+    print(
+        f"turns={results['turns']} wall={results['wall_s']:.2f}s "
+        f"throughput={results['throughput_turns_per_s']:.2f} turns/s"
+    )
+    print(f"{'metric':<28}{'count':>7}{'p50(ms)':>10}{'p95(ms)':>10}{'total(ms)':>12}")
+    for group in ("node", "iteration", "llm", "tool"):
+        for name, stats in results[group].items():
+            print(
+                f"{group + '.' + name:<28}{stats['count']:>7}{stats['p50_ms']:>10.2f}"
+                f"{stats['p95_ms']:>10.2f}{stats['total_ms']:>12.1f}"
+            )
+    cp = results["checkpoint"]
+    if cp["count"]:
+        print(
+            f"{'checkpoint':<28}{cp['count']:>7}{cp['p50_ms']:>10.2f}"
+            f"{cp['p95_ms']:>10.2f}{cp['total_ms']:>12.1f}"
+        )
+    if results["tool_errors"]:
+        print(f"tool errors: {results['tool_errors']}")
+    mem = results["memory"]
+    print(
+        f"memory: tracemalloc peak {mem['tracemalloc_peak_mb']:.1f} MB, "
+        f"maxrss {mem['maxrss_mb']} MB"
+    )
+
+
+def _parse_args(argv: Optional[List[str]]):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--turns", type=int, default=3, help="requests per thread")
+    parser.add_argument("--ttft-ms", type=float, default=20.0)
+    parser.add_argument("--ms-per-token", type=float, default=0.5)
+    parser.add_argument("--tokens", type=int, default=200, help="filler per reply")
+    parser.add_argument("--file-lines", type=int, default=40)
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--compare", help="baseline results JSON")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=None,
+        help="exit 1 if any metric regresses by more than this percent",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    llm = ScriptedLLM(args.ttft_ms, args.ms_per_token, args.tokens, args.file_lines)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_benchmark(llm, args.threads, args.turns, tmp)
+
+    report = {
+        "benchmark": "graph",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            k: v for k, v in vars(args).items() if k not in ("output", "compare")
+        },
+        "streaming": OllamaConfig.STREAMING,
+        "results": results,
+    }
+    _print_summary(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    rows = compare(base["results"], results)
+    print(f"\n{'metric':<40}{'base':>10}{'current':>10}{'worse %':>9}")
+    for key, before, after, change in rows:
+        print(f"{key:<40}{before:>10.2f}{after:>10.2f}{change:>9.1f}")
+    if args.max_regression is not None:
+        regressed = [row for row in rows if row[3] > args.max_regression]
+        if regressed:
+            print(f"{len(regressed)} metric(s) regressed > {args.max_regression}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
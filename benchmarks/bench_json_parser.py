@@ -0,0 +1,127 @@
+"""
+extract_json 마이크로 벤치마크: 기존 다중 패스 구현 vs 단일 패스 스캐너
+
+실행: python -m benchmarks.bench_json_parser [--repeat 20]
+"""
+
+import argparse
+import ast
+import json
+import re
+import timeit
+from typing import Any, Dict, List
+
+from utils.json_parser import ToolCallScanner, extract_json
+
+
+# =============================================================================
+# Legacy implementation (비교 기준)
+# =============================================================================
+def _legacy_from_code_blocks(text: str) -> List[Dict[str, Any]]:
+    blocks = []
+    matches = re.findall(r"```json(.*?)```", text, re.DOTALL)
+    for match in matches:
+        clean_json = re.sub(r",\s*([\]}])", r"\1", match.strip())
+        try:
+            data = json.loads(clean_json)
+        except json.JSONDecodeError:
+            try:
+                data = ast.literal_eval(clean_json)
+            except Exception:
+                continue
+        if isinstance(data, dict):
+            blocks.append(data)
+        elif isinstance(data, list):
+            blocks.extend(data)
+    return blocks
+
+
+def _legacy_fallback(text: str) -> List[Dict[str, Any]]:
+    try:
+        start, end = text.find("{"), text.rfind("}")
+        if start != -1 and end != -1:
+            sub = re.sub(r",\s*([\]}])", r"\1", text[start : end + 1])
+            try:
+                data = json.loads(sub)
+            except Exception:
+                data = ast.literal_eval(sub)
+            if isinstance(data, dict):
+                return [data]
+    except Exception:
+        pass
+    return []
+
+
+def legacy_extract_json(text: str) -> List[Dict[str, Any]]:
+    return _legacy_from_code_blocks(text) or _legacy_fallback(text)
+
+
+# =============================================================================
+# Synthetic responses
+# =============================================================================
+def _payload(size: int) -> str:
+    line = "    value = compute(items[index], {'key': index}) # comment\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def make_responses() -> Dict[str, str]:
+    """크기별 file_write 응답 + 펜스 없는 raw 응답"""
+    responses = {}
+    for size in (1_000, 100_000, 1_000_000):
+        call = {
+            "name": "file_write",
+            "arguments": {"file_path": "a.py", "content": _payload(size)},
+        }
+        responses[f"fenced_{size // 1000}KB"] = (
+            "Thought: writing the module.\n```json\n"
+            + json.dumps(call, indent=2)
+            + "\n```\nObservation: (hallucinated) ok"
+        )
+    call = {
+        "name": "file_write",
+        "arguments": {"file_path": "b.py", "content": _payload(100_000)},
+    }
+    responses["raw_100KB"] = "Calling the tool now: " + json.dumps(call) + " done."
+    return responses
+
+
+def _time(func, text: str, repeat: int) -> float:
+    return min(timeit.repeat(lambda: func(text), number=1, repeat=repeat)) * 1000
+
+
+def _stream_time(text: str, repeat: int, chunk: int = 16) -> float:
+    """스캐너에 토큰 단위(chunk 글자)로 증분 입력하는 경우"""
+
+    def run():
+        scanner = ToolCallScanner()
+        for i in range(0, len(text), chunk):
+            scanner.feed(text[i : i + chunk])
+        scanner.close()
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'case':<16}{'legacy(ms)':>12}{'scanner(ms)':>13}{'speedup':>9}{'stream(ms)':>12}"
+    )
+    for name, text in make_responses().items():
+        assert extract_json(text) == legacy_extract_json(text), name
+        legacy = _time(legacy_extract_json, text, args.repeat)
+        scanner = _time(extract_json, text, args.repeat)
+        stream = (
+            _stream_time(text, max(1, args.repeat // 10))
+            if len(text) < 200_000
+            else float("nan")
+        )
+        print(
+            f"{name:<16}{legacy:>12.3f}{scanner:>13.3f}{legacy / scanner:>8.2f}x{stream:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+web_search 검색 계층 벤치마크 (네트워크 불필요, 로컬 문서 백엔드 사용)
+- cold: 캐시 없이 백엔드 호출 (색인 생성 포함)
+- warm: 같은 검색어 재요청 (SQLite TTL 캐시)
+- coalesced: 동시에 들어온 같은 검색어 N개
+
+실행: python -m benchmarks.bench_search [--docs 2000] [--queries 50]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.search import LocalDocsBackend, SearchService
+
+_WORDS = (
+    "graph state node edge checkpoint sqlite ollama stream token cache planner "
+    "coder reviewer supervisor tool sandbox lint search context budget prompt"
+).split()
+
+
+def make_corpus(root: str, docs: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(docs):
+        with open(os.path.join(root, f"doc_{i:05d}.md"), "w", encoding="utf-8") as f:
+            f.write(" ".join(rng.choice(_WORDS) for _ in range(400)))
+
+
+def _elapsed_ms(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    queries = [" ".join(rng.sample(_WORDS, 3)) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "docs")
+        os.makedirs(corpus)
+        make_corpus(corpus, args.docs)
+
+        backend = LocalDocsBackend(corpus)
+        service = SearchService(backend, os.path.join(tmp, "cache.sqlite"), 3600)
+
+        index_ms = _elapsed_ms(backend.refresh)
+        cold_ms = _elapsed_ms(lambda: [service.search(q) for q in queries])
+        warm_ms = _elapsed_ms(lambda: [service.search(q.upper()) for q in queries])
+
+        burst = f"{queries[0]} burst"
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            burst_ms = _elapsed_ms(
+                lambda: list(pool.map(service.search, [burst] * args.concurrency))
+            )
+        service.close()
+
+    n = len(queries)
+    print(f"index build        : {index_ms:9.2f} ms ({args.docs} docs)")
+    print(f"cold (per query)   : {cold_ms / n:9.3f} ms")
+    print(f"warm (per query)   : {warm_ms / n:9.3f} ms ({cold_ms / warm_ms:.1f}x)")
+    print(f"{f'burst x{args.concurrency}':<19}: {burst_ms:9.2f} ms")
+    print(f"stats              : {dict(service.stats)}")
+
+
+if __name__ == "__main__":
+    main()
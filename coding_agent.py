@@ -5,24 +5,49 @@ Refactored to Standard LangGraph Structure & Modular Runtime
 """
 
 import functools
+import logging
 import os
 import re
-from typing import Annotated, List, Sequence, TypedDict
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import (
+    Annotated,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+)
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langgraph.checkpoint.sqlite import SqliteSaver
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 
-from config import AgentConfig, OllamaConfig
-from core.agent_runtime import run_react_agent
-from core.llm_factory import get_llm
+from config import AgentConfig, ObservabilityConfig, OllamaConfig
+from core.agent_runtime import (
+    AgentPrompt,
+    arun_react_agent,
+    compile_agent_prompt,
+    run_react_agent,
+)
+from core.checkpoint import open_async_checkpointer, open_checkpointer
+from core.context_manager import count_tokens
+from core.llm_factory import get_llm, role_settings
+from core.metrics import REGISTRY, dump_metrics, record_decision, record_llm_call
+from core.routing import route_by_rules
+from core.warmup import describe_warmup, on_warmup_done, start_warmup
 from tools import CODER_TOOLS, PLANNER_TOOLS, REVIEWER_TOOLS
 
 # SQLite DB 경로
 DB_PATH = os.path.join(OllamaConfig.WORKSPACE_DIR, "agent_memory.sqlite")
 
+logger = logging.getLogger(__name__)
+
 
 # =============================================================================
 # State 정의
@@ -37,7 +62,13 @@ class AgentState(TypedDict):
 # =============================================================================
 # Custom Agent Node (Internal ReAct Loop)
 # =============================================================================
-def custom_agent_node(state: AgentState, name: str, system_prompt: str, tools: List):
+def custom_agent_node(
+    state: AgentState,
+    name: str,
+    system_prompt: str,
+    tools: List,
+    prompt: Optional[AgentPrompt] = None,
+):
     """
     커스텀 에이전트 노드 Wrapper.
     Core Runtime을 호출하고 결과를 Graph State 형식으로 변환합니다.
@@ -45,68 +76,79 @@ def custom_agent_node(state: AgentState, name: str, system_prompt: str, tools: L
     history = state["messages"]
 
     # Core Runtime 실행 (Modularized)
-    final_response = run_react_agent(name, system_prompt, tools, history)
+    final_response = run_react_agent(name, system_prompt, tools, history, prompt=prompt)
 
     # 결과 반환 (HumanMessage로 포장하여 Supervisor에게 전달)
     return {"messages": [HumanMessage(content=final_response, name=name)]}
 
 
+async def acustom_agent_node(
+    state: AgentState,
+    name: str,
+    system_prompt: str,
+    tools: List,
+    prompt: Optional[AgentPrompt] = None,
+):
+    """custom_agent_node의 비동기 버전 (graph.astream 에서 사용)"""
+    history = state["messages"]
+    final_response = await arun_react_agent(
+        name, system_prompt, tools, history, prompt=prompt
+    )
+    return {"messages": [HumanMessage(content=final_response, name=name)]}
+
+
 # =============================================================================
 # Supervisor (Orchestrator)
 # =============================================================================
-def supervisor_node(state: AgentState):
-    """Supervisor logic: 다음 에이전트를 결정"""
-    llm = get_llm()
+def _build_supervisor_prompt() -> ChatPromptTemplate:
+    """
+    Supervisor 프롬프트 구성 (create_graph 에서 한 번만 생성).
+    지시문은 모두 선두 system 메시지에 두고 대화 히스토리를 마지막에 배치하여,
+    다음 라우팅 요청이 이전 요청(+ 응답)을 그대로 prefix 로 갖도록 합니다.
+    """
     conf = AgentConfig.SUPERVISOR_CONFIG
-
-    # 프롬프트 구성
-    prompt = ChatPromptTemplate.from_messages(
+    return ChatPromptTemplate.from_messages(
         [
             ("system", conf["prompt"]),
             MessagesPlaceholder(variable_name="messages"),
-            (
-                "system",
-                "Given the conversation above, who should act next? "
-                "Select one of: {options}. "
-                "Return ONLY the name of the next worker, or 'FINISH' if done.",
-            ),
         ]
     ).partial(options=str(conf["options"]), members=", ".join(conf["members"]))
 
-    chain = prompt | llm
-    response = chain.invoke(state)
-    decision = response.content.strip()
+
+def _parse_decision(decision: str) -> Optional[str]:
+    """LLM의 결정 문자열에서 다음 에이전트 추출 (유효한 이름이 없으면 None)"""
+    conf = AgentConfig.SUPERVISOR_CONFIG
 
     # 정규식 기반 매칭 (견고성 강화)
     # Priority: FINISH > Reviewer > Coder > Planner
     # 만약 FINISH가 감지되면 무조건 종료.
 
-    next_agent = None
-
     # 1. Explicit FINISH check
     if re.search(r"\bFINISH\b", decision, re.IGNORECASE):
-        next_agent = "FINISH"
-    else:
-        # 2. Find other agents
-        for option in conf["options"]:
-            if option == "FINISH":
-                continue
-            if re.search(rf"\b{option}\b", decision, re.IGNORECASE):
-                next_agent = option
-                # Found one, assume single intent or take the first one found?
-                # Usually better to take strict match or last one.
-                # But let's stick to simple logic: first found non-FINISH.
-                break
+        return "FINISH"
+
+    # 2. Find other agents (first found non-FINISH)
+    for option in conf["options"]:
+        if option == "FINISH":
+            continue
+        if re.search(rf"\b{option}\b", decision, re.IGNORECASE):
+            return option
+    return None
+
+
+def _route_from_decision(decision: str, source: str = "llm"):
+    """LLM의 결정 문자열을 파싱하여 State 업데이트로 변환"""
+    next_agent = _parse_decision(decision)
 
     if not next_agent:
-        # Fallback
-        next_agent = "FINISH"  # Default to finish if unsure, or maybe Reviewer?
         # Safe default: FINISH to avoid infinite loops if LLM is broken.
-        print(
-            f"[Supervisor] Warning: Could not parse decision '{decision}'. Defaulting to FINISH."
+        next_agent = "FINISH"
+        logger.warning(
+            "[Supervisor] Could not parse decision %r. Defaulting to FINISH.", decision
         )
 
-    print(f"[Supervisor] Raw: {decision!r} -> Next: {next_agent}")
+    record_decision(source, next_agent)
+    logger.info("[Supervisor] Raw: %r -> Next: %s", decision, next_agent)
 
     return {
         "messages": [AIMessage(content=decision, name="Supervisor")],
@@ -114,14 +156,125 @@ def supervisor_node(state: AgentState):
     }
 
 
+def _route_by_rules(state: AgentState):
+    """규칙 기반 Fast Path: 결정 가능하면 State 업데이트, 아니면 None"""
+    if not AgentConfig.SUPERVISOR_RULES_ENABLED:
+        return None
+
+    next_agent = route_by_rules(state["messages"])
+    if next_agent is None:
+        return None
+
+    record_decision("rule", next_agent)
+    logger.info("[Supervisor] Rule -> Next: %s", next_agent)
+    return {
+        "messages": [AIMessage(content=next_agent, name="Supervisor")],
+        "next": next_agent,
+    }
+
+
+def _supervisor_request(
+    state: AgentState, prompt: Optional[ChatPromptTemplate]
+) -> Tuple[List[BaseMessage], str, dict]:
+    """Supervisor LLM 요청 구성: (메시지, 모델, 옵션)"""
+    prompt = prompt or _build_supervisor_prompt()
+    model, options = role_settings("Supervisor")
+    return prompt.format_messages(messages=state["messages"]), model, options
+
+
+def _retry_model(decision: str, model: str) -> Optional[str]:
+    """
+    결정이 유효하지 않을 때 다시 물을 (더 큰) fallback 모델.
+    결정이 유효하거나 fallback 모델이 없거나 Supervisor 모델과 같으면 None
+    """
+    fallback = OllamaConfig.SUPERVISOR_FALLBACK_MODEL
+    if not fallback or fallback == model or _parse_decision(decision) is not None:
+        return None
+    logger.warning(
+        "[Supervisor] Invalid decision %r from %s, retrying with %s.",
+        decision,
+        model,
+        fallback,
+    )
+    return fallback
+
+
+def _ask_supervisor(messages: List[BaseMessage], model: str, options: dict) -> str:
+    started = time.perf_counter()
+    response = get_llm(model, **options).invoke(messages)
+    record_llm_call(
+        "Supervisor", started, message=response, prompt_size=count_tokens(messages)
+    )
+    return response.content.strip()
+
+
+async def _aask_supervisor(
+    messages: List[BaseMessage], model: str, options: dict
+) -> str:
+    started = time.perf_counter()
+    response = await get_llm(model, **options).ainvoke(messages)
+    record_llm_call(
+        "Supervisor", started, message=response, prompt_size=count_tokens(messages)
+    )
+    return response.content.strip()
+
+
+def supervisor_node(state: AgentState, prompt: Optional[ChatPromptTemplate] = None):
+    """
+    Supervisor logic: 다음 에이전트를 결정.
+    Supervisor 모델(작은 모델 권장)의 결정이 유효하지 않으면 fallback 모델로 다시 결정합니다.
+    """
+    routed = _route_by_rules(state)
+    if routed is not None:
+        return routed
+
+    messages, model, options = _supervisor_request(state, prompt)
+    decision = _ask_supervisor(messages, model, options)
+    retry = _retry_model(decision, model)
+    if retry is None:
+        return _route_from_decision(decision, "llm")
+    decision = _ask_supervisor(messages, retry, options)
+    return _route_from_decision(decision, "fallback")
+
+
+async def asupervisor_node(
+    state: AgentState, prompt: Optional[ChatPromptTemplate] = None
+):
+    """supervisor_node의 비동기 버전"""
+    routed = _route_by_rules(state)
+    if routed is not None:
+        return routed
+
+    messages, model, options = _supervisor_request(state, prompt)
+    decision = await _aask_supervisor(messages, model, options)
+    retry = _retry_model(decision, model)
+    if retry is None:
+        return _route_from_decision(decision, "llm")
+    decision = await _aask_supervisor(messages, retry, options)
+    return _route_from_decision(decision, "fallback")
+
+
 # =============================================================================
 # Graph Construction
 # =============================================================================
+def _dual_node(func, afunc, **kwargs) -> RunnableLambda:
+    """동기/비동기 구현을 함께 가진 노드 생성 (stream / astream 모두 지원)"""
+    if kwargs:
+        func = functools.partial(func, **kwargs)
+        afunc = functools.partial(afunc, **kwargs)
+    return RunnableLambda(func, afunc=afunc)
+
+
 def create_graph():
     workflow = StateGraph(AgentState)
 
-    # Supervisor Node
-    workflow.add_node("Supervisor", supervisor_node)
+    # Supervisor Node (프롬프트는 그래프 생성 시 한 번만 구성)
+    workflow.add_node(
+        "Supervisor",
+        _dual_node(
+            supervisor_node, asupervisor_node, prompt=_build_supervisor_prompt()
+        ),
+    )
 
     # Worker Nodes Check
     agents = [
@@ -130,11 +283,17 @@ def create_graph():
         ("Reviewer", REVIEWER_TOOLS, AgentConfig.PROMPTS["Reviewer"]),
     ]
 
-    for name, tools, prompt in agents:
+    for name, tools, role_prompt in agents:
         workflow.add_node(
             name,
-            functools.partial(
-                custom_agent_node, name=name, system_prompt=prompt, tools=tools
+            _dual_node(
+                custom_agent_node,
+                acustom_agent_node,
+                name=name,
+                system_prompt=role_prompt,
+                tools=tools,
+                # 도구 설명 / 시스템 프롬프트는 역할별로 한 번만 구성
+                prompt=compile_agent_prompt(role_prompt, tools),
             ),
         )
         # 모든 Worker는 작업 후 Supervisor로 복귀
@@ -154,20 +313,82 @@ def create_graph():
     return workflow
 
 
+def _warmup_state(warming) -> str:
+    """시작 로그용 워밍업 상태 (off / 진행 중인 모델 수)"""
+    if not warming:
+        return "off"
+    pending = sum(not future.done() for future in warming.values())
+    return f"{pending}/{len(warming)} models loading in background"
+
+
+def _begin_startup(db_path: str, models: Optional[Iterable[str]]):
+    """시작 시각 기록, 워밍업 시작(기다리지 않음), DB 디렉토리 생성"""
+    started = time.perf_counter()
+    warming = start_warmup(models)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    return started, warming
+
+
+def _finish_startup(started: float, warming) -> None:
+    """준비 완료 시간 기록, 워밍업 완료 시간은 완료 콜백에서 기록"""
+
+    def _report_warmup(loaded):
+        if not loaded:
+            return
+        warm = time.perf_counter() - started
+        REGISTRY.set("startup_warm_seconds", warm)
+        logger.info("Models warm in %.2fs (%s)", warm, describe_warmup(loaded))
+
+    ready = time.perf_counter() - started
+    REGISTRY.set("startup_ready_seconds", ready)
+    logger.info("Ready in %.2fs (warm-up: %s)", ready, _warmup_state(warming))
+    on_warmup_done(warming, _report_warmup)
+
+
+@contextmanager
+def open_graph(
+    db_path: str = DB_PATH, models: Optional[Iterable[str]] = None
+) -> Iterator:
+    """
+    체크포인터가 연결된 컴파일된 그래프 (CLI / 서버 / 배치 공용 시작 단계).
+    모델 워밍업은 백그라운드에서 시작하며 기다리지 않습니다. 그래프 컴파일 / 체크포인터가
+    준비되면 바로 그래프를 반환하고, 워밍업 완료 시간은 완료 콜백에서 기록합니다.
+    """
+    started, warming = _begin_startup(db_path, models)
+    with open_checkpointer(db_path) as memory:
+        graph = create_graph().compile(checkpointer=memory)
+        _finish_startup(started, warming)
+        yield graph
+
+
+@asynccontextmanager
+async def aopen_graph(
+    db_path: str = DB_PATH, models: Optional[Iterable[str]] = None
+) -> AsyncIterator:
+    """
+    open_graph 의 비동기 버전 (graph.astream / ainvoke 용, AsyncSqliteSaver 사용).
+    비동기 체크포인터는 동기 stream / invoke 를 지원하지 않습니다.
+    """
+    started, warming = _begin_startup(db_path, models)
+    async with open_async_checkpointer(db_path) as memory:
+        graph = create_graph().compile(checkpointer=memory)
+        _finish_startup(started, warming)
+        yield graph
+
+
 # =============================================================================
 # Main
 # =============================================================================
 def main():
+    logging.basicConfig(
+        level=ObservabilityConfig.LOG_LEVEL, format=ObservabilityConfig.LOG_FORMAT
+    )
     print("=" * 60)
     print("🤖 Multi-Agent System (Standardized LangGraph v2)")
     print("=" * 60)
 
-    workflow = create_graph()
-
-    # DB 연결 (없으면 자동 생성)
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    with SqliteSaver.from_conn_string(DB_PATH) as memory:
-        graph = workflow.compile(checkpointer=memory)
+    # DB 연결 (없으면 자동 생성) + 모델 워밍업
+    with open_graph(DB_PATH) as graph:
         config = {"configurable": {"thread_id": "standard_loop_1"}}
 
         print("Type your request (or 'quit'):\n")
@@ -189,6 +410,9 @@ def main():
                             sender = msg.name if hasattr(msg, "name") else node
                             print(f"\n> [{sender}]: {msg.content[:300]}...")
 
+                if ObservabilityConfig.METRICS_FILE:
+                    dump_metrics(ObservabilityConfig.METRICS_FILE)
+
             except KeyboardInterrupt:
                 break
             except Exception as e:
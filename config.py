@@ -19,15 +19,147 @@ class OllamaConfig:
     DEFAULT_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5-coder:14b")
     TEMPERATURE = 0.0
 
+    # 역할별 모델 (미지정 시 DEFAULT_MODEL). 같은 모델을 쓰는 역할끼리 클라이언트를 공유
+    # 예: SUPERVISOR_MODEL=qwen2.5-coder:3b, PLANNER_MODEL=qwen2.5-coder:3b
+    ROLE_MODELS = {
+        "Supervisor": os.getenv("SUPERVISOR_MODEL") or DEFAULT_MODEL,
+        "Planner": os.getenv("PLANNER_MODEL") or DEFAULT_MODEL,
+        "Coder": os.getenv("CODER_MODEL") or DEFAULT_MODEL,
+        "Reviewer": os.getenv("REVIEWER_MODEL") or DEFAULT_MODEL,
+    }
+    # 역할별 생성 옵션 (ChatOllama 인자: num_predict / num_ctx / stop 등)
+    # num_ctx 를 지정하면 해당 역할의 컨텍스트 예산도 함께 바뀜
+    ROLE_OPTIONS = {
+        # 라우팅 결정은 단어 하나 (FINISH / Planner / Coder / Reviewer)
+        "Supervisor": {"num_predict": 8},
+        "Planner": {},
+        "Coder": {},
+        "Reviewer": {},
+    }
+    # Supervisor 결정이 유효하지 않으면 이 모델로 한 번 더 결정
+    SUPERVISOR_FALLBACK_MODEL = os.getenv("SUPERVISOR_FALLBACK_MODEL") or DEFAULT_MODEL
+    # 스트리밍 생성: 도구 호출 블록이 완성되면 즉시 생성 중단 후 도구 실행
+    STREAMING = os.getenv("OLLAMA_STREAMING", "false").lower() == "true"
+
     # 워크플로우 설정
     MAX_ITERATIONS = 10  # Self-correction 최대 반복 횟수
-    TIMEOUT_SECONDS = 120
+    TIMEOUT_SECONDS = 120  # Ollama HTTP 요청 타임아웃
+
+    # 컨텍스트 설정: NUM_CTX 중 CONTEXT_BUDGET_RATIO 만큼을 프롬프트에 사용
+    NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+    CONTEXT_BUDGET_RATIO = float(os.getenv("CONTEXT_BUDGET_RATIO", "0.75"))
+    CONTEXT_KEEP_RECENT = 6  # 원문 그대로 유지할 최근 메시지 수
+    OBSERVATION_TRUNCATE_CHARS = 800  # 오래된 도구 관찰의 최대 길이
+
+    # 클라이언트 풀 설정 (클라이언트당 HTTP 연결 수 / 보관할 클라이언트 수)
+    HTTP_POOL_SIZE = int(os.getenv("OLLAMA_HTTP_POOL_SIZE", "8"))
+    CLIENT_REGISTRY_SIZE = int(os.getenv("OLLAMA_CLIENT_REGISTRY_SIZE", "8"))
+
+    # 응답 캐시 설정 (workspace/llm_cache.sqlite, TEMPERATURE=0 일 때만 의미 있음)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+    # 모델 상주 시간 (Ollama keep_alive: "30m", "8h", 초 단위 정수, -1 = 무기한)
+    # 모델별 지정: OLLAMA_KEEP_ALIVE_MODELS="qwen2.5-coder:14b=8h,qwen2.5:3b=-1"
+    KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    KEEP_ALIVE_MODELS = os.getenv("OLLAMA_KEEP_ALIVE_MODELS", "")
+
+    # 시작 시 사용하는 모든 모델을 짧은 생성으로 미리 로드 (그래프 준비와 병렬)
+    WARMUP_ENABLED = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+    WARMUP_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_WARMUP_TIMEOUT_SECONDS", "120"))
 
     # 작업 디렉토리 설정
     # 기본값: 현재 프로젝트 루트의 'workspace' 폴더
     WORKSPACE_DIR = os.getenv("WORKSPACE_DIR", os.path.join(os.getcwd(), "workspace"))
 
 
+class ToolConfig:
+    """도구 실행 설정"""
+
+    # 한 응답에 포함된 독립적인 도구 호출의 최대 동시 실행 수 (1 = 순차 실행)
+    MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+    # 도구 호출 1건당 최대 실행 시간 (초)
+    TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "60"))
+
+    # run_python_secure 용 미리 실행해 둔 샌드박스 워커 수 (0 = 매번 새 프로세스 실행)
+    SANDBOX_POOL_SIZE = int(os.getenv("SANDBOX_POOL_SIZE", "2"))
+    # 워커 1개가 재사용되는 최대 실행 횟수 (이후 새 워커로 교체)
+    SANDBOX_MAX_RUNS = int(os.getenv("SANDBOX_MAX_RUNS", "50"))
+    # 코드 실행 1건당 최대 실행 시간 (초)
+    SANDBOX_TIMEOUT_SECONDS = float(os.getenv("SANDBOX_TIMEOUT_SECONDS", "30"))
+    # 보안 분석 결과(및 컴파일된 코드) 캐시 항목 수 (0 = 캐시 비활성화)
+    SECURITY_CACHE_SIZE = int(os.getenv("SECURITY_CACHE_SIZE", "256"))
+    # file_read / file_write 공유 파일 캐시의 최대 보관 문자 수
+    FILE_CACHE_MAX_CHARS = int(os.getenv("FILE_CACHE_MAX_CHARS", "16000000"))
+    # file_read 가 한 번에 반환하는 최대 문자 수 (초과분은 범위 지정으로 이어서 읽음)
+    FILE_READ_MAX_CHARS = int(os.getenv("FILE_READ_MAX_CHARS", "20000"))
+    # 이 크기(바이트)를 넘는 파일은 캐시 대신 mmap으로 필요한 구간만 읽음
+    FILE_MMAP_THRESHOLD_BYTES = int(os.getenv("FILE_MMAP_THRESHOLD_BYTES", "1048576"))
+    # list_directory 가 반환하는 최대 항목 수
+    LIST_MAX_ENTRIES = int(os.getenv("LIST_MAX_ENTRIES", "200"))
+    # run_linter 가 표시하는 최대 문제 수
+    LINT_MAX_FINDINGS = int(os.getenv("LINT_MAX_FINDINGS", "50"))
+    # web_search 백엔드 ("duckduckgo" 또는 네트워크 없이 로컬 문서를 검색하는 "local")
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "duckduckgo")
+    # local 백엔드가 색인할 디렉토리 (기본값: 워크스페이스)
+    SEARCH_LOCAL_DIR = os.getenv("SEARCH_LOCAL_DIR", "")
+    # 검색 결과 캐시 유효 시간 (초)
+    SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400"))
+    # 웹 검색 백엔드 호출 간 최소 간격 (초)
+    SEARCH_MIN_INTERVAL_SECONDS = float(os.getenv("SEARCH_MIN_INTERVAL_SECONDS", "1.0"))
+    # list_directory 에서 항상 제외하는 이름
+    LIST_IGNORE = frozenset(
+        {
+            ".git",
+            "__pycache__",
+            ".venv",
+            "venv",
+            "node_modules",
+            ".mypy_cache",
+            ".pytest_cache",
+            ".ruff_cache",
+        }
+    )
+
+
+class CheckpointConfig:
+    """체크포인트 저장소(agent_memory.sqlite) 설정"""
+
+    # WAL 모드에서 NORMAL 은 커밋마다 fsync 하지 않음 (FULL = 매 커밋 동기화)
+    SYNCHRONOUS = os.getenv("CHECKPOINT_SYNCHRONOUS", "NORMAL")
+    CACHE_SIZE_KB = int(os.getenv("CHECKPOINT_CACHE_SIZE_KB", "32768"))
+    MMAP_SIZE_BYTES = int(os.getenv("CHECKPOINT_MMAP_SIZE_BYTES", "268435456"))
+    BUSY_TIMEOUT_MS = int(os.getenv("CHECKPOINT_BUSY_TIMEOUT_MS", "5000"))
+    # 슈퍼스텝 내 중간 쓰기를 체크포인트 저장과 함께 한 번에 커밋
+    BATCH_WRITES = os.getenv("CHECKPOINT_BATCH_WRITES", "true").lower() == "true"
+
+
+class ServerConfig:
+    """서버 모드(server.py) 설정"""
+
+    HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    PORT = int(os.getenv("SERVER_PORT", "8765"))
+    # 동시에 실행할 태스크 수 (각 태스크는 Ollama 요청을 순차적으로 보냄)
+    MAX_WORKERS = int(os.getenv("SERVER_MAX_WORKERS", "4"))
+    # 실행 대기 가능한 태스크 수 (초과 시 429)
+    MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "16"))
+    # 종료 시 진행 중인 태스크를 기다리는 최대 시간
+    DRAIN_TIMEOUT_SECONDS = float(os.getenv("SERVER_DRAIN_TIMEOUT_SECONDS", "300"))
+    # 이벤트 스트림 유휴 시 heartbeat 간격
+    HEARTBEAT_SECONDS = float(os.getenv("SERVER_HEARTBEAT_SECONDS", "15"))
+
+
+class ObservabilityConfig:
+    """로그 / 메트릭 설정"""
+
+    # 운영 환경에서는 WARNING 으로 내부 루프 로그를 숨김
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+    # 설정 시 각 턴 종료 후 메트릭 기록 (.json: JSON, 그 외: Prometheus 텍스트)
+    METRICS_FILE = os.getenv("METRICS_FILE", "")
+
+
 class AgentConfig:
     """에이전트 시스템 프롬프트 설정"""
 
@@ -73,6 +205,7 @@ class AgentConfig:
             "5. **Approved / Success** -> `FINISH` (ONLY when Reviewer explicitly approves)\n"
             "</decision_logic>\n\n"
             "<output_rules>\n"
+            "Given the conversation that follows, decide who should act next.\n"
             "Return ONLY the name of the next worker (or FINISH). No other text.\n"
             "If the Reviewer says 'Approved', you MUST output 'FINISH'.\n"
             "Options: {options}\n"
@@ -82,6 +215,11 @@ class AgentConfig:
         "options": ["FINISH", "Planner", "Coder", "Reviewer"],
     }
 
+    # 명확한 전이(PLAN_CREATED -> Coder 등)는 LLM 호출 없이 규칙으로 라우팅
+    SUPERVISOR_RULES_ENABLED = (
+        os.getenv("SUPERVISOR_RULES_ENABLED", "true").lower() == "true"
+    )
+
     # Worker Prompts (Omni-Prompt Tier 2+: Defined Roles)
     PROMPTS = {
         "Planner": (
@@ -1,11 +1,44 @@
-from typing import Dict, List, Sequence
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
 from config import AgentConfig, OllamaConfig
-from core.llm_factory import get_llm
-from core.tool_executor import execute_tools_internal
-from utils.json_parser import extract_json
+from core.context_manager import count_tokens, default_budget, fit_to_budget
+from core.llm_factory import get_llm, role_settings
+from core.metrics import record_iterations, record_llm_call
+from core.tool_executor import aexecute_tools_internal, execute_tools_internal
+from utils.json_parser import (
+    ToolCallScanner,
+    ToolSchemas,
+    build_tool_schemas,
+    extract_tool_calls,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPrompt(NamedTuple):
+    """
+    역할별로 한 번만 구성하는 시스템 메시지와 도구 정보 (create_graph 에서 생성).
+    모든 반복 / 노드 실행이 같은 시스템 메시지로 시작하므로 Ollama 의
+    프롬프트 prefix(KV) 캐시가 재사용됩니다.
+    """
+
+    system_message: SystemMessage
+    tools_map: Dict
+    schemas: ToolSchemas
+
+
+def compile_agent_prompt(system_prompt: str, tools: List) -> AgentPrompt:
+    return AgentPrompt(
+        system_message=SystemMessage(
+            content=_prepare_agent_prompt(system_prompt, tools)
+        ),
+        tools_map={t.name: t for t in tools},
+        schemas=build_tool_schemas(tools),
+    )
 
 
 def _prepare_agent_prompt(system_prompt: str, tools: List) -> str:
@@ -25,9 +58,114 @@ If you are done, output a final explanation.
 """
 
 
+class _LLMCall:
+    """
+    LLM 호출 1회의 계측 / 스트림 처리 상태 (동기 / 비동기 호출 공용).
+    스트리밍 모드에서는 완성된 도구 호출 블록이 나오는 즉시 생성을 중단합니다.
+    지연(TTFT / 전체)과 토큰 수를 core.metrics 에 기록합니다.
+    """
+
+    def __init__(self, name: str, messages: List[BaseMessage], schemas: ToolSchemas):
+        self.name = name
+        self.started, self.prompt_size = time.perf_counter(), count_tokens(messages)
+        self.scanner = ToolCallScanner(schemas)
+        self.first_token_at, self.last_chunk = None, None
+
+    def complete(self, response: BaseMessage) -> str:
+        """비스트리밍 응답 기록"""
+        record_llm_call(
+            self.name, self.started, message=response, prompt_size=self.prompt_size
+        )
+        return response.content
+
+    def feed(self, chunk) -> bool:
+        """스트림 청크 반영. True 이면 도구 호출이 완성되어 생성을 중단해야 함"""
+        if self.first_token_at is None and chunk.content:
+            self.first_token_at = time.perf_counter()
+        self.last_chunk = chunk
+        self.scanner.feed(chunk.content)
+        if self.scanner.last_block_end == -1:
+            return False
+        logger.debug("[%s] Tool call complete, stopping generation early.", self.name)
+        return True
+
+    def record_stream(self):
+        """스트림 기록 (토큰 수는 마지막 청크에만 포함되어 조기 중단 시 기록되지 않음)"""
+        record_llm_call(
+            self.name,
+            self.started,
+            self.first_token_at,
+            self.last_chunk,
+            self.prompt_size,
+        )
+
+    def text(self) -> str:
+        """받은 텍스트 (도구 호출 블록에서 중단했으면 블록 끝까지)"""
+        end = self.scanner.last_block_end
+        return self.scanner.text if end == -1 else self.scanner.text[:end]
+
+
+def _invoke_llm(
+    llm,
+    messages: List[BaseMessage],
+    streaming: bool,
+    name: str,
+    schemas: ToolSchemas,
+) -> str:
+    """LLM 호출 (스트리밍 시 도구 호출 블록이 완성되면 조기 중단)"""
+    call = _LLMCall(name, messages, schemas)
+    if not streaming:
+        return call.complete(llm.invoke(messages))
+
+    stream = llm.stream(messages)
+    try:
+        for chunk in stream:
+            if call.feed(chunk):
+                break
+    finally:
+        # 제너레이터를 닫아 HTTP 스트림(및 Ollama 생성)을 취소
+        if hasattr(stream, "close"):
+            stream.close()
+        call.record_stream()
+    return call.text()
+
+
+async def _ainvoke_llm(
+    llm,
+    messages: List[BaseMessage],
+    streaming: bool,
+    name: str,
+    schemas: ToolSchemas,
+) -> str:
+    """_invoke_llm의 비동기 버전"""
+    call = _LLMCall(name, messages, schemas)
+    if not streaming:
+        return call.complete(await llm.ainvoke(messages))
+
+    stream = llm.astream(messages)
+    try:
+        async for chunk in stream:
+            if call.feed(chunk):
+                break
+    finally:
+        if hasattr(stream, "aclose"):
+            await stream.aclose()
+        call.record_stream()
+    return call.text()
+
+
+def _fit_context(messages: List[BaseMessage], name: str) -> List[BaseMessage]:
+    """토큰 예산(역할의 num_ctx 기준)에 맞춘 프롬프트 메시지 목록 (원본 히스토리는 유지)"""
+    budget = default_budget(role_settings(name)[1].get("num_ctx"))
+    prompt_messages, saved = fit_to_budget(messages, budget)
+    if saved:
+        logger.info("[%s] Context trimmed: saved ~%d tokens.", name, saved)
+    return prompt_messages
+
+
 def _handle_empty_response(messages: List[BaseMessage], name: str):
     """빈 응답 처리"""
-    print(f"[{name}] Warning: Empty response received.")
+    logger.warning("[%s] Empty response received.", name)
     messages.append(AIMessage(content=""))
     messages.append(
         HumanMessage(
@@ -36,34 +174,29 @@ def _handle_empty_response(messages: List[BaseMessage], name: str):
     )
 
 
-def _handle_tool_execution(
-    content: str,
-    tool_calls: List[Dict],
-    tools_map: Dict,
-    messages: List[BaseMessage],
-    name: str,
+def _append_tool_observation(
+    content: str, tool_output: str, messages: List[BaseMessage], name: str
 ):
-    """도구 실행 및 결과 메시지 추가"""
-    # 리스트 형태의 툴 호출 처리 (간혹 리스트로 올 수 있음)
-    if isinstance(tool_calls, list):
-        # 만약 리스트 요소가 dict가 아니라면, 첫 번째 요소만 사용하는 등의 처리가 필요할 수 있음
-        # 여기서는 단순히 첫 번째 호출만 사용하거나 반복한다고 가정
-        pass
-
-    # tool_calls could be a list of dicts.
-    # We iterate if there are multiple calls.
-    # But current logic seems to handle a list of tool_calls in execute_tools_internal too?
-    # Checking execute_tools_internal implementation: it takes List[Dict].
+    """도구 실행 결과를 메시지 히스토리에 추가"""
+    logger.debug("[%s] Tool Output: %s...", name, tool_output[:100])
 
-    # tool_executor expects List[Dict], and tool_calls is List[Dict] (from extract_json).
-    # So we just pass it.
+    messages.append(AIMessage(content=content))
+    messages.append(SystemMessage(content=f"TOOL OBSERVATION:\n{tool_output}"))
 
-    print(f"[{name}] Detected Tools: {[t.get('name') for t in tool_calls]}")
-    tool_output = execute_tools_internal(tool_calls, tools_map)
-    print(f"[{name}] Tool Output: {tool_output[:100]}...")
 
+def _handle_invalid_tool_calls(
+    content: str, errors: List[str], messages: List[BaseMessage], name: str
+):
+    """형식은 맞지만 스키마 검증에 실패한 도구 호출에 대한 경고"""
+    logger.warning("[%s] Invalid tool call(s): %s", name, errors)
     messages.append(AIMessage(content=content))
-    messages.append(SystemMessage(content=f"TOOL OBSERVATION:\n{tool_output}"))
+    messages.append(
+        SystemMessage(
+            content="SYSTEM WARNING: Your tool call could not be executed.\n"
+            + "\n".join(f"- {e}" for e in errors)
+            + "\nPlease TRY AGAIN with a valid tool name and arguments."
+        )
+    )
 
 
 def _handle_potential_tool_failure(
@@ -76,7 +209,7 @@ def _handle_potential_tool_failure(
     found_keyword = any(k in content for k in keywords)
 
     if found_keyword:
-        print(f"[{name}] Warning: Potential failed tool call detected (Invalid JSON).")
+        logger.warning("[%s] Potential failed tool call detected (Invalid JSON).", name)
         messages.append(AIMessage(content=content))
         messages.append(
             SystemMessage(
@@ -91,63 +224,207 @@ def _handle_potential_tool_failure(
     return False
 
 
-def run_react_agent(
+def _init_loop(
     name: str,
     system_prompt: str,
     tools: List,
     history: Sequence[BaseMessage],
-    max_iterations: int = OllamaConfig.MAX_ITERATIONS,
-) -> str:
+    prompt: Optional[AgentPrompt] = None,
+) -> Tuple[Dict, ToolSchemas, List[BaseMessage]]:
     """
-    커스텀 ReAct 에이전트 실행 루프 (Refactored).
-    [Think -> Tool Call -> Execute -> Observe] 반복.
+    도구 맵, 도구 인자 스키마 및 내부 메시지 목록 초기화.
+    prompt 가 없으면 system_prompt / tools 로 즉석에서 구성합니다.
+    이후 반복에서는 메시지를 뒤에 추가만 하므로 이전 요청이 다음 요청의 prefix 가 됩니다.
     """
-    print(f"\n[DEBUG] Executing node: {name}")
-    try:
-        llm = get_llm()
-    except Exception as e:
-        print(f"[ERROR] Failed to initialize LLM: {e}")
-        return f"Error initializing LLM: {e}"
+    if prompt is None:
+        prompt = compile_agent_prompt(system_prompt, tools)
+    internal_messages = [prompt.system_message] + list(history)
+    logger.info("--- [Internal Loop] %s Started ---", name)
+    return prompt.tools_map, prompt.schemas, internal_messages
 
-    tools_map = {t.name: t for t in tools}
-    loop_system_prompt = _prepare_agent_prompt(system_prompt, tools)
-    internal_messages = [SystemMessage(content=loop_system_prompt)] + list(history)
 
-    final_response = ""
-    print(f"\n--- [Internal Loop] {name} Started ---")
+def _classify_response(
+    content: str,
+    messages: List[BaseMessage],
+    name: str,
+    iteration: int,
+    schemas: ToolSchemas,
+) -> Tuple[str, List[Dict], List[str]]:
+    """
+    LLM 응답을 분류합니다.
+    반환값: (action, tool_calls, errors), action은 "retry" | "tools" | "final"
+    """
+    logger.debug("[%s] Iteration %d: %s...", name, iteration + 1, content[:100])
 
-    for i in range(max_iterations):
-        response = llm.invoke(internal_messages)
-        content = response.content
-        print(f"[{name}] Iteration {i + 1}: {content[:100]}...")
+    if not content.strip():
+        _handle_empty_response(messages, name)
+        return "retry", [], []
 
-        if not content.strip():
-            _handle_empty_response(internal_messages, name)
-            continue
+    tool_calls, errors = extract_tool_calls(content, schemas)
+    if tool_calls:
+        return "tools", tool_calls, errors
 
-        tool_calls = extract_json(content)
+    if errors:
+        _handle_invalid_tool_calls(content, errors, messages, name)
+        return "retry", [], []
 
-        if tool_calls:
-            _handle_tool_execution(
-                content, tool_calls, tools_map, internal_messages, name
-            )
-        else:
-            if _handle_potential_tool_failure(content, internal_messages, name):
-                continue
+    if _handle_potential_tool_failure(content, messages, name):
+        return "retry", [], []
+
+    return "final", [], []
 
-            # Final Answer
-            final_response = content
-            break
 
+def _finalize_response(name: str, final_response: str) -> str:
+    """최종 응답 후처리 (에러 메시지 및 Planner 시그널 보정)"""
     if not final_response:
         final_response = (
             "Error: Loop finished without valid final answer. (Empty or Max Iterations)"
         )
 
-    print(f"--- [Internal Loop] {name} Finished ---\n")
+    logger.info("--- [Internal Loop] %s Finished ---", name)
 
     # Planner 강제 완료 시그널
     if name == "Planner" and "PLAN_CREATED" not in final_response:
         final_response += "\nPLAN_CREATED"
 
     return final_response
+
+
+class _ReactLoop:
+    """
+    ReAct 루프 상태와 반복 단계 (동기 / 비동기 실행 공용).
+    실행 함수는 prompt() 로 받은 메시지로 LLM 을 호출하고, on_response() 가 도구 호출을
+    반환하면 실행 결과를 on_tool_output() 에 넘기는 것만 담당합니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        system_prompt: str,
+        tools: List,
+        history: Sequence[BaseMessage],
+        max_iterations: int,
+        streaming: Optional[bool],
+        prompt: Optional[AgentPrompt],
+    ):
+        model, options = role_settings(name)
+        self.llm = get_llm(model, **options)
+        self.name = name
+        self.tools_map, self.schemas, self.messages = _init_loop(
+            name, system_prompt, tools, history, prompt
+        )
+        self.streaming = OllamaConfig.STREAMING if streaming is None else streaming
+        self.max_iterations = max_iterations
+        self.iterations = 0
+        self.final_response = ""
+        self._done = False
+        self._pending: Tuple[str, Sequence[str]] = ("", ())
+
+    @classmethod
+    def start(cls, name: str, *args) -> "Union[_ReactLoop, str]":
+        """루프 생성 (LLM 초기화 실패 시 에러 문자열)"""
+        try:
+            return cls(name, *args)
+        except Exception as e:
+            logger.error("Failed to initialize LLM: %s", e)
+            return f"Error initializing LLM: {e}"
+
+    def prompt(self) -> Optional[List[BaseMessage]]:
+        """다음 LLM 호출에 보낼 메시지 (종료 시 None)"""
+        if self._done or self.iterations >= self.max_iterations:
+            return None
+        return _fit_context(self.messages, self.name)
+
+    def on_response(self, content: str) -> List[Dict]:
+        """LLM 응답 반영. 실행할 도구 호출 목록 반환 (없으면 빈 목록)"""
+        action, tool_calls, errors = _classify_response(
+            content, self.messages, self.name, self.iterations, self.schemas
+        )
+        self.iterations += 1
+        if action == "final":
+            self.final_response, self._done = content, True
+        if action != "tools":
+            return []
+        logger.info(
+            "[%s] Detected Tools: %s", self.name, [t.get("name") for t in tool_calls]
+        )
+        self._pending = (content, errors)
+        return tool_calls
+
+    def on_tool_output(self, tool_output: str):
+        """도구 실행 결과를 관찰로 추가 (검증에 실패한 호출의 에러도 함께 전달)"""
+        content, errors = self._pending
+        _append_tool_observation(
+            content, "\n".join([tool_output, *errors]), self.messages, self.name
+        )
+
+    def finish(self) -> str:
+        record_iterations(self.name, self.iterations)
+        return _finalize_response(self.name, self.final_response)
+
+
+def run_react_agent(
+    name: str,
+    system_prompt: str,
+    tools: List,
+    history: Sequence[BaseMessage],
+    max_iterations: int = OllamaConfig.MAX_ITERATIONS,
+    streaming: Optional[bool] = None,
+    prompt: Optional[AgentPrompt] = None,
+) -> str:
+    """
+    커스텀 ReAct 에이전트 실행 루프 (Refactored).
+    [Think -> Tool Call -> Execute -> Observe] 반복.
+    streaming=True 이면 도구 호출 블록이 완성되는 즉시 생성을 중단합니다.
+    prompt: compile_agent_prompt() 로 미리 구성한 역할 프롬프트 (없으면 매번 구성)
+    """
+    logger.debug("Executing node: %s", name)
+    loop = _ReactLoop.start(
+        name, system_prompt, tools, history, max_iterations, streaming, prompt
+    )
+    if isinstance(loop, str):
+        return loop
+
+    messages = loop.prompt()
+    while messages is not None:
+        content = _invoke_llm(
+            loop.llm, messages, loop.streaming, loop.name, loop.schemas
+        )
+        tool_calls = loop.on_response(content)
+        if tool_calls:
+            loop.on_tool_output(execute_tools_internal(tool_calls, loop.tools_map))
+        messages = loop.prompt()
+    return loop.finish()
+
+
+async def arun_react_agent(
+    name: str,
+    system_prompt: str,
+    tools: List,
+    history: Sequence[BaseMessage],
+    max_iterations: int = OllamaConfig.MAX_ITERATIONS,
+    streaming: Optional[bool] = None,
+    prompt: Optional[AgentPrompt] = None,
+) -> str:
+    """
+    run_react_agent의 비동기 버전.
+    LLM 호출(ainvoke)과 도구 실행을 await 하여 이벤트 루프를 블로킹하지 않습니다.
+    """
+    logger.debug("Executing node (async): %s", name)
+    loop = _ReactLoop.start(
+        name, system_prompt, tools, history, max_iterations, streaming, prompt
+    )
+    if isinstance(loop, str):
+        return loop
+
+    messages = loop.prompt()
+    while messages is not None:
+        content = await _ainvoke_llm(
+            loop.llm, messages, loop.streaming, loop.name, loop.schemas
+        )
+        tool_calls = loop.on_response(content)
+        if tool_calls:
+            output = await aexecute_tools_internal(tool_calls, loop.tools_map)
+            loop.on_tool_output(output)
+        messages = loop.prompt()
+    return loop.finish()
@@ -0,0 +1,143 @@
+"""
+agent_memory.sqlite 체크포인트 저장소 설정.
+- WAL + synchronous=NORMAL: 커밋마다 fsync 하지 않음 (WAL 체크포인트 시점에만 동기화)
+- 페이지 캐시 / mmap / busy_timeout 튜닝
+- 슈퍼스텝 내 put_writes 를 다음 put (체크포인트 저장) 과 같은 트랜잭션으로 묶어 커밋
+- 새 DB는 auto_vacuum=INCREMENTAL (core.retention 이 빈 페이지를 점진적으로 반환)
+- 비동기 그래프 경로용 AsyncSqliteSaver 도 같은 PRAGMA 로 생성
+"""
+
+import sqlite3
+import threading
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Set, Tuple
+
+import aiosqlite
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from config import CheckpointConfig
+
+# 노드 실패 / interrupt 시 기록되는 특수 채널. 이후 put 이 오지 않으므로 즉시 커밋해야 함
+# (langgraph._internal._constants.ERROR / INTERRUPT)
+_TERMINAL_WRITE_CHANNELS = frozenset({"__error__", "__interrupt__"})
+
+# uuid6 타임스탬프 기준 (1582-10-15 부터 100ns 단위)
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+
+def checkpoint_id_at(timestamp: float) -> str:
+    """
+    해당 시각에 생성된 가장 작은 체크포인트 ID.
+    LangGraph 체크포인트 ID는 uuid6 (시간순 정렬)이므로 문자열 비교로 시각을 판단할 수 있습니다.
+    """
+    ts = int(timestamp * 10_000_000) + _UUID_EPOCH_OFFSET
+    value = ((ts >> 12) & 0xFFFFFFFFFFFF) << 80
+    value |= 0x6 << 76  # version
+    value |= (ts & 0x0FFF) << 64
+    value |= 0x8 << 60  # variant (RFC 4122)
+    return str(uuid.UUID(int=value))
+
+
+def checkpoint_time(checkpoint_id: str) -> float:
+    """체크포인트 ID(uuid6)의 생성 시각 (Unix timestamp)"""
+    value = uuid.UUID(checkpoint_id).int
+    ts = (((value >> 80) & 0xFFFFFFFFFFFF) << 12) | ((value >> 64) & 0x0FFF)
+    return (ts - _UUID_EPOCH_OFFSET) / 10_000_000
+
+
+def connection_pragmas() -> str:
+    return (
+        # 새 DB에만 적용됨 (기존 DB는 core.retention.enable_incremental_vacuum)
+        "PRAGMA auto_vacuum=INCREMENTAL;"
+        "PRAGMA journal_mode=WAL;"
+        f"PRAGMA synchronous={CheckpointConfig.SYNCHRONOUS};"
+        f"PRAGMA cache_size=-{CheckpointConfig.CACHE_SIZE_KB};"
+        f"PRAGMA mmap_size={CheckpointConfig.MMAP_SIZE_BYTES};"
+        "PRAGMA temp_store=MEMORY;"
+        f"PRAGMA busy_timeout={CheckpointConfig.BUSY_TIMEOUT_MS};"
+    )
+
+
+class BatchedSqliteSaver(SqliteSaver):
+    """
+    put_writes 를 즉시 커밋하지 않고 같은 연결의 열린 트랜잭션에 쌓아 두었다가
+    다음 put (슈퍼스텝 종료 시 체크포인트 저장) 또는 flush() 에서 한 번에 커밋합니다.
+    모든 접근은 SqliteSaver.lock 으로 직렬화되므로 한 프로세스의 여러 스레드/세션이
+    같은 인스턴스를 공유할 수 있습니다.
+    (프로세스가 커밋 전에 종료되면 해당 슈퍼스텝의 태스크만 다시 실행됩니다.)
+    노드가 예외 / interrupt 로 끝나면 put 이 오지 않으므로, 그 쓰기와 함께 즉시 커밋하여
+    트랜잭션(및 SQLite 쓰기 잠금)이 열린 채 남지 않게 합니다. 병렬 노드의 쓰기가 그보다
+    늦게 도착할 수 있으므로, 같은 체크포인트의 이후 쓰기도 다음 put 전까지 즉시 커밋합니다.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, **kwargs):
+        super().__init__(conn, **kwargs)
+        self._deferring = threading.local()
+        # 종료 쓰기(__error__ / __interrupt__)를 받은 (thread_id, ns, checkpoint_id)
+        self._terminal: Set[Tuple[str, str, str]] = set()
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        defer = getattr(self._deferring, "active", False)
+        with super().cursor(transaction=transaction and not defer) as cur:
+            yield cur
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        configurable = config["configurable"]
+        thread = (configurable["thread_id"], configurable.get("checkpoint_ns", ""))
+        with self.lock:
+            self._terminal = {key for key in self._terminal if key[:2] != thread}
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        configurable = config["configurable"]
+        key = (
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"],
+        )
+        terminal = any(channel in _TERMINAL_WRITE_CHANNELS for channel, _ in writes)
+        with self.lock:
+            if terminal:
+                self._terminal.add(key)
+            commit_now = key in self._terminal
+        self._deferring.active = True
+        try:
+            super().put_writes(config, writes, task_id, task_path)
+        finally:
+            self._deferring.active = False
+        if commit_now:
+            self.flush()
+
+    def flush(self):
+        """보류 중인 쓰기 커밋"""
+        with self.lock:
+            if self.conn.in_transaction:
+                self.conn.commit()
+
+
+@contextmanager
+def open_checkpointer(db_path: str) -> Iterator[SqliteSaver]:
+    """튜닝된 동기 체크포인터 (BATCH_WRITES=false 이면 기본 SqliteSaver)"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        conn.executescript(connection_pragmas())
+        if CheckpointConfig.BATCH_WRITES:
+            saver = BatchedSqliteSaver(conn)
+        else:
+            saver = SqliteSaver(conn)
+        yield saver
+        if isinstance(saver, BatchedSqliteSaver):
+            saver.flush()
+    finally:
+        conn.close()
+
+
+@asynccontextmanager
+async def open_async_checkpointer(db_path: str) -> AsyncIterator[AsyncSqliteSaver]:
+    """튜닝된 비동기 체크포인터 (astream / ainvoke 용)"""
+    async with aiosqlite.connect(db_path) as conn:
+        await conn.executescript(connection_pragmas())
+        yield AsyncSqliteSaver(conn)
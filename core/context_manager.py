@@ -0,0 +1,134 @@
+"""
+ReAct 내부 루프의 프롬프트 토큰 예산 관리.
+시스템 프롬프트, 최초 사용자 요청, 최근 메시지는 그대로 유지하고
+오래된 도구 관찰부터 축약/제거하여 프롬프트가 예산을 넘지 않도록 합니다.
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from config import OllamaConfig
+
+# 토큰 수 추정치 (모델 토크나이저 없이 사용하는 보수적 근사값)
+CHARS_PER_TOKEN = 3.5
+MESSAGE_OVERHEAD_TOKENS = 4
+
+OBSERVATION_PREFIX = "TOOL OBSERVATION:"
+
+# file_read / file_write 결과의 버전 토큰 (core.file_cache.file_version)
+_VERSION_TOKEN = re.compile(r"\bversion: [0-9a-f]{12}\b")
+# 축약된 결과의 버전 대체 값: 모델이 known_version 으로 넘겨도 일치하지 않아 다시 읽게 됨
+STALE_VERSION = "version: truncated"
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    """메시지 1개의 토큰 수 추정"""
+    content = (
+        message.content if isinstance(message.content, str) else str(message.content)
+    )
+    return int(len(content) / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(estimate_tokens(m) for m in messages)
+
+
+def default_budget(num_ctx: Optional[int] = None) -> int:
+    """모델 컨텍스트 크기(기본값: OllamaConfig.NUM_CTX) 중 프롬프트에 사용할 토큰 예산"""
+    return int((num_ctx or OllamaConfig.NUM_CTX) * OllamaConfig.CONTEXT_BUDGET_RATIO)
+
+
+def _truncate_content(message: BaseMessage, max_chars: int) -> BaseMessage:
+    """
+    앞/뒤 일부만 남기고 가운데를 생략한 사본 반환.
+    내용이 빠진 파일 결과의 버전 토큰은 지워, 모델이 "변경 없음" 응답을 받지 않고 다시 읽게 합니다.
+    """
+    content = message.content
+    if not isinstance(content, str) or len(content) <= max_chars:
+        return message
+
+    head = content[: max_chars * 2 // 3]
+    tail = content[len(content) - max_chars // 3 :]
+    omitted = len(content) - len(head) - len(tail)
+    truncated = f"{head}\n... [truncated {omitted} chars] ...\n{tail}"
+    return message.model_copy(
+        update={"content": _VERSION_TOKEN.sub(STALE_VERSION, truncated)}
+    )
+
+
+def _is_observation(message: BaseMessage) -> bool:
+    return isinstance(message, SystemMessage) and str(message.content).startswith(
+        OBSERVATION_PREFIX
+    )
+
+
+def _is_user_request(message: BaseMessage) -> bool:
+    return isinstance(message, HumanMessage) and message.name is None
+
+
+def fit_to_budget(
+    messages: Sequence[BaseMessage],
+    budget: int,
+    keep_recent: int = OllamaConfig.CONTEXT_KEEP_RECENT,
+) -> Tuple[List[BaseMessage], int]:
+    """
+    메시지 목록을 토큰 예산 안으로 맞춥니다. 원본은 변경하지 않습니다.
+    반환값: (예산에 맞춘 메시지 목록, 절약한 토큰 수)
+
+    1. 최근 keep_recent 개 이전의 도구 관찰을 축약
+    2. 그래도 초과하면 오래된 메시지부터 제거 (최초 사용자 요청은 유지)
+    3. 그래도 초과하면 시스템 프롬프트를 제외한 메시지 본문을 축약
+    4. 그래도 초과하면 마지막 메시지만 남을 때까지 제거
+    (시스템 프롬프트 자체가 예산보다 크면 예산을 보장할 수 없습니다.)
+    """
+    original = count_tokens(messages)
+    if original <= budget:
+        return list(messages), 0
+
+    head = [m for m in messages[:1] if isinstance(m, SystemMessage)]
+    body = list(messages[len(head) :])
+    pinned = [m for m in body[:1] if _is_user_request(m)]
+    body = body[len(pinned) :]
+
+    split = max(0, len(body) - keep_recent)
+    older, recent = body[:split], body[split:]
+
+    # 1. 오래된 도구 관찰 축약
+    limit = OllamaConfig.OBSERVATION_TRUNCATE_CHARS
+    older = [_truncate_content(m, limit) if _is_observation(m) else m for m in older]
+
+    def assemble(dropped: int) -> List[BaseMessage]:
+        notice = []
+        if dropped:
+            notice = [
+                SystemMessage(
+                    content=f"[{dropped} earlier messages omitted to fit the context window]"
+                )
+            ]
+        return head + pinned + notice + older[dropped:] + recent
+
+    # 2. 오래된 메시지부터 제거
+    dropped = 0
+    result = assemble(dropped)
+    while count_tokens(result) > budget and dropped < len(older):
+        dropped += 1
+        result = assemble(dropped)
+
+    # 3. 남은 메시지 본문 축약 (오래된 것부터, 예산에 맞을 때까지)
+    for idx in range(len(head), len(result)):
+        excess = count_tokens(result) - budget
+        if excess <= 0:
+            break
+        content = result[idx].content
+        if not isinstance(content, str):
+            continue
+        max_chars = max(200, len(content) - int(excess * CHARS_PER_TOKEN) - 200)
+        result[idx] = _truncate_content(result[idx], max_chars)
+
+    # 4. 최후 수단: 마지막 메시지만 남을 때까지 오래된 메시지 제거
+    while count_tokens(result) > budget and len(result) > len(head) + 1:
+        result.pop(len(head))
+
+    return result, original - count_tokens(result)
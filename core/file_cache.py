@@ -0,0 +1,113 @@
+"""
+워크스페이스 파일 내용 캐시 (file_read / file_write 공유).
+get_safe_path로 해석한 경로를 키로 사용하고, stat(mtime/size)이 바뀌면 디스크에서 다시 읽습니다.
+각 내용에는 버전(mtime/size 해시, file_version)이 붙어 있어 "마지막으로 읽은 뒤 변경 없음"
+응답에 사용됩니다. 캐시하지 않는 큰 파일(mmap 경로)도 같은 방식의 버전을 사용합니다.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Tuple
+
+from config import ToolConfig
+
+
+class CachedFile(NamedTuple):
+    content: str
+    version: str
+
+
+def _stat_key(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _version(stat_key: Tuple[int, int]) -> str:
+    return hashlib.sha256(f"{stat_key[0]}:{stat_key[1]}".encode()).hexdigest()[:12]
+
+
+def file_version(path: str) -> str:
+    """파일 버전 토큰 (mtime/size 기반, 파일을 읽지 않음)"""
+    return _version(_stat_key(path))
+
+
+class FileCache:
+    """
+    stat 검증 기반 LRU 파일 캐시.
+    max_chars: 캐시에 보관할 전체 문자 수 상한 (초과 시 오래된 항목부터 제거)
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], CachedFile]]" = (
+            OrderedDict()
+        )
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, path: str) -> CachedFile:
+        """파일 내용 반환 (stat이 그대로면 캐시 사용)"""
+        stat_key = _stat_key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stat_key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        # 읽는 도중 변경되었을 수 있으므로 읽기 전 stat으로 저장 (다음 읽기에서 재검증됨)
+        return self._store(path, stat_key, content)
+
+    def update(self, path: str, content: str) -> CachedFile:
+        """file_write 직후 호출: 디스크를 다시 읽지 않고 캐시 갱신"""
+        return self._store(path, _stat_key(path), content)
+
+    def invalidate(self, path: str):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._total -= len(entry[1].content)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "chars": self._total,
+            }
+
+    def _store(self, path: str, stat_key: Tuple[int, int], content: str) -> CachedFile:
+        cached = CachedFile(content, _version(stat_key))
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._total -= len(old[1].content)
+            # 상한보다 큰 파일은 캐시하지 않음
+            if len(content) <= self.max_chars:
+                self._entries[path] = (stat_key, cached)
+                self._total += len(content)
+                while self._total > self.max_chars:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._total -= len(evicted.content)
+        return cached
+
+
+_FILE_CACHE = FileCache(ToolConfig.FILE_CACHE_MAX_CHARS)
+
+
+def get_file_cache() -> FileCache:
+    """프로세스 공유 파일 캐시 (키가 절대 경로이므로 워크스페이스 간 공유 가능)"""
+    return _FILE_CACHE
@@ -0,0 +1,166 @@
+"""
+file_read 용 부분 읽기 도우미.
+작은 파일은 공유 파일 캐시(core.file_cache)를, 큰 파일은 mmap을 사용해 요청한 구간만 디코딩합니다.
+바이너리 파일은 내용을 디코딩하지 않고 요약만 반환합니다.
+"""
+
+import mmap
+import os
+from typing import NamedTuple, Tuple, Union
+
+from config import ToolConfig
+from core.file_cache import file_version, get_file_cache
+
+SNIFF_BYTES = 8192
+_CHUNK = 1 << 20
+# UTF-8 문자 1개의 최대 바이트 수 (mmap 구간을 문자 수 상한으로 자를 때 사용)
+_MAX_CHAR_BYTES = 4
+
+Buffer = Union[str, mmap.mmap]
+
+
+def is_binary(path: str) -> bool:
+    """파일 앞부분으로 바이너리 여부 판단 (NUL 바이트 또는 UTF-8 디코딩 실패)"""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+    if b"\0" in head:
+        return True
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # 잘라낸 경계에 걸친 멀티바이트 문자는 허용
+        return e.start < len(head) - _MAX_CHAR_BYTES
+    return False
+
+
+def _advance_lines(buf: Buffer, nl, pos: int, count: int) -> int:
+    """pos부터 줄바꿈 count개를 지난 위치 (청크 단위로 세어 줄마다 반복하지 않음)"""
+    size = len(buf)
+    while count > 0 and pos < size:
+        chunk = buf[pos : pos + _CHUNK]
+        found = chunk.count(nl)
+        if found < count:
+            count -= found
+            pos += len(chunk)
+            continue
+        rest = chunk.split(nl, count)[-1]
+        return pos + len(chunk) - len(rest)
+    return min(pos, size)
+
+
+def _count_lines(buf: Buffer, nl) -> int:
+    size = len(buf)
+    lines = sum(buf[i : i + _CHUNK].count(nl) for i in range(0, size, _CHUNK))
+    if size and buf[size - 1 : size] != nl:
+        lines += 1  # 마지막 줄에 줄바꿈이 없는 경우
+    return lines
+
+
+def _window(
+    buf: Buffer, nl, start_line: int, end_line: int, max_len: int
+) -> Tuple[Buffer, bool]:
+    """[start_line, end_line] 구간 (end_line=0 이면 끝까지), 최대 max_len"""
+    start = _advance_lines(buf, nl, 0, start_line - 1)
+    end = len(buf)
+    if end_line:
+        end = _advance_lines(buf, nl, start, end_line - start_line + 1)
+    return buf[start : min(end, start + max_len)], end - start > max_len
+
+
+class _Request(NamedTuple):
+    start_line: int
+    end_line: int
+    byte_offset: int
+    byte_length: int
+    max_chars: int
+
+
+def _slice(buf: Buffer, req: _Request) -> Tuple[int, str, bool, str]:
+    """(전체 줄 수, 요청 구간 텍스트, 잘림 여부, 구간 안내) 반환"""
+    if isinstance(buf, str) and req.byte_length > 0:
+        buf = buf.encode("utf-8")
+    nl = "\n" if isinstance(buf, str) else b"\n"
+    total = _count_lines(buf, nl)
+
+    if req.byte_length > 0:
+        offset = max(0, req.byte_offset)
+        data = buf[offset : offset + req.byte_length]
+        end = min(len(buf), offset + req.byte_length)
+        return total, data.decode("utf-8", "replace"), False, f"bytes {offset}-{end}"
+
+    # mmap 구간은 바이트 단위이므로 문자 수 상한의 최대 바이트 수만큼 자름
+    max_len = req.max_chars * (1 if nl == "\n" else _MAX_CHAR_BYTES)
+    data, truncated = _window(buf, nl, req.start_line, req.end_line, max_len)
+    text = data if isinstance(data, str) else data.decode("utf-8", "replace")
+    if len(text) > req.max_chars:
+        text, truncated = text[: req.max_chars], True
+
+    span = ""
+    last = req.start_line + max(0, text.count("\n") - text.endswith("\n"))
+    if req.start_line > 1 or truncated or last < total:
+        span = f"lines {req.start_line}-{last}"
+    return total, text, truncated, span
+
+
+def _binary_summary(path: str, display_path: str, size: int) -> str:
+    with open(path, "rb") as f:
+        head = f.read(32)
+    return (
+        f"=== File: {display_path} (binary, size: {size} bytes) ===\n"
+        f"Binary file; content not shown. First {len(head)} bytes (hex): "
+        f"{head.hex(' ')}"
+    )
+
+
+def read_file(
+    path: str,
+    display_path: str,
+    known_version: str = "",
+    start_line: int = 1,
+    end_line: int = 0,
+    byte_offset: int = 0,
+    byte_length: int = 0,
+    max_chars: int = 0,
+) -> str:
+    """file_read 결과 문자열 생성 (헤더: 버전, 전체 줄 수, 크기, 인코딩 + 요청 구간)"""
+    size = os.path.getsize(path)
+    if is_binary(path):
+        return _binary_summary(path, display_path, size)
+
+    req = _Request(
+        max(1, start_line),
+        end_line,
+        byte_offset,
+        byte_length,
+        max_chars or ToolConfig.FILE_READ_MAX_CHARS,
+    )
+    small = size <= ToolConfig.FILE_MMAP_THRESHOLD_BYTES
+    cached = get_file_cache().read(path) if small else None
+    version = cached.version if cached is not None else file_version(path)
+
+    ranged = req.start_line > 1 or end_line > 0 or byte_length > 0
+    if known_version == version and not ranged:
+        return (
+            f"=== File: {display_path} (version: {version}) ===\n"
+            "[Unchanged since your last read; content omitted]"
+        )
+
+    if cached is not None:
+        total, text, truncated, span = _slice(cached.content, req)
+    else:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                total, text, truncated, span = _slice(mm, req)
+
+    lines = [
+        f"=== File: {display_path} (version: {version}, lines: {total}, "
+        f"size: {size} bytes, encoding: utf-8) ==="
+    ]
+    if span:
+        lines.append(f"[Showing {span} of {total} lines, {size} bytes]")
+    lines.append(text)
+    if truncated:
+        lines.append(
+            "... [truncated; use start_line/end_line or byte_offset to read more]"
+        )
+    return "\n".join(lines)
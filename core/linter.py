@@ -0,0 +1,156 @@
+"""
+run_linter 용 Ruff 배치 실행 및 증분 린팅.
+여러 경로를 한 번의 `ruff check --output-format=json` 으로 검사하고,
+내용 해시와 ruff 설정 파일(mtime)이 바뀌지 않은 파일은 이전 결과를 재사용합니다 (워크스페이스별).
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from config import ToolConfig
+
+LINT_EXTENSIONS = (".py", ".pyi")
+# ruff 가 파일 위치에서 상위 디렉토리로 올라가며 찾는 설정 파일
+RUFF_CONFIG_FILES = ("pyproject.toml", "ruff.toml", ".ruff.toml")
+
+
+class Finding(NamedTuple):
+    file: str
+    line: int
+    column: int
+    code: str
+    message: str
+
+    def format(self) -> str:
+        return f"{self.file}:{self.line}:{self.column} {self.code} {self.message}"
+
+
+# 워크스페이스 -> {상대 경로: (내용 해시, 검사 결과)}
+_LINT_STATE: Dict[str, Dict[str, Tuple[str, List[Finding]]]] = {}
+_STATE_LOCK = threading.Lock()
+
+
+class LintError(Exception):
+    """ruff 실행 실패 (설정 오류 등)"""
+
+
+def collect_files(paths: Sequence[str]) -> List[str]:
+    """경로 목록을 검사 대상 Python 파일 목록으로 확장 (LIST_IGNORE 디렉토리 제외)"""
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(d for d in dirnames if d not in ToolConfig.LIST_IGNORE)
+            files.extend(
+                os.path.join(dirpath, f)
+                for f in sorted(filenames)
+                if f.endswith(LINT_EXTENSIONS)
+            )
+    return list(dict.fromkeys(os.path.normpath(f) for f in files))
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _config_fingerprint(files: List[str]) -> str:
+    """파일들에 적용될 수 있는 ruff 설정 파일의 (경로, mtime) 요약"""
+    dirs = set()
+    for f in files:
+        d = os.path.dirname(os.path.abspath(f))
+        while d not in dirs:
+            dirs.add(d)
+            d = os.path.dirname(d)
+    entries = []
+    for d in sorted(dirs):
+        for name in RUFF_CONFIG_FILES:
+            path = os.path.join(d, name)
+            try:
+                entries.append(f"{path}:{os.stat(path).st_mtime_ns}")
+            except OSError:
+                continue
+    return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+
+def _run_ruff(files: List[str], workspace: str) -> Dict[str, List[Finding]]:
+    """ruff 1회 실행으로 여러 파일 검사 (파일별 결과, 문제 없는 파일은 빈 목록)"""
+    result = subprocess.run(
+        ["ruff", "check", "--output-format=json", "--no-fix", *files],
+        capture_output=True,
+        text=True,
+        cwd=workspace,
+    )
+    if result.returncode not in (0, 1):
+        raise LintError(result.stderr.strip() or result.stdout.strip())
+
+    findings: Dict[str, List[Finding]] = {
+        os.path.relpath(f, workspace): [] for f in files
+    }
+    for item in json.loads(result.stdout or "[]"):
+        rel = os.path.relpath(item["filename"], workspace)
+        location = item.get("location") or {}
+        findings.setdefault(rel, []).append(
+            Finding(
+                rel,
+                location.get("row", 0),
+                location.get("column", 0),
+                item.get("code") or "syntax-error",
+                item.get("message", ""),
+            )
+        )
+    return findings
+
+
+def lint_files(
+    files: List[str], workspace: str, incremental: bool = True
+) -> Tuple[List[Finding], int]:
+    """
+    파일 목록 검사. 반환값: (정렬/중복 제거된 결과, 다시 검사한 파일 수)
+    incremental=True 이면 마지막 검사 이후 내용 또는 ruff 설정이 바뀐 파일만 ruff로 검사합니다.
+    """
+    workspace = os.path.abspath(workspace)
+    rels = [os.path.relpath(f, workspace) for f in files]
+    config = _config_fingerprint(files)
+    hashes = {rel: f"{_file_hash(f)}:{config}" for f, rel in zip(files, rels)}
+    with _STATE_LOCK:
+        state = dict(_LINT_STATE.get(workspace, {}))
+
+    stale = [
+        f
+        for f, rel in zip(files, rels)
+        if not incremental or state.get(rel, ("",))[0] != hashes[rel]
+    ]
+    if stale:
+        for rel, found in _run_ruff(stale, workspace).items():
+            if rel in hashes:
+                state[rel] = (hashes[rel], found)
+        with _STATE_LOCK:
+            _LINT_STATE.setdefault(workspace, {}).update(
+                {rel: state[rel] for rel in hashes if rel in state}
+            )
+
+    unique = {f for rel in hashes for f in state.get(rel, ("", []))[1]}
+    return sorted(unique), len(stale)
+
+
+def fix_diff(files: List[str], workspace: str) -> str:
+    """자동 수정 가능한 항목의 diff (파일은 변경하지 않음)"""
+    result = subprocess.run(
+        ["ruff", "check", "--diff", *files],
+        capture_output=True,
+        text=True,
+        cwd=workspace,
+    )
+    return result.stdout.strip()
+
+
+def reset_lint_state():
+    with _STATE_LOCK:
+        _LINT_STATE.clear()
@@ -0,0 +1,254 @@
+"""
+결정적(temperature=0) LLM 응답을 위한 SQLite 기반 영구 캐시.
+동일한 모델 + 메시지 + 옵션 조합이면 Ollama를 호출하지 않고 저장된 응답을 반환합니다.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable
+
+from config import OllamaConfig
+from utils.json_parser import ToolCallScanner
+
+
+def make_cache_key(model: str, messages: List[BaseMessage], options: Dict) -> str:
+    """모델 + 메시지 + 옵션의 안정적인 해시"""
+    payload = {
+        "model": model,
+        "options": options,
+        "messages": [
+            {"type": m.type, "name": m.name, "content": m.content} for m in messages
+        ],
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _ends_with_tool_call(content: str) -> bool:
+    """
+    부분 응답이 완성된 ```json 도구 호출 블록을 포함하는지.
+    (런타임이 도구 호출 직후 의도적으로 생성을 중단한 경우만 부분 저장 대상)
+    """
+    scanner = ToolCallScanner()
+    scanner.feed(content)
+    return scanner.last_block_end != -1
+
+
+class LLMResponseCache:
+    """크기 제한(LRU)이 있는 SQLite 응답 저장소"""
+
+    def __init__(self, db_path: str, max_entries: int):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, content TEXT NOT NULL, metadata TEXT, "
+            "partial INTEGER NOT NULL DEFAULT 0, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)"
+        )
+        self._conn.commit()
+
+    def get(
+        self, key: str, allow_partial: bool = False
+    ) -> Optional[Tuple[str, Dict, bool]]:
+        """(content, metadata, partial) 반환. 없으면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, metadata, partial FROM llm_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or (row[2] and not allow_partial):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+        return row[0], json.loads(row[1] or "{}"), bool(row[2])
+
+    def put(self, key: str, content: str, metadata: Dict, partial: bool = False):
+        """응답 저장 후 max_entries 초과분을 오래된 순으로 제거"""
+        with self._lock:
+            if partial:
+                # 완전한 응답이 이미 있으면 부분 응답으로 덮어쓰지 않음
+                exists = self._conn.execute(
+                    "SELECT 1 FROM llm_cache WHERE key = ? AND partial = 0", (key,)
+                ).fetchone()
+                if exists:
+                    return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(key, content, metadata, partial, last_access) VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    content,
+                    json.dumps(metadata, default=str),
+                    int(partial),
+                    time.time(),
+                ),
+            )
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """히트/미스 카운터 및 저장된 항목 수"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries[0]}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _to_messages(input: Any) -> List[BaseMessage]:
+    """Runnable 입력(PromptValue / 메시지 목록)을 메시지 목록으로 변환"""
+    if isinstance(input, PromptValue):
+        return input.to_messages()
+    return list(input)
+
+
+class CachedChatModel(Runnable):
+    """
+    채팅 모델 래퍼. invoke/ainvoke/stream/astream 모두 캐시를 먼저 조회합니다.
+    스트림이 중간에 닫히면(조기 중단) 받은 부분까지를 부분 응답으로 저장하며,
+    부분 응답은 스트림 호출에서만 재생됩니다.
+    """
+
+    def __init__(self, llm: Runnable, cache: LLMResponseCache, model: str, options):
+        self.llm = llm
+        self.cache = cache
+        self.model = model
+        self.options = options
+        self.bypass = OllamaConfig.LLM_CACHE_BYPASS
+
+    def _key(self, messages: List[BaseMessage]) -> str:
+        return make_cache_key(self.model, messages, self.options)
+
+    @staticmethod
+    def _cached_message(content: str, metadata: Dict) -> AIMessage:
+        return AIMessage(
+            content=content, response_metadata={**metadata, "cache_hit": True}
+        )
+
+    def invoke(self, input, config=None, **kwargs) -> BaseMessage:
+        messages = _to_messages(input)
+        if self.bypass:
+            return self.llm.invoke(messages, config, **kwargs)
+
+        key = self._key(messages)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return self._cached_message(hit[0], hit[1])
+
+        response = self.llm.invoke(messages, config, **kwargs)
+        self.cache.put(key, response.content, response.response_metadata)
+        return response
+
+    async def ainvoke(self, input, config=None, **kwargs) -> BaseMessage:
+        messages = _to_messages(input)
+        if self.bypass:
+            return await self.llm.ainvoke(messages, config, **kwargs)
+
+        key = self._key(messages)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return self._cached_message(hit[0], hit[1])
+
+        response = await self.llm.ainvoke(messages, config, **kwargs)
+        self.cache.put(key, response.content, response.response_metadata)
+        return response
+
+    def stream(self, input, config=None, **kwargs) -> Iterator[BaseMessage]:
+        messages = _to_messages(input)
+        if self.bypass:
+            yield from self.llm.stream(messages, config, **kwargs)
+            return
+
+        key = self._key(messages)
+        hit = self.cache.get(key, allow_partial=True)
+        if hit is not None:
+            yield AIMessageChunk(content=hit[0], response_metadata={"cache_hit": True})
+            return
+
+        content = ""
+        try:
+            for chunk in self.llm.stream(messages, config, **kwargs):
+                content += chunk.content
+                yield chunk
+        except GeneratorExit:
+            # 도구 호출 직후의 의도적 중단만 부분 저장 (예외 등으로 닫힌 스트림은 저장 안 함)
+            if _ends_with_tool_call(content):
+                self.cache.put(key, content, {}, partial=True)
+            raise
+        self.cache.put(key, content, {})
+
+    async def astream(self, input, config=None, **kwargs):
+        messages = _to_messages(input)
+        if self.bypass:
+            async for chunk in self.llm.astream(messages, config, **kwargs):
+                yield chunk
+            return
+
+        key = self._key(messages)
+        hit = self.cache.get(key, allow_partial=True)
+        if hit is not None:
+            yield AIMessageChunk(content=hit[0], response_metadata={"cache_hit": True})
+            return
+
+        content = ""
+        try:
+            async for chunk in self.llm.astream(messages, config, **kwargs):
+                content += chunk.content
+                yield chunk
+        except GeneratorExit:
+            # 도구 호출 직후의 의도적 중단만 부분 저장 (예외 등으로 닫힌 스트림은 저장 안 함)
+            if _ends_with_tool_call(content):
+                self.cache.put(key, content, {}, partial=True)
+            raise
+        self.cache.put(key, content, {})
+
+
+# db_path -> LLMResponseCache (워크스페이스별 1개)
+_CACHES: Dict[str, LLMResponseCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_response_cache() -> LLMResponseCache:
+    """현재 워크스페이스의 공유 응답 캐시 반환"""
+    db_path = os.path.join(OllamaConfig.WORKSPACE_DIR, "llm_cache.sqlite")
+    with _CACHES_LOCK:
+        cache = _CACHES.get(db_path)
+        if cache is None:
+            cache = LLMResponseCache(db_path, OllamaConfig.LLM_CACHE_MAX_ENTRIES)
+            _CACHES[db_path] = cache
+    return cache
@@ -1,12 +1,163 @@
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+from langchain_core.runnables import Runnable
 from langchain_ollama import ChatOllama
 
 from config import OllamaConfig
+from core.llm_cache import CachedChatModel, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# (model, base_url, temperature, options) -> ChatOllama
+# 동일 설정의 클라이언트(및 HTTP keep-alive 연결)를 노드/세션 간에 재사용합니다.
+_CLIENTS: "OrderedDict[Tuple, ChatOllama]" = OrderedDict()
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _client_key(
+    model: str, base_url: str, temperature: float, options: Dict[str, Any]
+) -> Tuple:
+    """클라이언트 레지스트리 키 (옵션은 정렬 후 repr로 고정)"""
+    frozen = tuple(sorted((k, repr(v)) for k, v in options.items()))
+    return (model, base_url, temperature, frozen)
+
+
+def _parse_keep_alive(value: str) -> Union[int, str]:
+    """정수(초, -1 = 무기한)는 int 로, 그 외("30m" 등)는 문자열 그대로"""
+    value = value.strip()
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def keep_alive_for(model: str) -> Union[int, str]:
+    """모델별 keep_alive (OLLAMA_KEEP_ALIVE_MODELS 에 없으면 OLLAMA_KEEP_ALIVE)"""
+    for entry in OllamaConfig.KEEP_ALIVE_MODELS.split(","):
+        name, sep, value = entry.rpartition("=")
+        if sep and name.strip() == model:
+            return _parse_keep_alive(value)
+    return _parse_keep_alive(OllamaConfig.KEEP_ALIVE)
 
 
-def get_llm():
-    """Ollama LLM 인스턴스 반환"""
+def _create_llm(
+    model: str, base_url: str, temperature: float, options: Dict[str, Any]
+) -> ChatOllama:
+    """타임아웃, 연결 풀 한도 및 모델별 keep_alive 가 적용된 ChatOllama 생성"""
+    limits = httpx.Limits(
+        max_connections=OllamaConfig.HTTP_POOL_SIZE,
+        max_keepalive_connections=OllamaConfig.HTTP_POOL_SIZE,
+    )
+    # keep_alive 는 생성 결과와 무관하므로 응답 캐시 키에 포함하지 않음
+    options = {"keep_alive": keep_alive_for(model), **options}
     return ChatOllama(
-        model=OllamaConfig.DEFAULT_MODEL,
-        temperature=OllamaConfig.TEMPERATURE,
-        base_url=OllamaConfig.BASE_URL,
+        model=model,
+        temperature=temperature,
+        base_url=base_url,
+        client_kwargs={"timeout": OllamaConfig.TIMEOUT_SECONDS, "limits": limits},
+        **options,
     )
+
+
+def get_llm(
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    base_url: Optional[str] = None,
+    cache: Optional[bool] = None,
+    **options: Any,
+) -> Runnable:
+    """
+    Ollama LLM 인스턴스 반환 (설정별로 풀링된 클라이언트 재사용).
+    cache=True (기본값: OllamaConfig.LLM_CACHE_ENABLED) 이면 영구 응답 캐시로 감쌉니다.
+    """
+    model = model or OllamaConfig.DEFAULT_MODEL
+    temperature = OllamaConfig.TEMPERATURE if temperature is None else temperature
+    base_url = base_url or OllamaConfig.BASE_URL
+    # 컨텍스트 예산(core.context_manager)과 실제 모델 컨텍스트 크기를 일치시킴
+    options.setdefault("num_ctx", OllamaConfig.NUM_CTX)
+    llm = _get_pooled_llm(model, base_url, temperature, options)
+
+    if OllamaConfig.LLM_CACHE_ENABLED if cache is None else cache:
+        key_options = {"temperature": temperature, **options}
+        return CachedChatModel(llm, get_response_cache(), model, key_options)
+    return llm
+
+
+def role_settings(role: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    역할의 (모델, 생성 옵션). 설정에 없는 역할은 (DEFAULT_MODEL, {}).
+    사용: model, options = role_settings("Coder"); get_llm(model, **options)
+    """
+    model = OllamaConfig.ROLE_MODELS.get(role) or OllamaConfig.DEFAULT_MODEL
+    return model, dict(OllamaConfig.ROLE_OPTIONS.get(role) or {})
+
+
+def _get_pooled_llm(
+    model: str, base_url: str, temperature: float, options: Dict[str, Any]
+) -> ChatOllama:
+    """레지스트리에서 클라이언트 조회 (없으면 생성)"""
+    key = _client_key(model, base_url, temperature, options)
+
+    with _CLIENTS_LOCK:
+        llm = _CLIENTS.get(key)
+        if llm is not None:
+            _CLIENTS.move_to_end(key)
+            return llm
+
+        llm = _create_llm(model, base_url, temperature, options)
+        _CLIENTS[key] = llm
+
+        # LRU 제거: 다른 호출자가 아직 참조 중일 수 있으므로 close 하지 않고
+        # 레지스트리에서만 제거합니다 (연결은 GC 시 정리).
+        while len(_CLIENTS) > OllamaConfig.CLIENT_REGISTRY_SIZE:
+            _CLIENTS.popitem(last=False)
+
+    return llm
+
+
+def pooled_client_count() -> int:
+    """현재 레지스트리에 보관 중인 클라이언트 수"""
+    with _CLIENTS_LOCK:
+        return len(_CLIENTS)
+
+
+def _drain_registry():
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    return clients
+
+
+def _close_sync_client(llm: ChatOllama):
+    sync_client = getattr(getattr(llm, "_client", None), "_client", None)
+    if sync_client is not None:
+        try:
+            sync_client.close()
+        except Exception as e:
+            logger.warning("[LLM Pool] Failed to close client: %s", e)
+
+
+def close_all_llms():
+    """풀링된 모든 클라이언트의 동기 HTTP 연결을 닫습니다 (프로세스 종료 시 호출)"""
+    for llm in _drain_registry():
+        _close_sync_client(llm)
+
+
+async def aclose_all_llms():
+    """풀링된 모든 클라이언트의 동기/비동기 HTTP 연결을 닫습니다"""
+    for llm in _drain_registry():
+        _close_sync_client(llm)
+        async_client = getattr(getattr(llm, "_async_client", None), "_client", None)
+        if async_client is not None:
+            try:
+                await async_client.aclose()
+            except Exception as e:
+                logger.warning("[LLM Pool] Failed to close async client: %s", e)
+
+
+atexit.register(close_all_llms)
@@ -0,0 +1,322 @@
+"""
+인프로세스 메트릭 (카운터 / 히스토그램).
+- LLM: 첫 토큰까지 시간(TTFT) / 전체 지연, 프롬프트 / 생성 토큰 수 (Ollama 응답 메타데이터)
+- 호출당 프롬프트 평가 토큰 수 vs 프롬프트 크기 추정치 (prefix 캐시 재사용 확인용)
+- 도구: 도구별 지연, 결과(ok / error / timeout / skipped)별 호출 수
+- 노드별 ReAct 반복 수, Supervisor 라우팅 결정
+- 서버 모드: 대기열 길이, 태스크 결과별 수 / 실행 시간
+- 시작: 모델별 워밍업 시간, 준비 완료까지 걸린 시간
+
+render_prometheus() / render_json() 으로 내보내고, METRICS_FILE 이 설정되면
+dump_metrics() 가 파일에 기록합니다 (.json 이면 JSON, 그 외 Prometheus 텍스트).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+ITERATION_BUCKETS = (1, 2, 3, 5, 8, 10, 15, 20)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+# 이름 -> (종류, 설명, 히스토그램 버킷)
+METRICS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "llm_ttft_seconds": ("histogram", "LLM time to first token", LATENCY_BUCKETS),
+    "llm_duration_seconds": ("histogram", "LLM call latency", LATENCY_BUCKETS),
+    "llm_prompt_tokens_total": ("counter", "Prompt tokens evaluated", ()),
+    "llm_completion_tokens_total": ("counter", "Completion tokens generated", ()),
+    # Ollama 는 KV 캐시에 남은 prefix 를 다시 평가하지 않으므로
+    # 1 - sum(prompt_eval) / sum(prompt_size) 가 대략적인 prefix 재사용률
+    "llm_prompt_eval_tokens": (
+        "histogram",
+        "Prompt tokens evaluated per LLM call",
+        TOKEN_BUCKETS,
+    ),
+    "llm_prompt_size_tokens": (
+        "histogram",
+        "Estimated prompt size per LLM call",
+        TOKEN_BUCKETS,
+    ),
+    "tool_duration_seconds": ("histogram", "Tool call latency", LATENCY_BUCKETS),
+    "tool_calls_total": ("counter", "Tool calls by result status", ()),
+    "search_requests_total": (
+        "counter",
+        "web_search requests by cache result (hits / misses / coalesced)",
+        (),
+    ),
+    "agent_iterations": (
+        "histogram",
+        "ReAct iterations per node run",
+        ITERATION_BUCKETS,
+    ),
+    "supervisor_decisions_total": ("counter", "Supervisor routing decisions", ()),
+    "server_queue_depth": ("gauge", "Tasks waiting for a session worker", ()),
+    "server_running_tasks": ("gauge", "Tasks currently running", ()),
+    "server_tasks_total": ("counter", "Submitted tasks by outcome", ()),
+    "server_task_seconds": ("histogram", "Task wall time", LATENCY_BUCKETS),
+    "llm_warmup_seconds": ("gauge", "Model warm-up (load) time at startup", ()),
+    "startup_ready_seconds": ("gauge", "Time from launch until the graph is ready", ()),
+    "startup_warm_seconds": ("gauge", "Time from launch until all models are warm", ()),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# track_usage() 가 설정한 현재 태스크의 LLM 사용량 집계
+_USAGE: ContextVar[Optional[Counter]] = ContextVar("llm_usage", default=None)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """스레드 안전한 카운터 / 게이지 / 히스토그램 저장소 (METRICS 에 정의된 이름만 허용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 카운터와 게이지 값
+        self._values: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+
+    @staticmethod
+    def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, value=1):
+        if METRICS[name][0] != "counter":
+            raise ValueError(f"{name} is not a counter")
+        key = self._labels(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        if METRICS[name][0] != "gauge":
+            raise ValueError(f"{name} is not a gauge")
+        with self._lock:
+            self._values.setdefault(name, {})[self._labels(labels)] = value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        kind, _, buckets = METRICS[name]
+        if kind != "histogram":
+            raise ValueError(f"{name} is not a histogram")
+        key = self._labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(buckets)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    hist.counts[i] += 1
+            hist.sum += value
+            hist.count += 1
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """{이름: [{"labels": {...}, "value": n} | {"labels", "count", "sum", "buckets"}]}"""
+        with self._lock:
+            result: Dict[str, Any] = {}
+            for name, series in sorted(self._values.items()):
+                result[name] = [
+                    {"labels": dict(key), "value": value}
+                    for key, value in sorted(series.items())
+                ]
+            for name, series in sorted(self._histograms.items()):
+                buckets = METRICS[name][2]
+                result[name] = [
+                    {
+                        "labels": dict(key),
+                        "count": hist.count,
+                        "sum": round(hist.sum, 6),
+                        "buckets": dict(zip(map(str, buckets), hist.counts)),
+                    }
+                    for key, hist in sorted(series.items())
+                ]
+            return result
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    merged = {**labels, **extra}
+    if not merged:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in merged.items()
+    )
+    return "{" + body + "}"
+
+
+def render_prometheus(registry: MetricsRegistry = REGISTRY) -> str:
+    """Prometheus 텍스트 노출 형식 (버전 0.0.4)"""
+    lines = []
+    for name, series in registry.snapshot().items():
+        kind, help_text, _ = METRICS[name]
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for sample in series:
+            labels = sample["labels"]
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {sample['value']}")
+                continue
+            for bound, count in sample["buckets"].items():
+                lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {count}")
+            inf = _format_labels(labels, le="+Inf")
+            lines.append(f"{name}_bucket{inf} {sample['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {sample['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def render_json(registry: MetricsRegistry = REGISTRY) -> str:
+    return json.dumps(registry.snapshot(), indent=2)
+
+
+def dump_metrics(path: str, registry: MetricsRegistry = REGISTRY):
+    """메트릭을 파일로 원자적으로 기록 (.json: JSON, 그 외: Prometheus 텍스트)"""
+    text = (
+        render_json(registry) if path.endswith(".json") else render_prometheus(registry)
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def reset_metrics():
+    REGISTRY.reset()
+
+
+# =============================================================================
+# Recording helpers
+# =============================================================================
+def token_usage(message: Any) -> Tuple[Optional[int], Optional[int]]:
+    """응답 메시지의 (프롬프트 토큰, 생성 토큰). 정보가 없으면 None"""
+    usage = getattr(message, "usage_metadata", None)
+    if isinstance(usage, dict):
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    # ChatOllama 원본 메타데이터 (prompt_eval_count / eval_count)
+    meta = _response_metadata(message)
+    return meta.get("prompt_eval_count"), meta.get("eval_count")
+
+
+def _response_metadata(message: Any) -> Dict[str, Any]:
+    meta = getattr(message, "response_metadata", None)
+    return meta if isinstance(meta, dict) else {}
+
+
+def _reported_ttft(message: Any) -> Optional[float]:
+    """비스트리밍 응답의 TTFT 추정: Ollama 의 모델 로드 + 프롬프트 평가 시간 (ns)"""
+    meta = _response_metadata(message)
+    if "prompt_eval_duration" not in meta:
+        return None
+    return (meta.get("load_duration", 0) + meta["prompt_eval_duration"]) / 1e9
+
+
+def record_llm_call(
+    role: str,
+    started: float,
+    first_token_at: Optional[float] = None,
+    message: Any = None,
+    prompt_size: Optional[int] = None,
+):
+    """
+    LLM 호출 1건 기록 (started / first_token_at 은 time.perf_counter 값).
+    first_token_at 이 없으면 응답 메타데이터로 TTFT 를 추정합니다.
+    prompt_size: 프롬프트 토큰 수 추정치 (core.context_manager.count_tokens)
+    """
+    labels = {"role": role}
+    total = time.perf_counter() - started
+    REGISTRY.observe("llm_duration_seconds", total, labels)
+
+    ttft = first_token_at - started if first_token_at is not None else None
+    if ttft is None and message is not None:
+        ttft = _reported_ttft(message)
+    if ttft is not None:
+        REGISTRY.observe("llm_ttft_seconds", ttft, labels)
+
+    prompt_tokens, completion_tokens = token_usage(message)
+    if prompt_tokens:
+        REGISTRY.inc("llm_prompt_tokens_total", labels, prompt_tokens)
+    # 프롬프트 전체가 캐시에 있으면 Ollama 는 prompt_eval_count 를 생략함
+    evaluated = prompt_tokens
+    if evaluated is None and completion_tokens is not None:
+        evaluated = 0
+    if evaluated is not None and prompt_size is not None:
+        REGISTRY.observe("llm_prompt_eval_tokens", evaluated, labels)
+        REGISTRY.observe("llm_prompt_size_tokens", prompt_size, labels)
+    if completion_tokens:
+        REGISTRY.inc("llm_completion_tokens_total", labels, completion_tokens)
+
+    usage = _USAGE.get()
+    if usage is not None:
+        usage.update(
+            llm_calls=1,
+            prompt_tokens=prompt_tokens or 0,
+            completion_tokens=completion_tokens or 0,
+        )
+
+
+@contextmanager
+def track_usage() -> Iterator[Counter]:
+    """
+    이 컨텍스트(및 LangGraph 가 복사한 노드 컨텍스트) 안의 LLM 호출 수 / 토큰 수 집계.
+    한 태스크의 노드는 순차 실행되므로 별도 잠금 없이 갱신합니다.
+    """
+    usage: Counter = Counter()
+    token = _USAGE.set(usage)
+    try:
+        yield usage
+    finally:
+        _USAGE.reset(token)
+
+
+def record_tool_call(name: str, status: str, seconds: Optional[float] = None):
+    """도구 호출 1건 기록 (seconds=None: 실행되지 않은 호출, 카운터만 증가)"""
+    labels = {"tool": name}
+    REGISTRY.inc("tool_calls_total", {**labels, "status": status})
+    if seconds is not None:
+        REGISTRY.observe("tool_duration_seconds", seconds, labels)
+
+
+def record_search(backend: str, result: str):
+    """검색 요청 1건 기록 (result: hits / misses / coalesced)"""
+    REGISTRY.inc("search_requests_total", {"backend": backend, "result": result})
+
+
+def record_iterations(node: str, iterations: int):
+    REGISTRY.observe("agent_iterations", iterations, {"node": node})
+
+
+def record_decision(source: str, next_agent: str):
+    """Supervisor 결정 기록 (source: 'rule', 'llm' 또는 'fallback')"""
+    REGISTRY.inc("supervisor_decisions_total", {"source": source, "next": next_agent})
+
+
+def record_task(outcome: str, seconds: Optional[float] = None):
+    """서버 태스크 기록 (outcome: accepted / rejected / done / error)"""
+    REGISTRY.inc("server_tasks_total", {"outcome": outcome})
+    if seconds is not None:
+        REGISTRY.observe("server_task_seconds", seconds)
+
+
+def set_queue_state(queued: int, running: int):
+    REGISTRY.set("server_queue_depth", queued)
+    REGISTRY.set("server_running_tasks", running)
@@ -0,0 +1,214 @@
+"""
+체크포인트 보존 정책 (agent_memory.sqlite 정리).
+- 스레드별 최근 N개 / 기준 시각 이후 체크포인트만 유지 (최신 체크포인트는 항상 유지)
+- 체크포인트가 사라진 writes(고아 행) 삭제
+- incremental_vacuum 으로 빈 페이지 반환
+
+모든 삭제는 작은 배치(각각 별도 트랜잭션)로 실행되므로 실행 중인 세션을 오래 막지 않습니다.
+
+실행: python -m core.retention --keep-last 20 --older-than-days 7
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from typing import NamedTuple, Optional
+
+from config import CheckpointConfig, OllamaConfig
+from core.checkpoint import checkpoint_id_at
+
+
+class RetentionReport(NamedTuple):
+    deleted_checkpoints: int
+    deleted_writes: int
+    reclaimed_bytes: int
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=CheckpointConfig.BUSY_TIMEOUT_MS / 1000)
+    conn.execute(f"PRAGMA busy_timeout={CheckpointConfig.BUSY_TIMEOUT_MS}")
+    return conn
+
+
+def _db_bytes(conn: sqlite3.Connection) -> int:
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+def _delete_in_batches(
+    conn: sqlite3.Connection, table: str, where: str, params: tuple, batch_size: int
+) -> int:
+    """조건에 맞는 행을 batch_size 개씩 별도 트랜잭션으로 삭제"""
+    deleted = 0
+    while True:
+        with conn:
+            cursor = conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} WHERE {where} LIMIT ?)",
+                (*params, batch_size),
+            )
+        deleted += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return deleted
+
+
+def _threshold_id(
+    conn: sqlite3.Connection,
+    thread_id: str,
+    checkpoint_ns: str,
+    keep_last: Optional[int],
+    cutoff_id: Optional[str],
+) -> Optional[str]:
+    """
+    이 ID보다 작은 체크포인트를 삭제 (None: 삭제 대상 없음).
+    스레드 / 네임스페이스의 최신 체크포인트는 조건과 무관하게 항상 유지합니다
+    (유휴 스레드의 대화 / 배치 재개 상태가 사라지지 않도록).
+    """
+    latest = conn.execute(
+        "SELECT MAX(checkpoint_id) FROM checkpoints "
+        "WHERE thread_id = ? AND checkpoint_ns = ?",
+        (thread_id, checkpoint_ns),
+    ).fetchone()[0]
+    if latest is None:
+        return None
+    candidates = [latest]
+    if keep_last is not None:
+        row = conn.execute(
+            "SELECT checkpoint_id FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, checkpoint_ns, max(0, keep_last - 1)),
+        ).fetchone()
+        if row is None:
+            return None  # 보존 개수 이하
+        candidates.append(row[0])
+    if cutoff_id is not None:
+        candidates.append(cutoff_id)
+    if len(candidates) == 1:
+        return None  # 보존 조건 없음
+    # 모든 조건을 만족해야 삭제 (최근 N개 / 기준 시각 이후 / 최신 체크포인트는 유지)
+    return min(candidates)
+
+
+def prune_checkpoints(
+    db_path: str,
+    keep_last: Optional[int] = None,
+    older_than_seconds: Optional[float] = None,
+    thread_id: Optional[str] = None,
+    batch_size: int = 500,
+) -> RetentionReport:
+    """
+    보존 정책을 적용하고 고아 writes 삭제 후 incremental vacuum 실행.
+    keep_last (1 이상) 와 older_than_seconds 를 함께 주면 두 조건을 모두 만족하는
+    체크포인트만 삭제합니다.
+    """
+    conn = _connect(db_path)
+    try:
+        before = _db_bytes(conn)
+        cutoff_id = None
+        if older_than_seconds is not None:
+            cutoff_id = checkpoint_id_at(time.time() - older_than_seconds)
+
+        query = "SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints"
+        params: tuple = ()
+        if thread_id is not None:
+            query += " WHERE thread_id = ?"
+            params = (thread_id,)
+
+        deleted_checkpoints = 0
+        for tid, ns in conn.execute(query, params).fetchall():
+            threshold = _threshold_id(conn, tid, ns, keep_last, cutoff_id)
+            if threshold is None:
+                continue
+            deleted_checkpoints += _delete_in_batches(
+                conn,
+                "checkpoints",
+                "thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                (tid, ns, threshold),
+                batch_size,
+            )
+
+        deleted_writes = _delete_in_batches(
+            conn,
+            "writes",
+            "NOT EXISTS (SELECT 1 FROM checkpoints c "
+            "WHERE c.thread_id = writes.thread_id "
+            "AND c.checkpoint_ns = writes.checkpoint_ns "
+            "AND c.checkpoint_id = writes.checkpoint_id)",
+            (),
+            batch_size,
+        )
+
+        vacuum(conn)
+        return RetentionReport(
+            deleted_checkpoints, deleted_writes, max(0, before - _db_bytes(conn))
+        )
+    finally:
+        conn.close()
+
+
+def vacuum(conn: sqlite3.Connection, pages_per_step: int = 1000):
+    """
+    빈 페이지를 조금씩 파일에서 제거 (auto_vacuum=INCREMENTAL 인 DB만 해당).
+    기존 DB는 enable_incremental_vacuum() 을 한 번 실행해야 합니다.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return
+    while conn.execute("PRAGMA freelist_count").fetchone()[0] > 0:
+        conn.execute(f"PRAGMA incremental_vacuum({pages_per_step})").fetchall()
+    # WAL 내용을 DB 파일에 반영 (PASSIVE: 다른 연결을 기다리지 않음)
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+
+
+def enable_incremental_vacuum(db_path: str) -> int:
+    """auto_vacuum=INCREMENTAL 로 전환 (전체 VACUUM, DB를 잠시 독점함). 회수한 바이트 반환"""
+    conn = _connect(db_path)
+    try:
+        before = _db_bytes(conn)
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return max(0, before - _db_bytes(conn))
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune agent_memory.sqlite")
+    parser.add_argument(
+        "--db", default=os.path.join(OllamaConfig.WORKSPACE_DIR, "agent_memory.sqlite")
+    )
+    parser.add_argument("--keep-last", type=int, default=None)
+    parser.add_argument("--older-than-days", type=float, default=None)
+    parser.add_argument("--thread", default=None)
+    parser.add_argument(
+        "--enable-incremental-vacuum",
+        action="store_true",
+        help="convert an existing database once (runs a blocking full VACUUM)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Database not found at {args.db}")
+        return
+    if args.enable_incremental_vacuum:
+        reclaimed = enable_incremental_vacuum(args.db)
+        print(f"Enabled incremental vacuum (reclaimed {reclaimed} bytes)")
+    if args.keep_last is None and args.older_than_days is None:
+        if not args.enable_incremental_vacuum:
+            parser.error("specify --keep-last and/or --older-than-days")
+        return
+
+    older_than = None
+    if args.older_than_days is not None:
+        older_than = args.older_than_days * 86400
+    report = prune_checkpoints(args.db, args.keep_last, older_than, args.thread)
+    print(
+        f"Deleted {report.deleted_checkpoints} checkpoints, "
+        f"{report.deleted_writes} writes; reclaimed {report.reclaimed_bytes} bytes"
+    )
+
+
+if __name__ == "__main__":
+    main()
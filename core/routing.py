@@ -0,0 +1,55 @@
+"""
+Supervisor 규칙 기반 라우팅 (LLM 호출 없이 결정 가능한 전이 처리)
+AgentConfig.SUPERVISOR_CONFIG의 decision_logic 중 기계적으로 판단 가능한 부분만 다룹니다.
+"""
+
+import re
+from typing import Optional, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+PLAN_SIGNAL = "PLAN_CREATED"
+REVIEW_REQUEST_SIGNAL = "Coding complete, requesting review."
+
+# 단독 판정 줄만 승인으로 인정 (예: "✅ **Approved**", "Approved."),
+# "Approved once the following issues are fixed:" 같은 조건부 문장은 제외
+_APPROVED_LINE = re.compile(r"^[\W_]*approved[\W_]*$", re.IGNORECASE | re.MULTILINE)
+# 판정 뒤에 이런 단어가 있으면 조건부 승인으로 보고 LLM 판단에 맡김
+_BLOCKING_WORDS = re.compile(
+    r"\b(but|however|except|unless|once|until|before|issues?|fix(es)?|must|todo"
+    r"|fail(ed|s)?|errors?)\b",
+    re.IGNORECASE,
+)
+
+
+def is_approved(content: str) -> bool:
+    """Reviewer 응답이 단독 'Approved' 판정이고 뒤에 차단 조건이 없는지"""
+    match = _APPROVED_LINE.search(content)
+    return match is not None and not _BLOCKING_WORDS.search(content, match.end())
+
+
+def route_by_rules(messages: Sequence[BaseMessage]) -> Optional[str]:
+    """
+    마지막 메시지만으로 다음 워커를 결정합니다.
+    규칙이 적용되지 않는 모호한 경우 None을 반환합니다 (LLM 판단 필요).
+    """
+    if not messages:
+        return None
+
+    last = messages[-1]
+    if not isinstance(last, HumanMessage) or not isinstance(last.content, str):
+        return None
+
+    # 1. 사용자 입력 / 새 작업 (워커 결과는 name이 설정된 HumanMessage)
+    if last.name is None:
+        return "Planner"
+    # 2. 계획 완료
+    if last.name == "Planner" and PLAN_SIGNAL in last.content:
+        return "Coder"
+    # 3. 코딩 완료
+    if last.name == "Coder" and REVIEW_REQUEST_SIGNAL in last.content:
+        return "Reviewer"
+    # 5. 리뷰 승인
+    if last.name == "Reviewer" and is_approved(last.content):
+        return "FINISH"
+    return None
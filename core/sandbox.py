@@ -0,0 +1,178 @@
+"""
+run_python_secure 용 Warm Sandbox 워커 풀.
+미리 실행해 둔 격리된 Python 프로세스(core/sandbox_worker.py)에 코드를 파이프로 전달하여
+실행할 때마다 인터프리터를 새로 띄우는 비용을 없앱니다.
+"""
+
+import atexit
+import base64
+import marshal
+import os
+import queue
+import struct
+import subprocess
+import sys
+import threading
+from types import CodeType
+from typing import NamedTuple, Optional
+
+from config import ToolConfig
+from core.sandbox_worker import read_frame, write_frame
+
+WORKER_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py"
+)
+
+
+class SandboxResult(NamedTuple):
+    """subprocess.CompletedProcess와 같은 필드 이름을 사용"""
+
+    stdout: str
+    stderr: str
+    returncode: int
+
+
+class SandboxTimeoutError(Exception):
+    """실행 시간 초과 (워커는 강제 종료됨)"""
+
+
+class SandboxWorkerError(Exception):
+    """워커 프로세스 비정상 종료 또는 프로토콜 오류"""
+
+
+class _Worker:
+    """미리 실행된 샌드박스 프로세스 1개"""
+
+    def __init__(self):
+        # -I: 격리 모드 (PYTHON* 환경 변수, 사용자 site-packages, 스크립트 경로 무시)
+        self.proc = subprocess.Popen(
+            [sys.executable, "-I", WORKER_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.runs = 0
+        # 사용자 코드가 시작한 스레드가 남아 있음 (재사용 불가)
+        self.threads_left = False
+
+    def run(self, request: dict, timeout: float) -> SandboxResult:
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            self.proc.kill()
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            write_frame(self.proc.stdin, request)
+            response = read_frame(self.proc.stdout)
+        except (OSError, ValueError, struct.error) as e:
+            response = None
+            if not timed_out.is_set():
+                raise SandboxWorkerError(f"Sandbox worker failed: {e}") from e
+        finally:
+            timer.cancel()
+
+        if timed_out.is_set():
+            raise SandboxTimeoutError(f"Code execution timed out ({timeout:g}s limit)")
+        if response is None:
+            raise SandboxWorkerError("Sandbox worker exited unexpectedly.")
+
+        self.runs += 1
+        self.threads_left = response.get("threads", 0) > 0
+        return SandboxResult(
+            response["stdout"], response["stderr"], response["returncode"]
+        )
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class SandboxPool:
+    """
+    고정 크기 워커 풀.
+    워커는 max_runs 회 실행 후, 또는 시간 초과/비정상 종료/0이 아닌 종료 코드/실행 후 남은
+    스레드가 있으면 폐기되고 새 워커로 교체됩니다. 프로토콜 오류(워커 비정상 종료)는 새 워커에서 한 번 재시도합니다.
+    """
+
+    def __init__(self, size: int, max_runs: int):
+        self.size = size
+        self.max_runs = max_runs
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(_Worker())
+
+    def execute(
+        self,
+        code: str,
+        cwd: str,
+        timeout: float,
+        code_object: Optional[CodeType] = None,
+    ) -> SandboxResult:
+        """
+        코드를 워커에서 실행. 시간 초과 시 SandboxTimeoutError
+        code_object가 주어지면 워커는 소스를 다시 파싱하지 않고 그대로 실행합니다.
+        (워커는 같은 인터프리터이므로 marshal 형식이 호환됨)
+        """
+        if self._closed:
+            raise SandboxWorkerError("Sandbox pool is closed.")
+
+        request = {"code": code, "cwd": os.path.abspath(cwd)}
+        if code_object is not None:
+            request["bytecode"] = base64.b64encode(marshal.dumps(code_object)).decode()
+
+        try:
+            return self._run_once(request, timeout)
+        except SandboxWorkerError:
+            # 이전 실행이 남긴 상태로 워커가 깨졌을 수 있으므로 새 워커에서 재시도
+            return self._run_once(request, timeout)
+
+    def _run_once(self, request: dict, timeout: float) -> SandboxResult:
+        worker = self._idle.get()
+        recycle = True
+        try:
+            result = worker.run(request, timeout)
+            recycle = (
+                result.returncode != 0
+                or worker.threads_left
+                or worker.runs >= self.max_runs
+            )
+            return result
+        finally:
+            if recycle:
+                worker.close()
+                worker = _Worker()
+            self._idle.put(worker)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_POOL: Optional[SandboxPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """프로세스 공유 샌드박스 풀 (최초 호출 시 워커 시작)"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = SandboxPool(
+                ToolConfig.SANDBOX_POOL_SIZE, ToolConfig.SANDBOX_MAX_RUNS
+            )
+            atexit.register(_POOL.close)
+    return _POOL
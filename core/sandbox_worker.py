@@ -0,0 +1,151 @@
+"""
+샌드박스 워커 프로세스 (core.sandbox.SandboxPool 이 `python -I` 로 실행).
+
+stdin/stdout 파이프로 길이 접두(4바이트) JSON 프레임을 주고받으며,
+요청마다 새 네임스페이스에서 코드를 실행하고 `python -c` 와 같은 형식의
+stdout / stderr / return code 를 돌려줍니다.
+실행 후에는 시작 시점의 모듈 / builtins 속성, sys.path, 환경 변수를 복원하여
+(예: `math.pi = 3`, `json.loads = ...`) 다음 실행에 상태가 남지 않게 합니다.
+사용자 코드가 시작한 스레드는 되돌릴 수 없으므로 실행 후 살아 있는 스레드 수를 응답에 담아
+부모가 워커를 폐기하도록 합니다.
+이 파일은 프로젝트 모듈을 import 하지 않습니다 (독립 실행).
+"""
+
+import _thread
+import base64
+import builtins
+import importlib
+import io
+import json
+import marshal
+import os
+import struct
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+_HEADER = struct.Struct(">I")
+# 사용자 코드가 json 모듈을 바꿔도 프로토콜이 깨지지 않도록 시작 시점의 함수를 보관
+_loads, _dumps = json.loads, json.dumps
+_MISSING = object()
+
+
+def read_frame(stream):
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    return _loads(stream.read(size).decode("utf-8"))
+
+
+def write_frame(stream, payload):
+    data = _dumps(payload).encode("utf-8")
+    stream.write(_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _exit_code(exc: SystemExit, stderr) -> int:
+    """SystemExit를 인터프리터와 동일한 규칙으로 종료 코드로 변환"""
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=stderr)
+    return 1
+
+
+def _load_code(request):
+    """부모가 검증/컴파일한 code object(marshal)가 있으면 사용, 없으면 소스 컴파일"""
+    if "bytecode" in request:
+        return marshal.loads(base64.b64decode(request["bytecode"]))
+    return compile(request["code"], "<string>", "exec")
+
+
+def run_request(request):
+    """코드 1건 실행 (새 네임스페이스, 요청된 작업 디렉토리)"""
+    os.chdir(request["cwd"])
+    stdout, stderr = io.StringIO(), io.StringIO()
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    returncode = 0
+
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            exec(_load_code(request), namespace)
+        except SystemExit as e:
+            returncode = _exit_code(e, stderr)
+        except BaseException as e:
+            returncode = 1
+            # 워커 자신의 프레임은 제외하고 사용자 코드의 traceback만 출력
+            tb = e.__traceback__.tb_next if e.__traceback__ else None
+            traceback.print_exception(type(e), e, tb, file=stderr)
+
+    return {
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "returncode": returncode,
+        # 메인 스레드 외에 아직 실행 중인 스레드 수 (threading / _thread 모두 포함)
+        "threads": _thread._count(),
+    }
+
+
+class _Baseline:
+    """시작 시점의 인터프리터 상태 (모듈 속성은 얕은 복사)"""
+
+    def __init__(self):
+        self.modules = dict(sys.modules)
+        self.attrs = {
+            name: dict(vars(module))
+            for name, module in self.modules.items()
+            if hasattr(module, "__dict__")
+        }
+        self.path = list(sys.path)
+        self.environ = dict(os.environ)
+
+    def restore(self):
+        """사용자 코드가 import 한 모듈을 제거하고 기존 모듈 / builtins 속성을 되돌림"""
+        for name in set(sys.modules) - set(self.modules):
+            del sys.modules[name]
+        sys.modules.update(self.modules)
+        for name, saved in self.attrs.items():
+            _restore_attrs(vars(self.modules[name]), saved)
+        sys.path[:] = self.path
+        if os.environ != self.environ:
+            os.environ.clear()
+            os.environ.update(self.environ)
+
+
+def _restore_attrs(current: dict, saved: dict):
+    for key in [k for k in current if k not in saved]:
+        del current[key]
+    for key, value in saved.items():
+        if current.get(key, _MISSING) is not value:
+            current[key] = value
+
+
+def main():
+    requests = sys.stdin.buffer
+    responses = os.fdopen(os.dup(1), "wb")
+    # 사용자 코드가 fd 1에 직접 쓰더라도 프로토콜 스트림을 오염시키지 않도록 분리
+    os.dup2(2, 1)
+
+    # `python -c` 와 동일하게 작업 디렉토리의 모듈을 import 할 수 있도록 함
+    sys.path.insert(0, "")
+    # 같은 초 안에 수정된 모듈이 오래된 .pyc로 로드되지 않도록 바이트코드를 쓰지 않음
+    sys.dont_write_bytecode = True
+    baseline = _Baseline()
+
+    while True:
+        request = read_frame(requests)
+        if request is None:
+            break
+        # 이전 실행 이후 새로 생성된 파일도 import 할 수 있도록 finder 캐시 초기화
+        importlib.invalidate_caches()
+        response = run_request(request)
+        # 응답 전에 복원 (다음 실행 / 다른 세션에 상태가 남지 않도록)
+        baseline.restore()
+        write_frame(responses, response)
+
+
+if __name__ == "__main__":
+    main()
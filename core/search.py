@@ -0,0 +1,301 @@
+"""
+web_search 용 검색 계층.
+- 정규화된 검색어 기준 SQLite TTL 캐시 (세션 / 워크스페이스 간 공유, 열 때 만료 항목 삭제)
+- 프로세스 공유 백엔드 인스턴스와 호출 간 최소 간격(rate limit)
+- 동시에 들어온 같은 검색어는 한 번만 백엔드를 호출 (request coalescing)
+- 네트워크 없이 동작하는 로컬 문서 백엔드 (테스트/벤치마크/오프라인용, 현재 워크스페이스 색인)
+캐시 적중 / 미스 / 병합 횟수는 core.metrics 의 search_requests_total 로 집계됩니다.
+"""
+
+import atexit
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+from langchain_community.tools import DuckDuckGoSearchRun
+
+from config import OllamaConfig, ToolConfig
+from core.metrics import record_search
+from core.workspace import current_workspace
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_query(query: str) -> str:
+    """대소문자 / 공백 차이를 무시한 캐시 키용 검색어"""
+    return " ".join(query.lower().split())
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+class SearchBackend(ABC):
+    """검색 백엔드 인터페이스"""
+
+    name = "base"
+    # 백엔드 호출 간 최소 간격 (초)
+    min_interval = 0.0
+
+    @abstractmethod
+    def search(self, query: str) -> str:
+        """검색 결과 텍스트"""
+
+    def cache_scope(self) -> str:
+        """같은 검색어라도 결과가 달라지는 범위 (캐시 키에 포함, 기본: 없음)"""
+        return ""
+
+
+class DuckDuckGoBackend(SearchBackend):
+    """DuckDuckGo 웹 검색 (인스턴스 재사용)"""
+
+    name = "duckduckgo"
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._tool = None
+
+    def search(self, query: str) -> str:
+        if self._tool is None:
+            self._tool = DuckDuckGoSearchRun()
+        return self._tool.invoke(query)
+
+
+class LocalDocsBackend(SearchBackend):
+    """
+    로컬 디렉토리의 텍스트 문서를 역색인하여 검색 (네트워크 불필요).
+    검색어 토큰이 많이 등장하는 문서 순으로 상위 max_results 개의 발췌를 반환합니다.
+    root 가 없으면 호출 시점의 워크스페이스를 색인합니다 (최근 MAX_ROOTS 개 색인 유지).
+    """
+
+    name = "local"
+    EXTENSIONS = (".md", ".txt", ".rst", ".py")
+    MAX_ROOTS = 8
+
+    def __init__(self, root: Optional[str] = None, max_results: int = 5):
+        self.root = root
+        self.max_results = max_results
+        # 루트 -> (토큰 -> {문서: 등장 횟수}, {문서: 내용})
+        self._indexes: "OrderedDict[str, Tuple[Dict, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _root(self) -> str:
+        return os.path.abspath(self.root or current_workspace())
+
+    def cache_scope(self) -> str:
+        return self._root()
+
+    def _build_index(self, root: str) -> Tuple[Dict, Dict[str, str]]:
+        index: Dict[str, Dict[str, int]] = defaultdict(dict)
+        docs = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in ToolConfig.LIST_IGNORE]
+            for filename in filenames:
+                if not filename.endswith(self.EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        text = f.read()
+                except (OSError, UnicodeDecodeError):
+                    continue
+                rel = os.path.relpath(path, root)
+                docs[rel] = text
+                for token, count in Counter(_TOKEN.findall(text.lower())).items():
+                    index[token][rel] = count
+        return dict(index), docs
+
+    def _index_for(self, root: str) -> Tuple[Dict, Dict[str, str]]:
+        with self._lock:
+            entry = self._indexes.get(root)
+            if entry is None:
+                entry = self._indexes[root] = self._build_index(root)
+                while len(self._indexes) > self.MAX_ROOTS:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(root)
+            return entry
+
+    def refresh(self):
+        """문서가 바뀐 경우 색인 재생성 (다음 검색 시)"""
+        with self._lock:
+            self._indexes.clear()
+
+    def search(self, query: str) -> str:
+        index, docs = self._index_for(self._root())
+
+        tokens = set(_TOKEN.findall(query.lower()))
+        scores: Counter = Counter()
+        for token in tokens:
+            for doc, count in index.get(token, {}).items():
+                scores[doc] += count
+        if not scores:
+            return f"No local results for '{query}'."
+
+        results = []
+        for doc, _ in scores.most_common(self.max_results):
+            results.append(f"[{doc}] {self._snippet(docs[doc], tokens)}")
+        return "\n".join(results)
+
+    @staticmethod
+    def _snippet(text: str, tokens: set, width: int = 240) -> str:
+        lowered = text.lower()
+        positions = [p for p in (lowered.find(t) for t in tokens) if p != -1]
+        start = max(0, min(positions, default=0) - width // 4)
+        return " ".join(text[start : start + width].split())
+
+
+# =============================================================================
+# Cached service
+# =============================================================================
+class SearchService:
+    """백엔드 + 영구 TTL 캐시 + 요청 병합 + 호출 간격 제한"""
+
+    def __init__(self, backend: SearchBackend, db_path: str, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stats = Counter()
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._rate_lock = threading.Lock()
+        self._last_call = 0.0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            "key TEXT PRIMARY KEY, query TEXT NOT NULL, result TEXT NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.purge_expired()
+
+    def _key(self, query: str) -> str:
+        scope = self.backend.cache_scope()
+        raw = f"{self.backend.name}\0{scope}\0{normalize_query(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT result, created_at FROM search_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return row[0]
+
+    def _store(self, key: str, query: str, result: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?)",
+                (key, normalize_query(query), result, time.time()),
+            )
+            self._conn.commit()
+
+    def _call_backend(self, query: str) -> str:
+        """min_interval 간격을 지켜 백엔드 호출"""
+        with self._rate_lock:
+            wait = self._last_call + self.backend.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_call = time.monotonic()
+        return self.backend.search(query)
+
+    def search(self, query: str) -> str:
+        """캐시 조회 -> 진행 중인 같은 요청 대기 -> 백엔드 호출 (예외는 캐시하지 않음)"""
+        key = self._key(query)
+        with self._lock:
+            cached = self._cached(key)
+            if cached is not None:
+                self._count("hits")
+                return cached
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self._count("misses")
+            else:
+                self._count("coalesced")
+
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._call_backend(query)
+            self._store(key, query, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _count(self, result: str):
+        self.stats[result] += 1
+        record_search(self.backend.name, result)
+
+    def purge_expired(self) -> int:
+        """TTL 이 지난 캐시 항목 삭제. 반환값: 삭제한 항목 수"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM search_cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_backend(name: str) -> SearchBackend:
+    if name == "local":
+        # SEARCH_LOCAL_DIR 이 없으면 검색 시점의 워크스페이스를 색인
+        return LocalDocsBackend(ToolConfig.SEARCH_LOCAL_DIR or None)
+    if name == "duckduckgo":
+        return DuckDuckGoBackend(ToolConfig.SEARCH_MIN_INTERVAL_SECONDS)
+    raise ValueError(f"Unknown search backend: {name}")
+
+
+_SERVICES: Dict[Tuple[str, str], SearchService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def get_search_service() -> SearchService:
+    """
+    설정된 백엔드의 프로세스 공유 검색 서비스.
+    캐시 DB 는 기본 워크스페이스(OllamaConfig.WORKSPACE_DIR)에 두어 모든 세션 / 배치 태스크가
+    같은 캐시와 호출 간격 제한을 사용합니다.
+    """
+    db_path = os.path.join(OllamaConfig.WORKSPACE_DIR, "search_cache.sqlite")
+    key = (ToolConfig.SEARCH_BACKEND, db_path)
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(key)
+        if service is None:
+            service = SearchService(
+                create_backend(ToolConfig.SEARCH_BACKEND),
+                db_path,
+                ToolConfig.SEARCH_CACHE_TTL_SECONDS,
+            )
+            _SERVICES[key] = service
+    return service
+
+
+def close_search_services():
+    """공유 검색 서비스의 캐시 연결 종료"""
+    with _SERVICES_LOCK:
+        for service in _SERVICES.values():
+            service.close()
+        _SERVICES.clear()
+
+
+atexit.register(close_search_services)
@@ -1,5 +1,12 @@
 import ast
-from typing import Optional
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from types import CodeType
+from typing import Dict, NamedTuple, Optional
+
+from config import ToolConfig
 
 
 class SecurityAnalyzer(ast.NodeVisitor):
@@ -69,16 +76,70 @@ class SecurityAnalyzer(ast.NodeVisitor):
         self.generic_visit(node)
 
 
-def is_safe_code(code: str) -> Optional[str]:
-    """코드가 안전한지 검사합니다. 안전하면 None, 위험하면 에러 메시지 반환."""
+class CodeAnalysis(NamedTuple):
+    """보안 분석 결과. 안전한 코드는 검증된 AST를 컴파일한 code object를 함께 보관"""
+
+    error: Optional[str]
+    code_object: Optional[CodeType]
+
+
+# 소스 해시 -> 분석 결과 (LRU)
+_ANALYSIS_CACHE: "OrderedDict[str, CodeAnalysis]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0, "analysis_seconds": 0.0}
+
+
+def _analyze(code: str) -> CodeAnalysis:
     try:
         tree = ast.parse(code)
     except SyntaxError as e:
-        return f"Syntax Error during security check: {e}"
+        return CodeAnalysis(f"Syntax Error during security check: {e}", None)
 
     analyzer = SecurityAnalyzer()
     analyzer.visit(tree)
 
     if analyzer.errors:
-        return "Security Violation:\n" + "\n".join(analyzer.errors)
-    return None
+        return CodeAnalysis("Security Violation:\n" + "\n".join(analyzer.errors), None)
+    # 검증한 AST 그대로 컴파일 (실행 시 소스를 다시 파싱하지 않음)
+    return CodeAnalysis(None, compile(tree, "<string>", "exec", dont_inherit=True))
+
+
+def analyze_code(code: str) -> CodeAnalysis:
+    """코드 보안 분석 (소스 해시 기준으로 결과를 캐시)"""
+    key = hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+    with _CACHE_LOCK:
+        cached = _ANALYSIS_CACHE.get(key)
+        if cached is not None:
+            _ANALYSIS_CACHE.move_to_end(key)
+            _STATS["hits"] += 1
+            return cached
+
+    start = time.perf_counter()
+    result = _analyze(code)
+    elapsed = time.perf_counter() - start
+
+    with _CACHE_LOCK:
+        _STATS["misses"] += 1
+        _STATS["analysis_seconds"] += elapsed
+        if ToolConfig.SECURITY_CACHE_SIZE > 0:
+            _ANALYSIS_CACHE[key] = result
+            while len(_ANALYSIS_CACHE) > ToolConfig.SECURITY_CACHE_SIZE:
+                _ANALYSIS_CACHE.popitem(last=False)
+    return result
+
+
+def is_safe_code(code: str) -> Optional[str]:
+    """코드가 안전한지 검사합니다. 안전하면 None, 위험하면 에러 메시지 반환."""
+    return analyze_code(code).error
+
+
+def security_stats() -> Dict[str, float]:
+    """분석 캐시 통계 스냅샷 (hits, misses, analysis_seconds, size)"""
+    with _CACHE_LOCK:
+        return {**_STATS, "size": len(_ANALYSIS_CACHE)}
+
+
+def reset_security_cache():
+    with _CACHE_LOCK:
+        _ANALYSIS_CACHE.clear()
+        _STATS.update(hits=0, misses=0, analysis_seconds=0.0)
@@ -0,0 +1,233 @@
+"""
+서버 모드용 세션 관리자.
+하나의 컴파일된 그래프(및 체크포인터)를 여러 세션(thread_id)이 공유하며,
+태스크를 제한된 수의 워커 스레드에서 동시에 실행합니다.
+- 입장 제어: 대기열이 가득 차면 거부 (429), 같은 스레드의 태스크가 실행 중이면 거부 (409)
+- 노드 이벤트를 태스크별로 보관하여 여러 구독자에게 스트리밍 (처음부터 재생 가능)
+- drain(): 새 태스크를 거부하고 진행 중인 태스크가 끝날 때까지 대기
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from core.metrics import record_task, set_queue_state
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionError(Exception):
+    """태스크 접수 거부 (status: 대응하는 HTTP 상태 코드)"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+
+class Task:
+    """실행 요청 1건과 그 이벤트 기록"""
+
+    def __init__(self, thread_id: str, message: str):
+        self.task_id = uuid.uuid4().hex
+        self.thread_id = thread_id
+        self.message = message
+        self.status = "queued"  # queued -> running -> done | error
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    def publish(self, event: Dict[str, Any]):
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def start(self):
+        with self._cond:
+            self.status, self.started_at = "running", time.time()
+        self.publish({"event": "started", "task_id": self.task_id})
+
+    def finish(self, status: str, error: Optional[str] = None):
+        with self._cond:
+            self.status, self.error, self.finished_at = status, error, time.time()
+            self._events.append({"event": status, "error": error})
+            self._cond.notify_all()
+
+    def events(self, heartbeat: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        처음부터 이벤트를 순서대로 반환하고 태스크가 끝나면 종료.
+        heartbeat 초 동안 새 이벤트가 없으면 {"event": "heartbeat"} 반환
+        """
+        index = 0
+        while True:
+            with self._cond:
+                if index >= len(self._events) and not self.finished:
+                    self._cond.wait(heartbeat)
+                batch = self._events[index:]
+                index += len(batch)
+                done = self.finished and index >= len(self._events)
+            yield from batch
+            if done:
+                return
+            if not batch:
+                yield {"event": "heartbeat"}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "thread_id": self.thread_id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _node_event(node: str, values: Any) -> Dict[str, Any]:
+    """graph.stream(updates) 의 노드 업데이트 -> 이벤트"""
+    event: Dict[str, Any] = {"event": "node", "node": node}
+    if isinstance(values, dict):
+        messages = values.get("messages") or []
+        if messages:
+            last = messages[-1]
+            event["sender"] = getattr(last, "name", None) or node
+            event["content"] = getattr(last, "content", str(last))
+        if "next" in values:
+            event["next"] = values["next"]
+    return event
+
+
+class SessionManager:
+    """공유 그래프 + 제한된 워커 풀 + 입장 제어"""
+
+    def __init__(
+        self,
+        graph,
+        max_workers: int,
+        max_queue: int,
+        max_history: int = 1000,
+        recursion_limit: Optional[int] = None,
+    ):
+        self.graph = graph
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_history = max_history
+        self.recursion_limit = recursion_limit
+
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="session")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._tasks: "OrderedDict[str, Task]" = OrderedDict()
+        self._active_threads: Dict[str, str] = {}  # thread_id -> task_id
+        self._queued = 0
+        self._running = 0
+        self._draining = False
+
+    # --- 접수 ---
+    def submit(self, thread_id: str, message: str) -> Task:
+        with self._lock:
+            reason = self._rejection(thread_id)
+            if reason is not None:
+                record_task("rejected")
+                raise reason
+            task = Task(thread_id, message)
+            self._tasks[task.task_id] = task
+            self._active_threads[thread_id] = task.task_id
+            self._queued += 1
+            set_queue_state(self._queued, self._running)
+            # drain() 과 경쟁하지 않도록 잠금 안에서 제출
+            self._pool.submit(self._run, task)
+        record_task("accepted")
+        return task
+
+    def _rejection(self, thread_id: str) -> Optional[AdmissionError]:
+        if self._draining:
+            return AdmissionError("Server is draining", 503)
+        if thread_id in self._active_threads:
+            return AdmissionError(f"Thread '{thread_id}' already has a task", 409)
+        if self._queued + self._running >= self.max_workers + self.max_queue:
+            return AdmissionError("Task queue is full", 429)
+        return None
+
+    # --- 실행 ---
+    def _run(self, task: Task):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            set_queue_state(self._queued, self._running)
+        task.start()
+
+        config: Dict[str, Any] = {"configurable": {"thread_id": task.thread_id}}
+        if self.recursion_limit:
+            config["recursion_limit"] = self.recursion_limit
+        inputs = {"messages": [HumanMessage(content=task.message)]}
+        status, error = "done", None
+        try:
+            for update in self.graph.stream(inputs, config, stream_mode="updates"):
+                for node, values in update.items():
+                    task.publish(_node_event(node, values))
+        except Exception as e:
+            logger.exception("Task %s (thread %s) failed", task.task_id, task.thread_id)
+            status, error = "error", str(e)
+        finally:
+            self._release(task, status, error)
+
+    def _release(self, task: Task, status: str, error: Optional[str]):
+        # 완료 이벤트 전에 스레드를 해제하여 클라이언트가 곧바로 다음 태스크를 제출할 수 있게 함
+        with self._lock:
+            self._running -= 1
+            self._active_threads.pop(task.thread_id, None)
+            set_queue_state(self._queued, self._running)
+        task.finish(status, error)
+        record_task(status, task.finished_at - task.started_at)
+        with self._lock:
+            self._prune_history()
+            self._idle.notify_all()
+
+    def _prune_history(self):
+        """완료된 태스크는 최근 max_history 개만 보관"""
+        excess = len(self._tasks) - self.max_history
+        for task_id in list(self._tasks):
+            if excess <= 0:
+                break
+            if self._tasks[task_id].finished:
+                del self._tasks[task_id]
+                excess -= 1
+
+    # --- 조회 / 종료 ---
+    def get(self, task_id: str) -> Optional[Task]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "draining": self._draining,
+            }
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """새 태스크 접수를 중단하고 진행 중인 태스크 완료 대기. 모두 끝났으면 True"""
+        with self._lock:
+            self._draining = True
+            drained = self._idle.wait_for(
+                lambda: self._queued + self._running == 0, timeout
+            )
+        self._pool.shutdown(wait=drained)
+        return drained
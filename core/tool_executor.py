@@ -1,23 +1,278 @@
-from typing import Dict, List
-
-
-def execute_tools_internal(tool_calls: List[Dict], tools_map: Dict) -> str:
-    """도구 호출 목록을 실행하고 결과를 문자열로 반환"""
-    results = []
-    for call in tool_calls:
-        name = call.get("name")
-        args = call.get("arguments", {})
-
-        if name in tools_map:
-            try:
-                # invoke wrapper
-                tool_instance = tools_map[name]
-                # Tool의 args 스키마에 맞춰 호출
-                output = tool_instance.invoke(args)
-                results.append(f"Tool '{name}' Output: {output}")
-            except Exception as e:
-                results.append(f"Tool '{name}' Error: {e}")
-        else:
-            results.append(f"Error: Tool '{name}' not found.")
-
-    return "\n".join(results)
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+
+from config import ToolConfig
+from core.metrics import record_tool_call
+from core.workspace import resolve_path
+
+# 워크스페이스 상태를 변경하는 도구 (같은 경로를 다루는 호출과 직렬화 필요)
+# run_python_secure 는 샌드박스 안에서도 io.open 등으로 파일을 쓸 수 있음
+MUTATING_TOOLS = frozenset({"file_write", "run_python_secure"})
+
+# 경로 인자 없이 워크스페이스 전체를 다루는 도구 (코드 실행: 임의 파일 import / 읽기 / 쓰기)
+WORKSPACE_TOOLS = frozenset({"run_python_secure"})
+
+# 경로로 해석되는 도구 인자 이름
+PATH_ARG_KEYS = ("file_path", "path")
+
+
+def _resolve_call(call: Dict, tools_map: Dict):
+    """도구 호출에서 (이름, 인자, 도구 인스턴스) 추출"""
+    name = call.get("name")
+    args = call.get("arguments", {})
+    return name, args, tools_map.get(name)
+
+
+def _observe(name: str, started: float, output: str) -> str:
+    """도구 지연 / 결과 기록 (도구가 반환한 'Error...' 문자열도 에러로 집계)"""
+    failed = output.startswith(
+        ("Error", f"Tool '{name}' Error", f"Tool '{name}' Output: Error")
+    )
+    record_tool_call(
+        str(name), "error" if failed else "ok", time.perf_counter() - started
+    )
+    return output
+
+
+def _invoke_tool(call: Dict, tools_map: Dict) -> str:
+    """도구 1건 실행 후 관찰 문자열 반환 (예외를 던지지 않음)"""
+    started = time.perf_counter()
+    name, args, tool_instance = _resolve_call(call, tools_map)
+    if tool_instance is None:
+        return _observe(name, started, f"Error: Tool '{name}' not found.")
+    try:
+        # Tool의 args 스키마에 맞춰 호출
+        output = tool_instance.invoke(args)
+        return _observe(name, started, f"Tool '{name}' Output: {output}")
+    except Exception as e:
+        return _observe(name, started, f"Tool '{name}' Error: {e}")
+
+
+async def _ainvoke_tool(call: Dict, tools_map: Dict) -> str:
+    """_invoke_tool의 비동기 버전 (Tool.ainvoke 사용)"""
+    started = time.perf_counter()
+    name, args, tool_instance = _resolve_call(call, tools_map)
+    if tool_instance is None:
+        return _observe(name, started, f"Error: Tool '{name}' not found.")
+    try:
+        # 동기 전용 도구는 LangChain이 executor에서 실행
+        output = await tool_instance.ainvoke(args)
+        return _observe(name, started, f"Tool '{name}' Output: {output}")
+    except Exception as e:
+        return _observe(name, started, f"Tool '{name}' Error: {e}")
+
+
+def _timeout_message(call: Dict, timeout: float) -> str:
+    record_tool_call(str(call.get("name")), "timeout", timeout)
+    return f"Tool '{call.get('name')}' Error: Timed out after {timeout:g}s."
+
+
+def _skipped_message(call: Dict) -> str:
+    record_tool_call(str(call.get("name")), "skipped")
+    return (
+        f"Tool '{call.get('name')}' Error: Skipped because an earlier call "
+        "on the same path timed out."
+    )
+
+
+# =============================================================================
+# 충돌 분석 (같은 경로를 다루는 호출 직렬화)
+# =============================================================================
+def _call_paths(call: Dict, tools_map: Dict) -> List[str]:
+    """호출이 다루는 경로 목록 (인자가 생략되면 도구 스키마의 기본값 사용)"""
+    name, args, tool_instance = _resolve_call(call, tools_map)
+    if tool_instance is None:
+        return []
+    if name in WORKSPACE_TOOLS:
+        return [resolve_path(".")]
+
+    schema = getattr(tool_instance, "args", {}) or {}
+    paths = []
+    for key in PATH_ARG_KEYS:
+        value = args.get(key) if isinstance(args, dict) else None
+        if value is None and key in schema:
+            value = schema[key].get("default")
+        if isinstance(value, str):
+            paths.append(resolve_path(value))
+    return paths
+
+
+def _paths_overlap(a: str, b: str) -> bool:
+    """같은 경로이거나 한쪽이 다른 쪽의 상위 디렉토리인지 확인"""
+    try:
+        return os.path.commonpath([a, b]) in (a, b)
+    except ValueError:
+        return False
+
+
+def _dependencies(tool_calls: List[Dict], tools_map: Dict) -> List[List[int]]:
+    """
+    각 호출이 먼저 끝나기를 기다려야 하는 이전 호출의 인덱스 목록.
+    경로가 겹치고 둘 중 하나라도 상태를 변경하는 도구이면 충돌로 간주합니다.
+    """
+    paths = [_call_paths(call, tools_map) for call in tool_calls]
+    mutating = [call.get("name") in MUTATING_TOOLS for call in tool_calls]
+
+    deps: List[List[int]] = []
+    for j in range(len(tool_calls)):
+        deps.append(
+            [
+                i
+                for i in range(j)
+                if (mutating[i] or mutating[j])
+                and any(_paths_overlap(a, b) for a in paths[i] for b in paths[j])
+            ]
+        )
+    return deps
+
+
+# =============================================================================
+# 실행
+# =============================================================================
+class _Schedule:
+    """
+    의존성 / 동시 실행 수 / 호출별 deadline 을 관리하는 실행 계획 (동기 / 비동기 공용).
+    실행 단위(handle)는 concurrent.futures.Future 또는 asyncio.Task 입니다.
+    """
+
+    def __init__(
+        self, tool_calls: List[Dict], tools_map: Dict, max_workers: int, timeout: float
+    ):
+        self.tool_calls = tool_calls
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.deps = _dependencies(tool_calls, tools_map)
+        self.results: List[Optional[str]] = [None] * len(tool_calls)
+        self.timed_out = set()
+        self.pending = list(range(len(tool_calls)))
+        self.running: Dict = {}  # handle -> (index, deadline)
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.pending or self.running)
+
+    def startable(self) -> Iterator[int]:
+        """선행 호출이 모두 끝난 호출의 인덱스 (원래 순서 우선, 선행 호출이 시간 초과면 건너뜀)"""
+        for idx in list(self.pending):
+            if len(self.running) >= self.max_workers:
+                break
+            if any(self.results[d] is None for d in self.deps[idx]):
+                continue
+            self.pending.remove(idx)
+            if any(d in self.timed_out for d in self.deps[idx]):
+                self.results[idx] = _skipped_message(self.tool_calls[idx])
+                self.timed_out.add(idx)
+                continue
+            yield idx
+
+    def start(self, handle, idx: int):
+        self.running[handle] = (idx, time.monotonic() + self.timeout)
+
+    def wait_seconds(self) -> float:
+        """가장 가까운 deadline 까지 남은 시간"""
+        nearest = min(deadline for _, deadline in self.running.values())
+        return max(0.0, nearest - time.monotonic())
+
+    def finish(self, handle, output: str):
+        idx, _ = self.running.pop(handle)
+        self.results[idx] = output
+
+    def expire(self) -> List:
+        """deadline 이 지난 실행을 시간 초과로 처리하고 해당 handle 반환 (호출자가 취소)"""
+        now = time.monotonic()
+        expired = []
+        for handle, (idx, deadline) in list(self.running.items()):
+            if now >= deadline:
+                self.running.pop(handle)
+                self.results[idx] = _timeout_message(self.tool_calls[idx], self.timeout)
+                self.timed_out.add(idx)
+                expired.append(handle)
+        return expired
+
+    def output(self) -> str:
+        return "\n".join(r or "" for r in self.results)
+
+
+def _execute_concurrently(schedule: _Schedule, tools_map: Dict) -> str:
+    """의존성을 지키면서 독립적인 호출을 스레드 풀에서 병렬 실행"""
+    pool = ThreadPoolExecutor(
+        max_workers=schedule.max_workers, thread_name_prefix="tool"
+    )
+    try:
+        while schedule.busy:
+            for idx in schedule.startable():
+                # 컨텍스트(현재 워크스페이스 등)를 워커 스레드로 전달
+                future = pool.submit(
+                    contextvars.copy_context().run,
+                    _invoke_tool,
+                    schedule.tool_calls[idx],
+                    tools_map,
+                )
+                schedule.start(future, idx)
+            if not schedule.running:
+                continue
+            done, _ = wait(
+                schedule.running,
+                timeout=schedule.wait_seconds(),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                schedule.finish(future, future.result())
+            # 스레드는 강제 종료할 수 없으므로 결과만 포기
+            for future in schedule.expire():
+                future.cancel()
+    finally:
+        pool.shutdown(wait=False)
+    return schedule.output()
+
+
+async def _aexecute_concurrently(schedule: _Schedule, tools_map: Dict) -> str:
+    """_execute_concurrently의 비동기 버전 (Tool.ainvoke 태스크)"""
+    while schedule.busy:
+        for idx in schedule.startable():
+            task = asyncio.ensure_future(
+                _ainvoke_tool(schedule.tool_calls[idx], tools_map)
+            )
+            schedule.start(task, idx)
+        if not schedule.running:
+            continue
+        done, _ = await asyncio.wait(
+            list(schedule.running),
+            timeout=schedule.wait_seconds(),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        for task in done:
+            schedule.finish(task, task.result())
+        for task in schedule.expire():
+            task.cancel()
+    return schedule.output()
+
+
+def execute_tools_internal(
+    tool_calls: List[Dict],
+    tools_map: Dict,
+    max_workers: int = ToolConfig.MAX_PARALLEL_TOOLS,
+    timeout: float = ToolConfig.TOOL_TIMEOUT_SECONDS,
+) -> str:
+    """
+    도구 호출 목록을 실행하고 결과를 문자열로 반환.
+    max_workers > 1 이면 독립적인 호출을 병렬 실행하며, 결과는 항상 원래 순서를 유지합니다.
+    max_workers <= 1 이면 1개씩 순서대로 실행합니다 (호출별 timeout 은 동일하게 적용).
+    """
+    schedule = _Schedule(tool_calls, tools_map, max(1, max_workers), timeout)
+    return _execute_concurrently(schedule, tools_map)
+
+
+async def aexecute_tools_internal(
+    tool_calls: List[Dict],
+    tools_map: Dict,
+    max_workers: int = ToolConfig.MAX_PARALLEL_TOOLS,
+    timeout: float = ToolConfig.TOOL_TIMEOUT_SECONDS,
+) -> str:
+    """execute_tools_internal의 비동기 버전 (Tool.ainvoke 사용)"""
+    schedule = _Schedule(tool_calls, tools_map, max(1, max_workers), timeout)
+    return await _aexecute_concurrently(schedule, tools_map)
@@ -0,0 +1,124 @@
+"""
+시작 시 모델 워밍업.
+그래프가 사용할 모든 모델에 짧은 생성(num_predict=1)을 요청하여 Ollama 가 모델을
+미리 메모리에 올리도록 합니다. 요청은 백그라운드 스레드에서 병렬로 실행되므로
+그래프 컴파일 / 체크포인터 준비와 동시에 진행됩니다.
+시작 단계는 워밍업을 기다리지 않으며, 완료 시점은 on_warmup_done() 콜백으로 보고합니다.
+각 요청에는 keep_alive(core.llm_factory.keep_alive_for)가 적용되어, 모델이 설정된 시간 동안 상주합니다.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Callable, Dict, Iterable, List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from config import OllamaConfig
+from core.llm_factory import get_llm
+from core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+def models_in_use() -> List[str]:
+    """그래프의 모든 노드가 사용하는 모델 목록 (역할별 모델 + Supervisor fallback 모델)"""
+    models = list(OllamaConfig.ROLE_MODELS.values())
+    models.append(OllamaConfig.SUPERVISOR_FALLBACK_MODEL)
+    return [m for m in dict.fromkeys(models) if m]
+
+
+def _num_ctx_for(model: str) -> int:
+    """모델을 사용하는 첫 역할의 num_ctx (값이 다르면 Ollama 가 모델을 다시 로드)"""
+    for role, role_model in OllamaConfig.ROLE_MODELS.items():
+        if role_model == model:
+            options = OllamaConfig.ROLE_OPTIONS.get(role) or {}
+            return options.get("num_ctx", OllamaConfig.NUM_CTX)
+    return OllamaConfig.NUM_CTX
+
+
+def warm_up_model(model: str) -> float:
+    """모델 1개 로드 (짧은 생성 1회). 반환값: 소요 시간(초)"""
+    started = time.perf_counter()
+    llm = get_llm(model, cache=False, num_predict=1, num_ctx=_num_ctx_for(model))
+    llm.invoke([HumanMessage(content="ping")])
+    seconds = time.perf_counter() - started
+    REGISTRY.set("llm_warmup_seconds", seconds, {"model": model})
+    return seconds
+
+
+def start_warmup(models: Optional[Iterable[str]] = None) -> Dict[str, Future]:
+    """모델별 워밍업을 백그라운드에서 시작 (비활성화 시 빈 dict)"""
+    if not OllamaConfig.WARMUP_ENABLED:
+        return {}
+    models = list(dict.fromkeys(models_in_use() if models is None else models))
+    if not models:
+        return {}
+    pool = ThreadPoolExecutor(len(models), thread_name_prefix="warmup")
+    futures = {model: pool.submit(warm_up_model, model) for model in models}
+    pool.shutdown(wait=False)
+    return futures
+
+
+def _collect(futures: Dict[str, Future], timeout: float) -> Dict[str, Optional[float]]:
+    """모델별 결과: 소요 시간(초) 또는 None(실패 / 미완료)"""
+    results: Dict[str, Optional[float]] = {}
+    for model, future in futures.items():
+        if not future.done():
+            logger.warning("Warm-up of %s still running after %.0fs", model, timeout)
+            results[model] = None
+        elif future.exception() is not None:
+            logger.warning("Warm-up of %s failed: %s", model, future.exception())
+            results[model] = None
+        else:
+            results[model] = future.result()
+    return results
+
+
+def wait_for_warmup(
+    futures: Dict[str, Future], timeout: Optional[float] = None
+) -> Dict[str, Optional[float]]:
+    """
+    워밍업 완료 대기. 반환값: {모델: 소요 시간(초) 또는 None(실패 / 시간 초과)}
+    실패해도 예외를 올리지 않습니다 (첫 요청에서 다시 로드됨).
+    """
+    timeout = OllamaConfig.WARMUP_TIMEOUT_SECONDS if timeout is None else timeout
+    wait_futures(futures.values(), timeout)
+    return _collect(futures, timeout)
+
+
+def on_warmup_done(
+    futures: Dict[str, Future],
+    callback: Callable[[Dict[str, Optional[float]]], None],
+) -> None:
+    """
+    모든 워밍업이 끝나면(성공 / 실패 무관) callback(결과) 를 1회 호출 (대기하지 않음).
+    마지막으로 끝난 워밍업 스레드에서 호출되며, 워밍업이 없으면 즉시 호출됩니다.
+    """
+    if not futures:
+        callback({})
+        return
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def _done(_future: Future) -> None:
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        callback(_collect(futures, 0))
+
+    for future in futures.values():
+        future.add_done_callback(_done)
+
+
+def describe_warmup(results: Dict[str, Optional[float]]) -> str:
+    """wait_for_warmup() / on_warmup_done() 결과 요약 (예: "qwen2.5-coder:14b 3.21s")"""
+    if not results:
+        return "off"
+    return ", ".join(
+        f"{model} {'failed' if seconds is None else f'{seconds:.2f}s'}"
+        for model, seconds in results.items()
+    )
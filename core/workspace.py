@@ -0,0 +1,46 @@
+"""
+현재 작업의 워크스페이스 경로.
+기본값은 OllamaConfig.WORKSPACE_DIR 이며, use_workspace() 로 현재 컨텍스트(스레드 / 태스크)
+에서만 다른 디렉토리를 쓰게 할 수 있습니다 (배치 실행 시 태스크별 격리).
+LangGraph 는 노드를 실행할 때 컨텍스트를 복사하므로 노드 / 도구 호출에도 그대로 전달됩니다.
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from config import OllamaConfig
+
+_WORKSPACE: ContextVar[Optional[str]] = ContextVar("workspace", default=None)
+
+
+def current_workspace() -> str:
+    return _WORKSPACE.get() or OllamaConfig.WORKSPACE_DIR
+
+
+@contextmanager
+def use_workspace(path: str) -> Iterator[str]:
+    """현재 컨텍스트의 워크스페이스를 path 로 변경 (디렉토리가 없으면 생성)"""
+    path = os.path.abspath(path)
+    os.makedirs(path, exist_ok=True)
+    token = _WORKSPACE.set(path)
+    try:
+        yield path
+    finally:
+        _WORKSPACE.reset(token)
+
+
+def resolve_path(path: str) -> str:
+    """
+    상대 경로를 현재 워크스페이스 기준 절대 경로로 정규화 (워크스페이스 밖 여부는 검사하지 않음).
+    'workspace/a.py' 처럼 워크스페이스 디렉토리 이름으로 시작하면 중복을 제거합니다.
+    """
+    if not os.path.isabs(path):
+        workspace = os.path.abspath(current_workspace())
+        workspace_name = os.path.basename(workspace)
+        clean_path = path.replace("\\", "/")
+        if clean_path.startswith(f"{workspace_name}/"):
+            path = clean_path[len(workspace_name) + 1 :]
+        path = os.path.join(workspace, path)
+    return os.path.normpath(path)
@@ -1,59 +1,205 @@
+"""
+체크포인트 DB(agent_memory.sqlite)의 writes 조회 도구.
+- 체크포인터와 같은 serializer(JsonPlusSerializer)로 값을 복원
+- 스레드 / 노드 / 태스크 / 채널 / 시간 범위 필터
+- 기본 키 기준 keyset 페이지네이션 (OFFSET 없이 페이지 단위로만 읽음)
+- --jsonl: 전체 결과를 JSON Lines 로 스트리밍
+
+실행 예:
+  python inspect_memory.py --thread standard_loop_1 --node Coder
+  python inspect_memory.py --since 2026-01-01T00:00 --jsonl --limit 0 > writes.jsonl
+"""
+
+import argparse
+import base64
+import json
 import os
-import pickle
 import sqlite3
-from typing import Any
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 
 from config import OllamaConfig
+from core.checkpoint import checkpoint_id_at, checkpoint_time
 
 DB_PATH = os.path.join(OllamaConfig.WORKSPACE_DIR, "agent_memory.sqlite")
 
+# writes 테이블 기본 키 (keyset 페이지네이션 순서)
+_KEY_COLUMNS = ("thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx")
 
-def _process_data_blob(data_blob: Any):
-    """데이터 블록을 처리하고 내용을 출력합니다."""
-    try:
-        if isinstance(data_blob, bytes):
+
+class WriteFilter(NamedTuple):
+    thread_id: Optional[str] = None
+    node: Optional[str] = None
+    task_id: Optional[str] = None
+    channel: Optional[str] = None
+    since: Optional[float] = None  # Unix timestamp
+    until: Optional[float] = None
+
+
+def encode_cursor(key: Tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode())))
+
+
+def _build_query(
+    flt: WriteFilter, after: Optional[Tuple], page_size: int
+) -> Tuple[str, list]:
+    clauses, params = [], []
+    if flt.thread_id is not None:
+        clauses.append("thread_id = ?")
+        params.append(flt.thread_id)
+    if flt.node is not None:
+        # task_path 예: "~__pregel_pull, Coder"
+        clauses.append("(task_path = ? OR task_path LIKE ?)")
+        params += [flt.node, f"%, {flt.node}"]
+    if flt.task_id is not None:
+        clauses.append("task_id = ?")
+        params.append(flt.task_id)
+    if flt.channel is not None:
+        clauses.append("channel = ?")
+        params.append(flt.channel)
+    # 체크포인트 ID(uuid6)는 시간순이므로 시간 범위를 ID 범위로 변환
+    if flt.since is not None:
+        clauses.append("checkpoint_id >= ?")
+        params.append(checkpoint_id_at(flt.since))
+    if flt.until is not None:
+        clauses.append("checkpoint_id < ?")
+        params.append(checkpoint_id_at(flt.until))
+    if after is not None:
+        # 스레드가 고정되면 나머지 키 컬럼만 비교해야 인덱스 범위 검색이 됨
+        offset = 1 if flt.thread_id is not None else 0
+        columns = _KEY_COLUMNS[offset:]
+        placeholders = ", ".join("?" * len(columns))
+        clauses.append(f"({', '.join(columns)}) > ({placeholders})")
+        params += list(after[offset:])
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = (
+        f"SELECT {', '.join(_KEY_COLUMNS)}, task_path, channel, type, value "
+        f"FROM writes {where} ORDER BY {', '.join(_KEY_COLUMNS)} LIMIT ?"
+    )
+    return sql, params + [page_size]
+
+
+def iter_writes(
+    conn: sqlite3.Connection,
+    flt: WriteFilter,
+    after: Optional[Tuple] = None,
+    page_size: int = 500,
+    serde: Optional[JsonPlusSerializer] = None,
+) -> Iterator[Dict[str, Any]]:
+    """조건에 맞는 writes 를 기본 키 순서로 한 페이지씩 읽어 복원된 값과 함께 반환"""
+    serde = serde or JsonPlusSerializer()
+    while True:
+        sql, params = _build_query(flt, after, page_size)
+        rows = conn.execute(sql, params).fetchall()
+        for row in rows:
+            key, (task_path, channel, type_, value) = row[:5], row[5:]
             try:
-                data = pickle.loads(data_blob)
-                print(f"Unpickled Data: {data}")
-                if isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, tuple) and len(item) > 1:
-                            val = item[1]
-                            if hasattr(val, "content"):
-                                print(f"Content: {val.content}")
-            except Exception:
-                # Fallback: search for strings in raw bytes
-                content = data_blob.decode("utf-8", errors="ignore")
-                print(f"Raw Bytes Search (Preview): {content[:500]}")
+                decoded = serde.loads_typed((type_, value))
+            except Exception as e:
+                decoded = f"<undecodable {type_} value: {e}>"
+            after = key
+            yield {
+                "thread_id": key[0],
+                "checkpoint_ns": key[1],
+                "checkpoint_id": key[2],
+                "time": datetime.fromtimestamp(checkpoint_time(key[2])).isoformat(),
+                "task_id": key[3],
+                "node": task_path.rsplit(", ", 1)[-1],
+                "idx": key[4],
+                "channel": channel,
+                "value": decoded,
+                "cursor": encode_cursor(key),
+            }
+        if len(rows) < page_size:
+            return
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "name": value.name, "content": value.content}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def _print_record(record: Dict[str, Any]):
+    print(
+        f"\n[{record['time']}] Thread: {record['thread_id']}, "
+        f"Node: {record['node']}, Channel: {record['channel']}"
+    )
+    values = record["value"] if isinstance(record["value"], list) else [record["value"]]
+    for value in values:
+        if isinstance(value, BaseMessage):
+            name = value.name or value.type
+            print(f"  {name}: {str(value.content)[:500]}")
         else:
-            print(f"Data: {data_blob}")
-    except Exception as e:
-        print(f"Error processing data: {e}")
+            print(f"  {str(value)[:500]}")
 
 
-def inspect_messages():
-    """DB에 저장된 메시지 내역을 조회합니다."""
-    if not os.path.exists(DB_PATH):
-        print(f"Database not found at {DB_PATH}")
-        return
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    return datetime.fromisoformat(value).timestamp() if value else None
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
 
-    try:
-        cursor.execute(
-            "SELECT thread_id, task, data FROM writes ORDER BY thread_id DESC LIMIT 50;"
-        )
-        writes = cursor.fetchall()
-        print(f"\n--- Found {len(writes)} writes ---")
+def inspect_messages(argv=None):
+    """DB에 저장된 writes 조회 (기본: 기본 키 순서로 50건, 사람이 읽기 쉬운 형식)"""
+    parser = argparse.ArgumentParser(description="Inspect agent_memory.sqlite writes")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--thread")
+    parser.add_argument("--node", help="node name, e.g. Coder or Supervisor")
+    parser.add_argument("--task")
+    parser.add_argument("--channel", help="e.g. messages")
+    parser.add_argument("--since", help="ISO time, e.g. 2026-01-01T09:00")
+    parser.add_argument("--until", help="ISO time (exclusive)")
+    parser.add_argument("--after", help="cursor printed by a previous run")
+    parser.add_argument("--limit", type=int, default=50, help="0 = no limit")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--jsonl", action="store_true", help="stream JSON Lines")
+    args = parser.parse_args(argv)
 
-        for tid, task, data_blob in writes:
-            print(f"\n[Thread: {tid}, Task: {task}]")
-            _process_data_blob(data_blob)
+    if not os.path.exists(args.db):
+        print(f"Database not found at {args.db}")
+        return
 
-    except Exception as e:
-        print(f"Error querying table: {e}")
+    flt = WriteFilter(
+        args.thread,
+        args.node,
+        args.task,
+        args.channel,
+        _parse_time(args.since),
+        _parse_time(args.until),
+    )
+    after = decode_cursor(args.after) if args.after else None
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        count, last_cursor = 0, None
+        for record in iter_writes(conn, flt, after, args.page_size):
+            if args.jsonl:
+                sys.stdout.write(json.dumps(_to_jsonable(record), ensure_ascii=False))
+                sys.stdout.write("\n")
+            else:
+                _print_record(record)
+            count, last_cursor = count + 1, record["cursor"]
+            if args.limit and count >= args.limit:
+                break
 
+        if not args.jsonl:
+            print(f"\n--- {count} writes ---")
+            if last_cursor and args.limit and count >= args.limit:
+                print(f"Next page: --after {last_cursor}")
     finally:
         conn.close()
 
@@ -0,0 +1,194 @@
+"""
+멀티 세션 에이전트 서버 (로컬 HTTP API).
+하나의 컴파일된 그래프와 체크포인터를 모든 세션이 공유하고,
+태스크를 SERVER_MAX_WORKERS 개까지 동시에 실행합니다.
+
+API (JSON / NDJSON):
+  POST /tasks              {"message": "...", "thread_id": "optional", "stream": false}
+                           -> 202 {"task_id", "thread_id"} (stream=true 이면 이벤트 스트림)
+                           대기열 초과 429, 같은 스레드 실행 중 409, 종료 중 503
+  GET  /tasks/<id>         태스크 상태
+  GET  /tasks/<id>/events  노드 이벤트 NDJSON 스트림 (처음부터 재생, 완료 시 종료)
+  GET  /healthz            대기열 / 실행 수
+  GET  /metrics            Prometheus 텍스트 (core.metrics)
+
+SIGINT / SIGTERM: 새 태스크를 거부하고 진행 중인 태스크를 마친 뒤 종료 (graceful drain)
+
+실행: python server.py [--host 127.0.0.1] [--port 8765] [--workers 4] [--queue 16]
+"""
+
+import argparse
+import json
+import logging
+import signal
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator
+
+from coding_agent import DB_PATH, open_graph
+from config import ObservabilityConfig, ServerConfig
+from core.metrics import dump_metrics, render_prometheus
+from core.session_manager import AdmissionError, SessionManager
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1_000_000
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """SessionManager 를 노출하는 요청 핸들러 (server.manager 사용)"""
+
+    protocol_version = "HTTP/1.1"
+
+    # --- 응답 헬퍼 ---
+    def _send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str, content_type: str):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, events: Iterator[Dict[str, Any]]):
+        """NDJSON 스트림 (길이를 모르므로 연결 종료로 끝을 알림)"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for event in events:
+                line = json.dumps(event, ensure_ascii=False) + "\n"
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 연결을 끊어도 태스크는 계속 실행됨
+            logger.info("Event stream client disconnected")
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        return payload
+
+    # --- 라우팅 ---
+    def do_GET(self):
+        manager: SessionManager = self.server.manager
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/healthz":
+            return self._send_json(200, manager.stats())
+        if path == "/metrics":
+            return self._send_text(
+                200, render_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+            )
+
+        parts = path.strip("/").split("/")
+        if len(parts) in (2, 3) and parts[0] == "tasks":
+            task = manager.get(parts[1])
+            if task is None:
+                return self._send_json(404, {"error": "Unknown task"})
+            if len(parts) == 2:
+                return self._send_json(200, task.summary())
+            if parts[2] == "events":
+                return self._stream(task.events(ServerConfig.HEARTBEAT_SECONDS))
+        self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0].rstrip("/") != "/tasks":
+            return self._send_json(404, {"error": "Not found"})
+        try:
+            payload = self._read_json()
+            message = payload.get("message")
+            if not isinstance(message, str) or not message.strip():
+                raise ValueError("'message' must be a non-empty string")
+            thread_id = str(payload.get("thread_id") or uuid.uuid4().hex)
+        except ValueError as e:  # json.JSONDecodeError 포함
+            return self._send_json(400, {"error": str(e)})
+
+        try:
+            task = self.server.manager.submit(thread_id, message)
+        except AdmissionError as e:
+            return self._send_json(e.status, {"error": str(e)})
+
+        if payload.get("stream"):
+            return self._stream(task.events(ServerConfig.HEARTBEAT_SECONDS))
+        self._send_json(202, {"task_id": task.task_id, "thread_id": task.thread_id})
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def create_server(manager: SessionManager, host: str, port: int) -> ThreadingHTTPServer:
+    """요청마다 스레드를 쓰는 HTTP 서버 (태스크 실행은 manager 의 워커 풀에서)"""
+    httpd = ThreadingHTTPServer((host, port), AgentRequestHandler)
+    httpd.daemon_threads = True
+    httpd.manager = manager
+    return httpd
+
+
+def _install_drain_handler(httpd: ThreadingHTTPServer, manager: SessionManager):
+    """종료 시그널: 접수 중단 -> 진행 중인 태스크 완료 대기 -> HTTP 서버 종료"""
+    stopping = threading.Event()
+
+    def drain_and_stop():
+        logger.info("Draining %s", manager.stats())
+        if not manager.drain(ServerConfig.DRAIN_TIMEOUT_SECONDS):
+            logger.warning("Drain timed out; unfinished tasks will be abandoned")
+        httpd.shutdown()
+
+    def handler(signum, frame):
+        if stopping.is_set():
+            return
+        stopping.set()
+        # serve_forever 와 같은 스레드에서 shutdown() 을 호출하면 교착되므로 별도 스레드
+        threading.Thread(target=drain_and_stop, name="drain", daemon=True).start()
+
+    signal.signal(signal.SIGINT, handler)
+    signal.signal(signal.SIGTERM, handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session agent server")
+    parser.add_argument("--host", default=ServerConfig.HOST)
+    parser.add_argument("--port", type=int, default=ServerConfig.PORT)
+    parser.add_argument("--workers", type=int, default=ServerConfig.MAX_WORKERS)
+    parser.add_argument("--queue", type=int, default=ServerConfig.MAX_QUEUE)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=ObservabilityConfig.LOG_LEVEL, format=ObservabilityConfig.LOG_FORMAT
+    )
+    with open_graph(DB_PATH) as graph:
+        manager = SessionManager(graph, args.workers, args.queue)
+        httpd = create_server(manager, args.host, args.port)
+        _install_drain_handler(httpd, manager)
+
+        logger.info(
+            "Serving on http://%s:%d (workers=%d, queue=%d)",
+            *httpd.server_address[:2],
+            args.workers,
+            args.queue,
+        )
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
+            if ObservabilityConfig.METRICS_FILE:
+                dump_metrics(ObservabilityConfig.METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,92 @@
-from unittest.mock import patch
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Sequence, TypedDict
+from unittest.mock import AsyncMock, patch
 
 import pytest
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+)
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
 
-from core.agent_runtime import run_react_agent
-from core.security import is_safe_code
+from batch_runner import BatchRunner, BatchTask, read_tasks
+from coding_agent import (
+    _build_supervisor_prompt,
+    asupervisor_node,
+    open_graph,
+    supervisor_node,
+)
+from config import OllamaConfig
+from core.agent_runtime import (
+    arun_react_agent,
+    compile_agent_prompt,
+    run_react_agent,
+)
+from core.checkpoint import (
+    BatchedSqliteSaver,
+    checkpoint_id_at,
+    checkpoint_time,
+    open_async_checkpointer,
+    open_checkpointer,
+)
+from core.context_manager import count_tokens, fit_to_budget
+from core.llm_cache import CachedChatModel, LLMResponseCache
+from core.llm_factory import (
+    close_all_llms,
+    get_llm,
+    keep_alive_for,
+    pooled_client_count,
+    role_settings,
+)
+from core.metrics import (
+    REGISTRY,
+    dump_metrics,
+    render_prometheus,
+    reset_metrics,
+)
+from core.retention import prune_checkpoints
+from core.routing import route_by_rules
+from core.search import (
+    LocalDocsBackend,
+    SearchBackend,
+    SearchService,
+    close_search_services,
+    get_search_service,
+)
+from core.security import (
+    analyze_code,
+    is_safe_code,
+    reset_security_cache,
+    security_stats,
+)
+from core.session_manager import AdmissionError, SessionManager
+from core.tool_executor import aexecute_tools_internal, execute_tools_internal
+from core.warmup import (
+    describe_warmup,
+    models_in_use,
+    on_warmup_done,
+    start_warmup,
+    wait_for_warmup,
+)
+from core.workspace import use_workspace
+from inspect_memory import WriteFilter, _build_query, decode_cursor, iter_writes
+from server import create_server
+from tools import file_read, file_write, get_safe_path
 
 
 # =============================================================================
@@ -44,6 +125,29 @@ class TestSecurityAnalyzer:
         assert result is not None
         assert "Function '__import__' is blocked" in result
 
+    def test_hp_02_cached_verdict(self):
+        """[HP-02] 동일 소스 재검사 시 캐시된 결과와 code object 재사용"""
+        reset_security_cache()
+        first = analyze_code("x = 1\nprint(x)")
+        second = analyze_code("x = 1\nprint(x)")
+
+        assert first is second
+        assert first.error is None
+        assert first.code_object.co_filename == "<string>"
+        stats = security_stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+    def test_edge_03_cache_bounded(self, monkeypatch):
+        """[EDGE-03] 캐시 크기 제한 초과 시 오래된 항목 제거, 차단 결과도 캐시"""
+        monkeypatch.setattr("config.ToolConfig.SECURITY_CACHE_SIZE", 2)
+        reset_security_cache()
+        for i in range(3):
+            analyze_code(f"eval('{i}')")
+
+        assert security_stats()["size"] == 2
+        assert analyze_code("eval('2')").code_object is None
+        assert security_stats()["hits"] == 1
+
 
 # =============================================================================
 # 2. Agent Runtime Tests
@@ -120,3 +224,1217 @@ class TestAgentRuntime:
         assert "Done." in response
         # 호출 횟수 3회 (Warning -> Retry -> Final)
         assert mock_llm.return_value.invoke.call_count == 3
+
+    def test_edge_03_invalid_tool_call_warning(self, mock_llm):
+        """[EDGE-03] 스키마 검증 실패 시 실행하지 않고 경고 후 재시도"""
+        mock_llm.return_value.invoke.side_effect = [
+            AIMessage(content='```json\n{"name": "dummy_tool", "arguments": {}}\n```'),
+            AIMessage(content="Done."),
+        ]
+
+        history = [HumanMessage(content="Start")]
+        with patch("core.agent_runtime.execute_tools_internal") as execute:
+            response = run_react_agent(
+                "Tester", "Prompt", [dummy_tool], history, max_iterations=3
+            )
+
+        assert response == "Done."
+        execute.assert_not_called()
+        retry_prompt = mock_llm.return_value.invoke.call_args_list[1].args[0]
+        assert "missing required arguments ['arg']" in retry_prompt[-1].content
+
+    async def test_hp_02_async_happy_path(self, mock_llm):
+        """[HP-02] 비동기 런타임(arun_react_agent)도 동일한 흐름으로 동작"""
+        mock_llm.return_value.ainvoke = AsyncMock(
+            side_effect=[
+                AIMessage(
+                    content='```json\n[{"name": "dummy_tool", "arguments": {"arg": "async"}}]\n```'
+                ),
+                AIMessage(content="Final Answer: Async Done."),
+            ]
+        )
+
+        history = [HumanMessage(content="Do something")]
+        response = await arun_react_agent(
+            "Tester", "Prompt", [dummy_tool], history, max_iterations=2
+        )
+
+        assert "Final Answer: Async Done." in response
+        assert mock_llm.return_value.ainvoke.await_count == 2
+        # 동기 invoke는 호출되지 않아야 함
+        assert mock_llm.return_value.invoke.call_count == 0
+
+    def test_hp_03_streaming_early_stop(self, mock_llm):
+        """[HP-03] 스트리밍 모드: 도구 호출 블록 완성 즉시 생성 중단"""
+        closed = []
+
+        def tool_call_stream(messages):
+            pieces = [
+                "Thinking...\n``",
+                '`json\n[{"name": "dummy_tool", ',
+                '"arguments": {"arg": "stream"}}]\n``',
+                "`\nObservation: hallucinated",
+                " more rambling",
+            ]
+            try:
+                for piece in pieces:
+                    yield AIMessageChunk(content=piece)
+            finally:
+                closed.append(True)
+
+        mock_llm.return_value.stream.side_effect = [
+            tool_call_stream(None),
+            iter([AIMessageChunk(content="Final "), AIMessageChunk(content="Done.")]),
+        ]
+
+        history = [HumanMessage(content="Do something")]
+        with patch("core.agent_runtime._append_tool_observation") as append:
+            response = run_react_agent(
+                "Tester", "Prompt", [dummy_tool], history, streaming=True
+            )
+
+        assert response == "Final Done."
+        assert closed == [True]
+        streamed_content = append.call_args.args[0]
+        assert streamed_content.endswith("```")
+        assert "hallucinated" not in streamed_content
+        assert mock_llm.return_value.invoke.call_count == 0
+
+    def test_hp_04_stable_prompt_prefix(self, mock_llm):
+        """[HP-04] 미리 구성한 프롬프트 재사용, 각 요청은 이전 요청을 prefix 로 가짐"""
+        call = '```json\n[{"name": "dummy_tool", "arguments": {"arg": "x"}}]\n```'
+        mock_llm.return_value.invoke.side_effect = [
+            AIMessage(content=call),
+            AIMessage(content=call),
+            AIMessage(content="Done."),
+        ]
+        prompt = compile_agent_prompt("Prompt", [dummy_tool])
+        history = [HumanMessage(content="go")]
+
+        run_react_agent("Tester", "ignored", [], history, prompt=prompt)
+
+        requests = [c.args[0] for c in mock_llm.return_value.invoke.call_args_list]
+        assert all(r[0] is prompt.system_message for r in requests)
+        assert "- dummy_tool:" in prompt.system_message.content
+        for previous, current in zip(requests, requests[1:]):
+            assert current[: len(previous)] == previous
+            assert current[len(previous)].content == call
+
+
+# =============================================================================
+# 3. Tool Executor Tests
+# =============================================================================
+class TestToolExecutor:
+    """core.tool_executor 모듈 테스트"""
+
+    @staticmethod
+    def _slow_tools(events):
+        @tool("file_write")
+        def slow_write(file_path: str, content: str) -> str:
+            """느린 쓰기 도구"""
+            time.sleep(0.2)
+            events.append(("write", file_path))
+            return "written"
+
+        @tool("file_read")
+        def slow_read(file_path: str) -> str:
+            """느린 읽기 도구"""
+            time.sleep(0.2)
+            events.append(("read", file_path))
+            return f"read {file_path}"
+
+        return {"file_write": slow_write, "file_read": slow_read}
+
+    def test_edge_03_code_run_waits_for_file_calls(self, mock_ollama_config):
+        """[EDGE-03] 코드 실행은 워크스페이스 전체를 다루므로 앞뒤 파일 호출과 직렬화"""
+        events = []
+        tools_map = self._slow_tools(events)
+
+        @tool("run_python_secure")
+        def fake_run(code: str) -> str:
+            """코드 실행 도구"""
+            events.append(("run", code))
+            return "ran"
+
+        tools_map["run_python_secure"] = fake_run
+        calls = [
+            {"name": "file_write", "arguments": {"file_path": "app.py", "content": ""}},
+            {"name": "run_python_secure", "arguments": {"code": "import app"}},
+            {"name": "file_read", "arguments": {"file_path": "out.txt"}},
+        ]
+
+        execute_tools_internal(calls, tools_map, max_workers=3)
+        assert events == [
+            ("write", "app.py"),
+            ("run", "import app"),
+            ("read", "out.txt"),
+        ]
+
+    def test_hp_01_parallel_preserves_order(self, mock_ollama_config):
+        """[HP-01] 독립적인 호출은 병렬 실행되고 결과는 원래 순서를 유지"""
+        tools_map = self._slow_tools([])
+        calls = [
+            {"name": "file_read", "arguments": {"file_path": f"{i}.py"}}
+            for i in range(3)
+        ]
+
+        start = time.monotonic()
+        output = execute_tools_internal(calls, tools_map, max_workers=3)
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.5
+        assert output.splitlines() == [
+            f"Tool 'file_read' Output: read {i}.py" for i in range(3)
+        ]
+
+    def test_edge_01_same_path_serialized(self, mock_ollama_config):
+        """[EDGE-01] 같은 경로에 대한 쓰기 -> 읽기는 순서대로 직렬 실행"""
+        events = []
+        tools_map = self._slow_tools(events)
+        calls = [
+            {"name": "file_write", "arguments": {"file_path": "a.py", "content": ""}},
+            {"name": "file_read", "arguments": {"file_path": "workspace/a.py"}},
+            {"name": "file_read", "arguments": {"file_path": "b.py"}},
+        ]
+
+        execute_tools_internal(calls, tools_map, max_workers=3)
+
+        assert events.index(("write", "a.py")) < events.index(
+            ("read", "workspace/a.py")
+        )
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_edge_02_timeout(self, mock_ollama_config, workers):
+        """[EDGE-02] 시간 초과 호출은 에러 관찰로 대체되고 의존 호출은 건너뜀 (순차 실행 포함)"""
+        tools_map = self._slow_tools([])
+        calls = [
+            {"name": "file_write", "arguments": {"file_path": "a.py", "content": ""}},
+            {"name": "file_read", "arguments": {"file_path": "a.py"}},
+        ]
+
+        output = execute_tools_internal(
+            calls, tools_map, max_workers=workers, timeout=0.05
+        )
+        lines = output.splitlines()
+
+        assert "Timed out" in lines[0]
+        assert "Skipped" in lines[1]
+
+    async def test_edge_04_async_timeout(self, mock_ollama_config):
+        """[EDGE-04] 비동기 실행도 같은 시간 초과 / 건너뛰기 규칙 적용"""
+        tools_map = self._slow_tools([])
+        calls = [
+            {"name": "file_write", "arguments": {"file_path": "a.py", "content": ""}},
+            {"name": "file_read", "arguments": {"file_path": "a.py"}},
+            {"name": "file_read", "arguments": {"file_path": "b.py"}},
+        ]
+
+        output = await aexecute_tools_internal(
+            calls, tools_map, max_workers=2, timeout=0.05
+        )
+        lines = output.splitlines()
+
+        assert "Timed out" in lines[0]
+        assert "Skipped" in lines[1]
+        assert "Timed out" in lines[2]
+
+    async def test_hp_02_async_parallel(self, mock_ollama_config):
+        """[HP-02] 비동기 실행도 병렬 처리 및 순서 보장"""
+        tools_map = self._slow_tools([])
+        calls = [
+            {"name": "file_read", "arguments": {"file_path": f"{i}.py"}}
+            for i in range(3)
+        ]
+
+        start = time.monotonic()
+        output = await aexecute_tools_internal(calls, tools_map, max_workers=3)
+
+        assert time.monotonic() - start < 0.5
+        assert output.splitlines()[2] == "Tool 'file_read' Output: read 2.py"
+
+
+# =============================================================================
+# 4. LLM Factory Tests
+# =============================================================================
+class TestLLMFactory:
+    """core.llm_factory 모듈 테스트"""
+
+    @pytest.fixture(autouse=True)
+    def clean_registry(self):
+        close_all_llms()
+        yield
+        close_all_llms()
+
+    def test_hp_01_reuses_client(self):
+        """[HP-01] 동일 설정이면 같은 클라이언트 인스턴스를 재사용"""
+        first = get_llm()
+        second = get_llm()
+
+        assert first is second
+        assert pooled_client_count() == 1
+
+    def test_hp_02_distinct_options(self):
+        """[HP-02] 모델/옵션이 다르면 별도 클라이언트 생성"""
+        base = get_llm()
+        other = get_llm(num_predict=8)
+
+        assert base is not other
+        assert get_llm(num_predict=8) is other
+
+    def test_edge_01_timeout_applied(self):
+        """[EDGE-01] OllamaConfig.TIMEOUT_SECONDS가 HTTP 클라이언트에 적용"""
+        llm = get_llm()
+
+        assert llm._client._client.timeout.read == OllamaConfig.TIMEOUT_SECONDS
+
+    def test_edge_02_registry_bounded(self, monkeypatch):
+        """[EDGE-02] 레지스트리 크기 제한 (LRU 제거)"""
+        monkeypatch.setattr(OllamaConfig, "CLIENT_REGISTRY_SIZE", 2)
+        for i in range(4):
+            get_llm(num_predict=i + 1)
+
+        assert pooled_client_count() == 2
+
+    def test_hp_03_cache_wrapper(self, mock_ollama_config):
+        """[HP-03] cache=True 이면 풀링된 클라이언트를 캐시 래퍼로 감쌈"""
+        cached = get_llm(cache=True)
+
+        assert isinstance(cached, CachedChatModel)
+        assert cached.llm is get_llm(cache=False)
+
+    def test_hp_04_keep_alive_per_model(self, monkeypatch):
+        """[HP-04] 모델별 keep_alive 적용 (정수는 초 단위 int 로 변환)"""
+        monkeypatch.setattr(OllamaConfig, "KEEP_ALIVE", "30m")
+        monkeypatch.setattr(
+            OllamaConfig, "KEEP_ALIVE_MODELS", "big:14b=8h, small:3b=-1"
+        )
+
+        assert keep_alive_for("big:14b") == "8h"
+        assert keep_alive_for("small:3b") == -1
+        assert keep_alive_for("other") == "30m"
+        assert get_llm("big:14b").keep_alive == "8h"
+
+    def test_hp_05_parallel_warmup(self, monkeypatch):
+        """[HP-05] 모델별 워밍업을 병렬로 실행, 실패는 None 으로 보고"""
+        monkeypatch.setattr(OllamaConfig, "WARMUP_ENABLED", True)
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_get_llm(model, **options):
+            assert options["cache"] is False and options["num_predict"] == 1
+            barrier.wait()  # 두 모델이 동시에 로드 중이어야 통과
+            if model == "broken":
+                raise RuntimeError("model not found")
+            return RunnableLambda(lambda messages: AIMessage(content="."))
+
+        with patch("core.warmup.get_llm", side_effect=fake_get_llm):
+            results = wait_for_warmup(start_warmup(["big:14b", "broken"]), timeout=5)
+
+        assert results["big:14b"] is not None and results["broken"] is None
+        assert describe_warmup(results).endswith("broken failed")
+        monkeypatch.setattr(OllamaConfig, "WARMUP_ENABLED", False)
+        assert start_warmup(["big:14b"]) == {}
+
+    def test_edge_03_open_graph_does_not_wait_for_warmup(
+        self, monkeypatch, temp_workspace
+    ):
+        """[EDGE-03] 워밍업이 끝나기 전에 그래프 반환, 완료는 콜백으로 보고"""
+        monkeypatch.setattr(OllamaConfig, "WARMUP_ENABLED", True)
+        release, reported = threading.Event(), threading.Event()
+
+        def slow_get_llm(model, **options):
+            assert release.wait(5)
+            return RunnableLambda(lambda messages: AIMessage(content="."))
+
+        def watch(futures, callback):
+            on_warmup_done(futures, lambda loaded: (callback(loaded), reported.set()))
+
+        monkeypatch.setattr("coding_agent.on_warmup_done", watch)
+        reset_metrics()
+        with patch("core.warmup.get_llm", side_effect=slow_get_llm):
+            db_path = os.path.join(temp_workspace, "graph.sqlite")
+            with open_graph(db_path, models=["big:14b"]) as graph:
+                assert graph is not None and not reported.is_set()
+                release.set()
+                assert reported.wait(5)
+
+        assert REGISTRY.snapshot()["startup_warm_seconds"][0]["value"] > 0
+
+    def test_hp_06_role_models_share_pooled_clients(self, monkeypatch):
+        """[HP-06] 역할별 모델 / 옵션, 같은 설정의 역할은 클라이언트 공유"""
+        monkeypatch.setattr(
+            OllamaConfig,
+            "ROLE_MODELS",
+            {"Supervisor": "small:3b", "Coder": "big:14b", "Reviewer": "big:14b"},
+        )
+        monkeypatch.setattr(
+            OllamaConfig,
+            "ROLE_OPTIONS",
+            {"Supervisor": {"num_predict": 8, "num_ctx": 2048, "stop": ["\n"]}},
+        )
+
+        def role_llm(role):
+            model, options = role_settings(role)
+            return get_llm(model, **options)
+
+        supervisor = role_llm("Supervisor")
+        assert (supervisor.model, supervisor.num_ctx, supervisor.stop) == (
+            "small:3b",
+            2048,
+            ["\n"],
+        )
+        assert role_llm("Coder").model == "big:14b"
+        assert role_llm("Coder") is role_llm("Reviewer")
+        assert role_settings("Unknown") == (OllamaConfig.DEFAULT_MODEL, {})
+        assert models_in_use() == ["small:3b", "big:14b", OllamaConfig.DEFAULT_MODEL]
+
+
+# =============================================================================
+# 5. LLM Response Cache Tests
+# =============================================================================
+class TestLLMCache:
+    """core.llm_cache 모듈 테스트"""
+
+    @pytest.fixture
+    def cached_llm(self, temp_workspace):
+        calls = []
+
+        def respond(messages):
+            calls.append(messages)
+            return AIMessage(content=f"answer {len(calls)}")
+
+        cache = LLMResponseCache(
+            os.path.join(temp_workspace, "llm_cache.sqlite"), max_entries=2
+        )
+        llm = CachedChatModel(RunnableLambda(respond), cache, "model", {})
+        yield llm, calls
+        cache.close()
+
+    def test_hp_01_hit_after_miss(self, cached_llm):
+        """[HP-01] 동일 메시지 재호출 시 캐시 응답 반환"""
+        llm, calls = cached_llm
+        messages = [HumanMessage(content="hello")]
+
+        first = llm.invoke(messages)
+        second = llm.invoke(messages)
+
+        assert first.content == second.content == "answer 1"
+        assert second.response_metadata["cache_hit"] is True
+        assert len(calls) == 1
+        assert llm.cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_edge_01_bypass(self, cached_llm):
+        """[EDGE-01] bypass 설정 시 항상 실제 모델 호출"""
+        llm, calls = cached_llm
+        llm.bypass = True
+        messages = [HumanMessage(content="hello")]
+
+        llm.invoke(messages)
+        llm.invoke(messages)
+
+        assert len(calls) == 2
+
+    def test_edge_02_lru_eviction(self, cached_llm):
+        """[EDGE-02] max_entries 초과 시 가장 오래 사용되지 않은 항목 제거"""
+        llm, calls = cached_llm
+        for text in ["a", "b", "a", "c"]:
+            llm.invoke([HumanMessage(content=text)])
+
+        assert llm.cache.stats()["entries"] == 2
+        llm.invoke([HumanMessage(content="a")])  # 유지됨 (최근 사용)
+        llm.invoke([HumanMessage(content="b")])  # 제거됨 -> 재호출
+        assert len(calls) == 4
+
+    def test_edge_03_partial_stream_not_used_by_invoke(self, cached_llm):
+        """[EDGE-03] 도구 호출 블록 없이 조기 종료된 스트림은 저장하지 않음"""
+        llm, calls = cached_llm
+        messages = [HumanMessage(content="stream me")]
+
+        stream = llm.stream(messages)
+        next(stream)
+        stream.close()
+
+        assert llm.cache.stats()["entries"] == 0
+        assert list(llm.stream(messages))[0].content == "answer 2"
+
+    def test_edge_04_tool_call_partial_used_only_by_stream(self, temp_workspace):
+        """[EDGE-04] 도구 호출 직후 중단된 스트림은 부분 저장, 스트림 재생에만 사용"""
+        tool_call = '```json\n{"name": "t"}\n```'
+        replies = iter([tool_call + "\nmore", "full answer"])
+        cache = LLMResponseCache(
+            os.path.join(temp_workspace, "partial.sqlite"), max_entries=10
+        )
+        llm = CachedChatModel(
+            RunnableLambda(lambda _: AIMessage(content=next(replies))),
+            cache,
+            "model",
+            {},
+        )
+        messages = [HumanMessage(content="tool")]
+        try:
+            stream = llm.stream(messages)
+            next(stream)
+            stream.close()
+
+            assert list(llm.stream(messages))[0].content.startswith(tool_call)
+            assert llm.invoke(messages).content == "full answer"
+        finally:
+            cache.close()
+
+
+# =============================================================================
+# 6. Supervisor Routing Rule Tests
+# =============================================================================
+class TestRoutingRules:
+    """core.routing 모듈 테스트"""
+
+    def test_hp_01_deterministic_transitions(self):
+        """[HP-01] 시그널이 있는 전이는 규칙으로 결정"""
+        assert route_by_rules([HumanMessage(content="Build an app")]) == "Planner"
+        assert (
+            route_by_rules([HumanMessage(content="...\nPLAN_CREATED", name="Planner")])
+            == "Coder"
+        )
+        assert (
+            route_by_rules(
+                [
+                    HumanMessage(
+                        content="Coding complete, requesting review.", name="Coder"
+                    )
+                ]
+            )
+            == "Reviewer"
+        )
+        assert (
+            route_by_rules([HumanMessage(content="✅ **Approved**", name="Reviewer")])
+            == "FINISH"
+        )
+
+    def test_edge_01_ambiguous_falls_back(self):
+        """[EDGE-01] 모호한 경우 None (LLM 판단)"""
+        assert route_by_rules([]) is None
+        assert (
+            route_by_rules([HumanMessage(content="Not approved.", name="Reviewer")])
+            is None
+        )
+        assert (
+            route_by_rules([HumanMessage(content="Wrote a file.", name="Coder")])
+            is None
+        )
+        assert route_by_rules([AIMessage(content="Coder", name="Supervisor")]) is None
+
+    def test_edge_03_conditional_approval_not_finished(self):
+        """[EDGE-03] 조건부 승인은 규칙으로 FINISH 하지 않음"""
+
+        def review(content):
+            return route_by_rules([HumanMessage(content=content, name="Reviewer")])
+
+        assert review("Approved once the following issues are fixed:\n- x") is None
+        assert review("Approved, but fix the typo first.") is None
+        assert review("✅ **Approved**\n\nHowever, tests must be added.") is None
+        assert review("Looks good.\n\nApproved.") == "FINISH"
+
+    def test_hp_02_supervisor_prompt_ends_with_history(self):
+        """[HP-02] Supervisor 지시문은 선두 system 메시지에만, 히스토리가 마지막"""
+        sent = []
+        llm = RunnableLambda(
+            lambda messages: sent.append(messages) or AIMessage(content="Reviewer")
+        )
+        history = [
+            HumanMessage(content="Build an app"),
+            HumanMessage(content="Wrote a file.", name="Coder"),
+        ]
+        with patch("coding_agent.get_llm", return_value=llm):
+            update = supervisor_node(
+                {"messages": history}, prompt=_build_supervisor_prompt()
+            )
+
+        assert update["next"] == "Reviewer"
+        assert isinstance(sent[0][0], SystemMessage)
+        assert "'FINISH', 'Planner', 'Coder', 'Reviewer'" in sent[0][0].content
+        assert sent[0][1:] == history
+
+    def test_edge_02_invalid_decision_uses_fallback_model(self, monkeypatch):
+        """[EDGE-02] 작은 모델의 결정이 유효하지 않으면 fallback 모델로 다시 결정"""
+        monkeypatch.setitem(OllamaConfig.ROLE_MODELS, "Supervisor", "small:3b")
+        monkeypatch.setattr(OllamaConfig, "SUPERVISOR_FALLBACK_MODEL", "big:14b")
+        replies = {"small:3b": "Hmm, let me think", "big:14b": "Coder"}
+        asked = []
+
+        def fake_get_llm(model, **options):
+            asked.append(model)
+            return RunnableLambda(lambda messages: AIMessage(content=replies[model]))
+
+        state = {"messages": [HumanMessage(content="Wrote a file.", name="Coder")]}
+        reset_metrics()
+        with patch("coding_agent.get_llm", side_effect=fake_get_llm):
+            update = supervisor_node(state)
+            assert asked == ["small:3b", "big:14b"]
+            assert update["next"] == "Coder"
+
+            # fallback 모델이 같으면 다시 묻지 않고 FINISH
+            monkeypatch.setattr(OllamaConfig, "SUPERVISOR_FALLBACK_MODEL", "small:3b")
+            assert supervisor_node(state)["next"] == "FINISH"
+            assert asked == ["small:3b", "big:14b", "small:3b"]
+
+        decisions = REGISTRY.snapshot()["supervisor_decisions_total"]
+        assert {"next": "Coder", "source": "fallback"} in [
+            d["labels"] for d in decisions
+        ]
+        reset_metrics()
+
+    async def test_edge_04_async_invalid_decision_uses_fallback_model(
+        self, monkeypatch
+    ):
+        """[EDGE-04] 비동기 Supervisor 도 같은 fallback 절차로 다시 결정"""
+        monkeypatch.setitem(OllamaConfig.ROLE_MODELS, "Supervisor", "small:3b")
+        monkeypatch.setattr(OllamaConfig, "SUPERVISOR_FALLBACK_MODEL", "big:14b")
+        replies = {"small:3b": "Coder", "big:14b": "Reviewer"}
+        asked = []
+
+        def fake_get_llm(model, **options):
+            asked.append(model)
+            return RunnableLambda(lambda messages: AIMessage(content=replies[model]))
+
+        state = {"messages": [HumanMessage(content="Wrote a file.", name="Coder")]}
+        with patch("coding_agent.get_llm", side_effect=fake_get_llm):
+            assert (await asupervisor_node(state))["next"] == "Coder"
+            replies["small:3b"] = "Hmm"
+            assert (await asupervisor_node(state))["next"] == "Reviewer"
+
+        assert asked == ["small:3b", "small:3b", "big:14b"]
+
+
+# =============================================================================
+# 7. Context Manager Tests
+# =============================================================================
+class TestContextManager:
+    """core.context_manager 모듈 테스트"""
+
+    @staticmethod
+    def _loop_messages(observation_size):
+        messages = [
+            SystemMessage(content="system prompt"),
+            HumanMessage(content="original task"),
+        ]
+        for i in range(6):
+            messages.append(AIMessage(content=f"call {i}"))
+            messages.append(
+                SystemMessage(content="TOOL OBSERVATION:\n" + "x" * observation_size)
+            )
+        return messages
+
+    def test_hp_01_under_budget_unchanged(self):
+        """[HP-01] 예산 이내면 그대로 반환"""
+        messages = self._loop_messages(10)
+        fitted, saved = fit_to_budget(messages, budget=10_000)
+
+        assert fitted == messages
+        assert saved == 0
+
+    def test_hp_02_truncates_old_observations(self):
+        """[HP-02] 오래된 도구 관찰만 축약하고 최근 메시지는 유지"""
+        messages = self._loop_messages(4000)
+        budget = count_tokens(messages) - 1000
+        fitted, saved = fit_to_budget(messages, budget=budget, keep_recent=4)
+
+        assert count_tokens(fitted) <= budget
+        assert saved > 0
+        assert fitted[0].content == "system prompt"
+        assert fitted[1].content == "original task"
+        assert fitted[-4:] == messages[-4:]
+        assert "[truncated" in fitted[3].content
+
+    def test_edge_02_truncated_file_read_loses_version(self, mock_ollama_config):
+        """[EDGE-02] 축약된 file_read 관찰의 version 으로는 "변경 없음" 응답을 받지 않음"""
+        file_write.invoke({"file_path": "big.py", "content": "x = 1\n" * 2000})
+        observation = "TOOL OBSERVATION:\n" + file_read.invoke({"file_path": "big.py"})
+        messages = self._loop_messages(10)
+        messages[3] = SystemMessage(content=observation)
+        fitted, _ = fit_to_budget(messages, budget=count_tokens(messages) - 100)
+
+        assert "[truncated" in fitted[3].content
+        assert "version: truncated" in fitted[3].content
+        version = fitted[3].content.split("version: ")[1].split(",")[0]
+        reread = file_read.invoke({"file_path": "big.py", "known_version": version})
+        assert "Unchanged since your last read" not in reread
+        assert "x = 1" in reread
+
+    def test_edge_01_guarantees_budget(self):
+        """[EDGE-01] 최근 메시지까지 커도 예산을 보장"""
+        messages = self._loop_messages(20_000)
+        fitted, _ = fit_to_budget(messages, budget=500, keep_recent=4)
+
+        assert count_tokens(fitted) <= 500
+        assert fitted[0].content == "system prompt"
+
+
+# =============================================================================
+# 8. Search Layer Tests
+# =============================================================================
+class _SlowBackend(SearchBackend):
+    name = "slow"
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query: str) -> str:
+        self.calls += 1
+        time.sleep(0.2)
+        return f"result for {query}"
+
+
+class TestSearchService:
+    """core.search 모듈 테스트"""
+
+    def test_hp_01_persistent_ttl_cache(self, tmp_path):
+        """[HP-01] 정규화된 검색어로 캐시, 새 인스턴스(세션)에서도 유지"""
+        backend = _SlowBackend()
+        db_path = str(tmp_path / "search.sqlite")
+        service = SearchService(backend, db_path, ttl_seconds=60)
+        service.search("LangGraph  StateGraph")
+        service.close()
+
+        reopened = SearchService(backend, db_path, ttl_seconds=60)
+        assert reopened.search("langgraph stategraph") == (
+            "result for LangGraph  StateGraph"
+        )
+        assert backend.calls == 1
+        assert reopened.stats["hits"] == 1
+
+        expired = SearchService(backend, db_path, ttl_seconds=0)
+        expired.search("langgraph stategraph")
+        assert backend.calls == 2
+
+    def test_hp_02_coalesce_concurrent_queries(self, tmp_path):
+        """[HP-02] 동시에 들어온 같은 검색어는 백엔드 1회 호출"""
+        backend = _SlowBackend()
+        service = SearchService(backend, str(tmp_path / "s.sqlite"), ttl_seconds=60)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(service.search, ["q"] * 4))
+
+        assert results == ["result for q"] * 4
+        assert backend.calls == 1
+        assert service.stats["coalesced"] == 3
+
+    def test_hp_03_local_docs_backend(self, tmp_path):
+        """[HP-03] 로컬 문서 백엔드: 검색어 토큰이 많은 문서가 먼저"""
+        (tmp_path / "a.md").write_text("checkpoint saver sqlite checkpoint")
+        (tmp_path / "b.md").write_text("sqlite tuning guide")
+        (tmp_path / "c.txt").write_text("unrelated")
+
+        result = LocalDocsBackend(str(tmp_path)).search("SQLite checkpoint")
+        assert result.splitlines()[0].startswith("[a.md]")
+        assert "[b.md]" in result and "c.txt" not in result
+
+    def test_edge_01_backend_contract(self):
+        """[EDGE-01] search 미구현 백엔드는 생성 불가"""
+
+        class Incomplete(SearchBackend):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_edge_02_shared_service_across_workspaces(
+        self, tmp_path, monkeypatch, mock_ollama_config
+    ):
+        """[EDGE-02] 워크스페이스가 달라도 서비스 / 캐시는 공유, 로컬 색인만 워크스페이스별"""
+        monkeypatch.setattr("config.ToolConfig.SEARCH_BACKEND", "local")
+        monkeypatch.setattr("config.ToolConfig.SEARCH_LOCAL_DIR", "")
+        reset_metrics()
+        for name in ("a", "b"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / f"{name}.md").write_text("sqlite checkpoint tuning")
+
+        try:
+            with use_workspace(str(tmp_path / "a")):
+                service = get_search_service()
+                assert service.search("checkpoint").startswith("[a.md]")
+            with use_workspace(str(tmp_path / "b")):
+                assert get_search_service() is service
+                assert service.search("checkpoint").startswith("[b.md]")
+                assert service.search("Checkpoint").startswith("[b.md]")
+        finally:
+            close_search_services()
+
+        cache_db = os.path.join(mock_ollama_config.WORKSPACE_DIR, "search_cache.sqlite")
+        assert os.path.exists(cache_db)
+        assert {
+            sample["labels"]["result"]: sample["value"]
+            for sample in REGISTRY.snapshot()["search_requests_total"]
+        } == {"misses": 2, "hits": 1}
+        reset_metrics()
+
+    def test_edge_03_expired_entries_purged_on_open(self, tmp_path):
+        """[EDGE-03] 서비스를 열 때 TTL 이 지난 캐시 항목 삭제"""
+        db_path = str(tmp_path / "search.sqlite")
+        SearchService(_SlowBackend(), db_path, ttl_seconds=60).close()
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "INSERT INTO search_cache VALUES ('old', 'q', 'r', ?)",
+            (time.time() - 120,),
+        )
+        conn.commit()
+        conn.close()
+        service = SearchService(_SlowBackend(), db_path, ttl_seconds=60)
+        count = service._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+        service.close()
+        assert count == (0,)
+
+
+# =============================================================================
+# 9. Checkpoint Store Tests
+# =============================================================================
+class _CounterState(TypedDict):
+    count: int
+
+
+def _counter_graph():
+    workflow = StateGraph(_CounterState)
+    workflow.add_node("step", lambda state: {"count": state["count"] + 1})
+    workflow.add_edge(START, "step")
+    workflow.add_edge("step", END)
+    return workflow
+
+
+class TestCheckpointStore:
+    """core.checkpoint 모듈 테스트"""
+
+    def test_hp_01_tuned_pragmas_and_persistence(self, tmp_path):
+        """[HP-01] WAL/NORMAL PRAGMA 적용, 일괄 커밋된 상태가 다른 연결에서 보임"""
+        db_path = str(tmp_path / "memory.sqlite")
+        config = {"configurable": {"thread_id": "t1"}}
+        with open_checkpointer(db_path) as saver:
+            assert isinstance(saver, BatchedSqliteSaver)
+            assert saver.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert saver.conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+            _counter_graph().compile(checkpointer=saver).invoke({"count": 0}, config)
+
+        with SqliteSaver.from_conn_string(db_path) as plain:
+            state = _counter_graph().compile(checkpointer=plain).get_state(config)
+        assert state.values == {"count": 1}
+
+    def test_hp_02_writes_committed_with_checkpoint(self, tmp_path):
+        """[HP-02] put_writes 는 보류되었다가 다음 put 에서 함께 커밋"""
+        db_path = str(tmp_path / "memory.sqlite")
+        with open_checkpointer(db_path) as saver:
+            graph = _counter_graph().compile(checkpointer=saver)
+            graph.invoke({"count": 0}, {"configurable": {"thread_id": "t1"}})
+            saved = saver.get_tuple({"configurable": {"thread_id": "t1"}})
+
+            saver.put_writes(saved.config, [("count", 5)], task_id="task-1")
+            assert saver.conn.in_transaction
+            saver.flush()
+            assert not saver.conn.in_transaction
+
+    def test_edge_03_failed_node_releases_write_lock(self, tmp_path):
+        """[EDGE-03] 노드 예외로 put 이 오지 않아도 보류된 쓰기가 커밋되어 잠금 해제"""
+        db_path = str(tmp_path / "memory.sqlite")
+        workflow = StateGraph(_CounterState)
+
+        def slow_ok(state):
+            time.sleep(0.2)  # 실패한 노드의 __error__ 쓰기보다 늦게 기록됨
+            return {"count": 1}
+
+        workflow.add_node("ok", slow_ok)
+
+        def boom(state):
+            raise RuntimeError("node failed")
+
+        workflow.add_node("boom", boom)
+        workflow.add_edge(START, "ok")
+        workflow.add_edge(START, "boom")
+        workflow.add_edge("ok", END)
+        workflow.add_edge("boom", END)
+
+        with open_checkpointer(db_path) as saver:
+            graph = workflow.compile(checkpointer=saver)
+            with pytest.raises(RuntimeError):
+                graph.invoke({"count": 0}, {"configurable": {"thread_id": "t1"}})
+            assert not saver.conn.in_transaction
+
+            other = sqlite3.connect(db_path, timeout=0.1)
+            try:
+                other.execute("BEGIN IMMEDIATE")  # 쓰기 잠금 획득 가능해야 함
+                other.rollback()
+            finally:
+                other.close()
+
+    async def test_hp_03_async_checkpointer(self, tmp_path):
+        """[HP-03] 비동기 그래프 경로용 체크포인터"""
+        db_path = str(tmp_path / "memory.sqlite")
+        config = {"configurable": {"thread_id": "t1"}}
+        async with open_async_checkpointer(db_path) as saver:
+            graph = _counter_graph().compile(checkpointer=saver)
+            assert await graph.ainvoke({"count": 1}, config) == {"count": 2}
+            assert (await graph.aget_state(config)).values == {"count": 2}
+
+    def test_hp_04_retention_keep_last(self, tmp_path):
+        """[HP-04] 스레드별 최근 N개만 유지, 고아 writes 삭제, 빈 페이지 반환"""
+        db_path = str(tmp_path / "memory.sqlite")
+        with open_checkpointer(db_path) as saver:
+            graph = _counter_graph().compile(checkpointer=saver)
+            for thread in ("a", "b"):
+                config = {"configurable": {"thread_id": thread}}
+                for _ in range(5):
+                    graph.invoke({"count": 0}, config)
+
+        report = prune_checkpoints(db_path, keep_last=2)
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            "SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id"
+        ).fetchall()
+        orphans = conn.execute(
+            "SELECT COUNT(*) FROM writes w WHERE NOT EXISTS (SELECT 1 FROM "
+            "checkpoints c WHERE c.thread_id = w.thread_id "
+            "AND c.checkpoint_id = w.checkpoint_id)"
+        ).fetchone()[0]
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.close()
+
+        assert rows == [("a", 2), ("b", 2)]
+        assert orphans == 0
+        assert report.deleted_checkpoints == 26 and report.deleted_writes > 0
+
+    def test_edge_01_retention_cutoff(self, tmp_path):
+        """[EDGE-01] 기준 시각 이후 체크포인트는 keep_last 와 무관하게 유지"""
+        db_path = str(tmp_path / "memory.sqlite")
+        with open_checkpointer(db_path) as saver:
+            graph = _counter_graph().compile(checkpointer=saver)
+            graph.invoke({"count": 0}, {"configurable": {"thread_id": "a"}})
+
+        now = time.time()
+        assert checkpoint_id_at(now - 60) < checkpoint_id_at(now)
+        assert abs(checkpoint_time(checkpoint_id_at(now)) - now) < 1e-3
+        report = prune_checkpoints(db_path, keep_last=1, older_than_seconds=3600)
+        assert report.deleted_checkpoints == 0
+        report = prune_checkpoints(db_path, older_than_seconds=-60)
+        assert report.deleted_checkpoints == 2  # 최신 체크포인트는 유지
+
+    def test_edge_04_retention_keeps_latest_of_idle_threads(self, tmp_path):
+        """[EDGE-04] 기준 시각만 지정해도 유휴 스레드의 최신 상태는 남아 재개 가능"""
+        db_path = str(tmp_path / "memory.sqlite")
+        config = {"configurable": {"thread_id": "idle"}}
+        with open_checkpointer(db_path) as saver:
+            graph = _counter_graph().compile(checkpointer=saver)
+            graph.invoke({"count": 0}, config)
+            graph.invoke({"count": 5}, config)
+
+        prune_checkpoints(db_path, older_than_seconds=-60)
+
+        with open_checkpointer(db_path) as saver:
+            state = _counter_graph().compile(checkpointer=saver).get_state(config)
+        assert state.values == {"count": 6} and not state.next
+
+    def test_hp_05_inspect_writes_keyset_pages(self, tmp_path):
+        """[HP-05] inspect_memory: serde 복원, 노드 필터, 페이지 경계와 무관한 결과"""
+        db_path = str(tmp_path / "memory.sqlite")
+        with open_checkpointer(db_path) as saver:
+            graph = _counter_graph().compile(checkpointer=saver)
+            for thread in ("a", "b"):
+                graph.invoke({"count": 0}, {"configurable": {"thread_id": thread}})
+
+        conn = sqlite3.connect(db_path)
+        flt = WriteFilter(node="step", channel="count")
+        small_pages = list(iter_writes(conn, flt, page_size=1))
+        one_page = list(iter_writes(conn, flt, page_size=100))
+        resumed = list(
+            iter_writes(conn, flt, after=decode_cursor(small_pages[0]["cursor"]))
+        )
+        conn.close()
+
+        assert [r["value"] for r in small_pages] == [1, 1]
+        assert [r["thread_id"] for r in small_pages] == ["a", "b"]
+        assert [r["cursor"] for r in one_page] == [r["cursor"] for r in small_pages]
+        assert [r["thread_id"] for r in resumed] == ["b"]
+
+    def test_edge_02_inspect_query_uses_primary_key_range(self, tmp_path):
+        """[EDGE-02] keyset 조건이 기본 키 인덱스 범위 검색으로 실행됨"""
+        db_path = str(tmp_path / "memory.sqlite")
+        with open_checkpointer(db_path) as saver:
+            _counter_graph().compile(checkpointer=saver).invoke(
+                {"count": 0}, {"configurable": {"thread_id": "a"}}
+            )
+
+        conn = sqlite3.connect(db_path)
+        for flt in (WriteFilter(), WriteFilter(thread_id="a")):
+            sql, params = _build_query(flt, ("a", "", "c", "t", 0), 10)
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            assert ")>(" in plan[0][-1]
+        conn.close()
+
+
+# =============================================================================
+# 10. Metrics Tests
+# =============================================================================
+def _series(name):
+    return {
+        tuple(sorted(sample["labels"].items())): sample
+        for sample in REGISTRY.snapshot().get(name, [])
+    }
+
+
+class TestMetrics:
+    """core.metrics 계측 테스트"""
+
+    @pytest.fixture(autouse=True)
+    def _reset(self):
+        reset_metrics()
+        yield
+        reset_metrics()
+
+    def test_hp_01_react_loop_records_llm_tool_and_iterations(self, mock_llm):
+        """[HP-01] LLM 지연 / 토큰 수, 도구 결과, 노드별 반복 수 기록"""
+        usage = {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+        meta = {"load_duration": 1_000_000, "prompt_eval_duration": 4_000_000}
+        mock_llm.return_value.invoke.side_effect = [
+            AIMessage(
+                content='```json\n[{"name": "dummy_tool", "arguments": {"arg": "x"}}]\n```',
+                usage_metadata=usage,
+                response_metadata=meta,
+            ),
+            AIMessage(content="Done.", usage_metadata=usage),
+        ]
+
+        run_react_agent("Coder", "Prompt", [dummy_tool], [HumanMessage(content="go")])
+
+        role = (("role", "Coder"),)
+        assert _series("llm_duration_seconds")[role]["count"] == 2
+        ttft = _series("llm_ttft_seconds")[role]
+        assert ttft["count"] == 1 and ttft["sum"] == pytest.approx(0.005)
+        assert _series("llm_prompt_tokens_total")[role]["value"] == 240
+        assert _series("llm_completion_tokens_total")[role]["value"] == 60
+        ok = (("status", "ok"), ("tool", "dummy_tool"))
+        assert _series("tool_calls_total")[ok]["value"] == 1
+        assert _series("agent_iterations")[(("node", "Coder"),)]["sum"] == 2
+
+    def test_hp_02_prometheus_and_json_dump(self, tmp_path):
+        """[HP-02] 누적 버킷 / +Inf / _sum / _count 를 포함한 Prometheus 텍스트"""
+        REGISTRY.observe("tool_duration_seconds", 0.03, {"tool": "file_read"})
+        REGISTRY.observe("tool_duration_seconds", 0.2, {"tool": "file_read"})
+        REGISTRY.inc("supervisor_decisions_total", {"source": "rule", "next": "Coder"})
+
+        text = render_prometheus()
+        assert "# TYPE tool_duration_seconds histogram" in text
+        assert 'tool_duration_seconds_bucket{tool="file_read",le="0.01"} 0' in text
+        assert 'tool_duration_seconds_bucket{tool="file_read",le="0.25"} 2' in text
+        assert 'tool_duration_seconds_bucket{tool="file_read",le="+Inf"} 2' in text
+        assert 'tool_duration_seconds_count{tool="file_read"} 2' in text
+        assert 'supervisor_decisions_total{next="Coder",source="rule"} 1' in text
+
+        path = tmp_path / "metrics.json"
+        dump_metrics(str(path))
+        assert '"supervisor_decisions_total"' in path.read_text()
+
+    def test_edge_01_tool_errors_and_streaming_ttft(self, mock_llm):
+        """[EDGE-01] 도구 에러 / 미등록 도구는 error 로 집계, 스트리밍은 첫 청크로 TTFT 측정"""
+        calls = '```json\n[{"name": "dummy_tool", "arguments": {"arg": "x"}}]\n```'
+        mock_llm.return_value.stream.side_effect = [
+            iter([AIMessageChunk(content=calls), AIMessageChunk(content="ignored")]),
+            iter([AIMessageChunk(content="Done.")]),
+        ]
+        with patch.object(dummy_tool, "func", side_effect=RuntimeError("boom")):
+            run_react_agent(
+                "Reviewer",
+                "Prompt",
+                [dummy_tool],
+                [HumanMessage(content="go")],
+                streaming=True,
+            )
+
+        assert execute_tools_internal(
+            [{"name": "ghost", "arguments": {}}], {}, max_workers=1
+        ).startswith("Error: Tool 'ghost' not found")
+        tools = _series("tool_calls_total")
+        assert tools[(("status", "error"), ("tool", "dummy_tool"))]["value"] == 1
+        assert tools[(("status", "error"), ("tool", "ghost"))]["value"] == 1
+        assert _series("llm_ttft_seconds")[(("role", "Reviewer"),)]["count"] == 2
+
+    def test_hp_03_prompt_eval_vs_prompt_size(self, mock_llm):
+        """[HP-03] 호출당 평가 토큰 수 / 프롬프트 크기, 전체 캐시 적중은 0 으로 기록"""
+        mock_llm.return_value.invoke.side_effect = [
+            AIMessage(
+                content='```json\n[{"name": "dummy_tool", "arguments": {"arg": "x"}}]\n```',
+                response_metadata={"prompt_eval_count": 900, "eval_count": 20},
+            ),
+            # prefix 가 모두 캐시에 있으면 prompt_eval_count 가 생략됨
+            AIMessage(content="Done.", response_metadata={"eval_count": 2}),
+        ]
+
+        run_react_agent("Coder", "Prompt", [dummy_tool], [HumanMessage(content="go")])
+
+        role = (("role", "Coder"),)
+        evaluated = _series("llm_prompt_eval_tokens")[role]
+        assert evaluated["count"] == 2 and evaluated["sum"] == 900
+        size = _series("llm_prompt_size_tokens")[role]
+        assert size["count"] == 2 and size["sum"] > 0
+
+
+# =============================================================================
+# 11. Session Manager / Server Tests
+# =============================================================================
+class _ChatState(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+
+
+def _echo_graph(gate: threading.Event):
+    """gate 가 열릴 때까지 기다렸다가 입력을 그대로 돌려주는 그래프"""
+
+    def echo(state: _ChatState):
+        gate.wait(5)
+        text = state["messages"][-1].content
+        return {"messages": [HumanMessage(content=f"echo: {text}", name="Coder")]}
+
+    workflow = StateGraph(_ChatState)
+    workflow.add_node("Coder", echo)
+    workflow.add_edge(START, "Coder")
+    workflow.add_edge("Coder", END)
+    return workflow.compile(checkpointer=MemorySaver())
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestSessionManager:
+    """core.session_manager / server 테스트"""
+
+    def test_hp_01_concurrent_sessions_share_graph(self):
+        """[HP-01] 여러 스레드의 태스크가 동시에 실행되고 이벤트가 순서대로 재생됨"""
+        gate = threading.Event()
+        manager = SessionManager(_echo_graph(gate), max_workers=2, max_queue=0)
+        tasks = [manager.submit(f"t{i}", f"hi {i}") for i in range(2)]
+
+        assert _wait_until(lambda: manager.stats()["running"] == 2)
+        gate.set()
+
+        for i, task in enumerate(tasks):
+            events = list(task.events())
+            assert [e["event"] for e in events] == ["started", "node", "done"]
+            assert events[1]["content"] == f"echo: hi {i}"
+        assert manager.drain(timeout=5)
+        assert manager.get(tasks[0].task_id).status == "done"
+
+    def test_edge_01_admission_control_and_drain(self):
+        """[EDGE-01] 같은 스레드 409, 대기열 초과 429, drain 이후 503"""
+        gate = threading.Event()
+        manager = SessionManager(_echo_graph(gate), max_workers=1, max_queue=1)
+        manager.submit("a", "first")
+        assert _wait_until(lambda: manager.stats()["running"] == 1)
+        with pytest.raises(AdmissionError) as busy:
+            manager.submit("a", "again")
+        manager.submit("b", "queued")
+        with pytest.raises(AdmissionError) as full:
+            manager.submit("c", "overflow")
+        assert (busy.value.status, full.value.status) == (409, 429)
+        assert manager.stats()["queued"] == 1
+
+        gate.set()
+        assert manager.drain(timeout=5)
+        with pytest.raises(AdmissionError) as draining:
+            manager.submit("d", "late")
+        assert draining.value.status == 503
+
+    def test_hp_02_http_api_streams_events(self):
+        """[HP-02] POST /tasks (stream) -> NDJSON 이벤트, /healthz, /metrics"""
+        gate = threading.Event()
+        gate.set()
+        manager = SessionManager(_echo_graph(gate), max_workers=1, max_queue=1)
+        httpd = create_server(manager, "127.0.0.1", 0)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{httpd.server_address[1]}"
+        try:
+            body = json.dumps({"message": "hello", "thread_id": "s1", "stream": True})
+            request = urllib.request.Request(f"{base}/tasks", data=body.encode())
+            with urllib.request.urlopen(request, timeout=5) as response:
+                events = [json.loads(line) for line in response]
+            assert events[-1] == {"event": "done", "error": None}
+            assert events[1]["content"] == "echo: hello"
+
+            with urllib.request.urlopen(f"{base}/healthz", timeout=5) as response:
+                assert json.load(response)["running"] == 0
+            with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+                assert b"server_queue_depth" in response.read()
+            with pytest.raises(urllib.error.HTTPError) as bad:
+                urllib.request.urlopen(
+                    urllib.request.Request(f"{base}/tasks", data=b"{}"), timeout=5
+                )
+            assert bad.value.code == 400
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            manager.drain(timeout=5)
+
+
+# =============================================================================
+# 12. Batch Runner Tests
+# =============================================================================
+def _workspace_graph(calls: list, checkpointer):
+    """현재 워크스페이스에 파일을 쓰고 그 경로를 응답하는 그래프"""
+
+    def write(state: _ChatState):
+        calls.append(state["messages"][-1].content)
+        file_write.invoke({"file_path": "out.txt", "content": "ok"})
+        return {
+            "messages": [HumanMessage(content=get_safe_path("out.txt"), name="Coder")]
+        }
+
+    workflow = StateGraph(_ChatState)
+    workflow.add_node("Coder", write)
+    workflow.add_edge(START, "Coder")
+    workflow.add_edge("Coder", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+class TestBatchRunner:
+    """batch_runner 테스트"""
+
+    def test_hp_01_isolated_workspaces_and_resume(self, tmp_path, mock_ollama_config):
+        """[HP-01] 태스크별 워크스페이스 / 결과 기록, 재실행 시 완료된 태스크 건너뜀"""
+        tasks_path = tmp_path / "tasks.jsonl"
+        tasks_path.write_text(
+            '{"request_id": "a", "title": "A", "body": "do a"}\n'
+            "\n"
+            "not json\n"
+            '{"id": "b/1", "message": "do b"}\n'
+        )
+        output = str(tmp_path / "results.jsonl")
+        calls: list = []
+        graph = _workspace_graph(calls, MemorySaver())
+        runner = BatchRunner(graph, output, str(tmp_path / "ws"), concurrency=2)
+
+        summary = runner.run(read_tasks(str(tasks_path)))
+        assert summary == {"done": 2}
+        assert sorted(calls) == ["A\n\ndo a", "do b"]
+        records = {r["task_id"]: r for r in map(json.loads, open(output))}
+        for task_id, folder in (("a", "a"), ("b/1", "b_1")):
+            workspace = str(tmp_path / "ws" / folder)
+            assert records[task_id]["workspace"] == workspace
+            assert records[task_id]["final_message"]["content"] == os.path.join(
+                workspace, "out.txt"
+            )
+            assert records[task_id]["nodes"] == ["Coder"]
+
+        # 재실행: 체크포인트에서 완료된 태스크는 실행하지 않고 결과도 중복 기록하지 않음
+        summary = runner.run(read_tasks(str(tasks_path)))
+        assert summary == {"skipped": 2}
+        assert len(calls) == 2
+        assert len(open(output).readlines()) == 2
+
+    def test_edge_01_completed_checkpoint_without_output(self, tmp_path):
+        """[EDGE-01] 출력 기록 전에 중단된 경우 체크포인트로 결과만 기록"""
+        calls: list = []
+        graph = _workspace_graph(calls, MemorySaver())
+        output = str(tmp_path / "results.jsonl")
+        runner = BatchRunner(graph, output, str(tmp_path / "ws"))
+        task = BatchTask("a", "do a")
+        runner.run_task(task)
+
+        assert runner.run([task]) == {"done": 1}
+        (record,) = map(json.loads, open(output))
+        assert record["from_checkpoint"] is True
+        assert len(calls) == 1
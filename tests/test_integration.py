@@ -1,3 +1,4 @@
+import os
 from unittest.mock import patch
 
 from langchain_core.messages import AIMessage, HumanMessage
@@ -5,7 +6,8 @@ from langchain_core.runnables import RunnableLambda
 from langgraph.checkpoint.memory import MemorySaver
 
 # Import system components
-from coding_agent import create_graph
+from coding_agent import aopen_graph, create_graph
+from core.metrics import REGISTRY, reset_metrics
 
 
 class FakeResponder:
@@ -23,6 +25,30 @@ class FakeResponder:
         return self.responses[-1]
 
 
+def _scripted_responses():
+    """Plan -> Code -> Review 시나리오별 LLM 응답 정의"""
+    responses = [
+        # 1. Supervisor (User input -> Planner): 규칙으로 처리 (LLM 호출 없음)
+        # 2. Planner (Thinking -> Execution -> Final Answer)
+        AIMessage(content="I will create a plan.\nPLAN_CREATED"),
+        # 3. Supervisor (Plan created -> Coder): 규칙으로 처리
+        # 4. Coder (Working...)
+        AIMessage(
+            content='Thinking...\n```json\n[{"name": "file_write", "arguments": {"file_path": "hello.py", "content": "print(1)"}}]\n```'
+        ),
+        AIMessage(content="Code written successfully."),
+        # 5. Supervisor (Code done -> Reviewer): 시그널 문구가 없으므로 LLM 판단
+        AIMessage(content="Reviewer"),
+        # 6. Reviewer (Lint & Test)
+        AIMessage(
+            content='Thinking...\n```json\n[{"name": "run_linter", "arguments": {}}]\n```'
+        ),
+        AIMessage(content="Approved"),
+        # 7. Supervisor (Approved -> FINISH): 규칙으로 처리
+    ]
+    return responses
+
+
 class TestIntegrationWorkflow:
     """통합 테스트: 전체 에이전트 워크플로우 검증"""
 
@@ -32,32 +58,8 @@ class TestIntegrationWorkflow:
         Flow: START -> Supervisor -> Planner -> Supervisor -> Coder -> Supervisor -> Reviewer -> Supervisor -> END
         """
 
-        # 시나리오별 LLM 응답 정의
-        responses = [
-            # 1. Supervisor (User input -> Planner)
-            AIMessage(content="Planner"),
-            # 2. Planner (Thinking -> Execution -> Final Answer)
-            AIMessage(content="I will create a plan.\nPLAN_CREATED"),
-            # 3. Supervisor (Plan created -> Coder)
-            AIMessage(content="Coder"),
-            # 4. Coder (Working...)
-            AIMessage(
-                content='Thinking...\n```json\n[{"name": "file_write", "arguments": {"file_path": "hello.py", "content": "print(1)"}}]\n```'
-            ),
-            AIMessage(content="Code written successfully."),
-            # 5. Supervisor (Code done -> Reviewer)
-            AIMessage(content="Reviewer"),
-            # 6. Reviewer (Lint & Test)
-            AIMessage(
-                content='Thinking...\n```json\n[{"name": "run_linter", "arguments": {}}]\n```'
-            ),
-            AIMessage(content="Approved"),
-            # 7. Supervisor (Approved -> FINISH)
-            AIMessage(content="FINISH"),
-        ]
-
         # RunnableLambda로 감싸서 Chain과 호환되도록 만듦
-        responder = FakeResponder(responses)
+        responder = FakeResponder(_scripted_responses())
         fake_llm = RunnableLambda(responder)
 
         # Patch get_llm to return our fake_llm
@@ -66,6 +68,8 @@ class TestIntegrationWorkflow:
             patch("coding_agent.get_llm", return_value=fake_llm),
             patch("core.agent_runtime.get_llm", return_value=fake_llm),
         ):
+            reset_metrics()
+
             # 그래프 생성 (In-Memory Checkpointer 사용)
             workflow = create_graph()
             memory = MemorySaver()
@@ -91,3 +95,46 @@ class TestIntegrationWorkflow:
             assert "Planner" in visited_nodes
             assert "Coder" in visited_nodes
             assert "Reviewer" in visited_nodes
+            # 명확한 전이는 규칙으로, 모호한 경우만 LLM으로 라우팅
+            decisions = REGISTRY.snapshot()["supervisor_decisions_total"]
+            assert {
+                (d["labels"]["source"], d["labels"]["next"]): d["value"]
+                for d in decisions
+            } == {
+                ("rule", "Planner"): 1,
+                ("rule", "Coder"): 1,
+                ("llm", "Reviewer"): 1,
+                ("rule", "FINISH"): 1,
+            }
+
+    async def test_full_workflow_async(self, mock_ollama_config):
+        """
+        [HP-02] graph.astream 기반 비동기 워크플로우 검증
+        비동기 노드(asupervisor_node / acustom_agent_node)가 사용되어야 함
+        """
+        fake_llm = RunnableLambda(FakeResponder(_scripted_responses()))
+
+        with (
+            patch("coding_agent.get_llm", return_value=fake_llm),
+            patch("core.agent_runtime.get_llm", return_value=fake_llm),
+            patch("coding_agent.run_react_agent") as sync_runtime,
+        ):
+            config = {"configurable": {"thread_id": "test_thread_async"}}
+            inputs = {"messages": [HumanMessage(content="Make a hello world script")]}
+
+            visited_nodes = []
+            db_path = os.path.join(mock_ollama_config.WORKSPACE_DIR, "memory.sqlite")
+            async with aopen_graph(db_path, models=[]) as app:
+                async for event in app.astream(
+                    inputs, config=config, stream_mode="updates"
+                ):
+                    visited_nodes.extend(event.keys())
+                state = await app.aget_state(config)
+
+            assert state.values["next"] == "FINISH"
+
+            assert visited_nodes.count("Supervisor") >= 4
+            assert "Planner" in visited_nodes
+            assert "Coder" in visited_nodes
+            assert "Reviewer" in visited_nodes
+            sync_runtime.assert_not_called()
@@ -1,6 +1,20 @@
 import os
 
-from tools import file_read, file_write, is_safe_code, list_directory
+import pytest
+
+from core.file_cache import FileCache
+from core.linter import reset_lint_state
+from core.sandbox import SandboxPool, SandboxTimeoutError
+from core.workspace import use_workspace
+from tools import (
+    file_read,
+    file_write,
+    get_safe_path,
+    is_safe_code,
+    list_directory,
+    run_linter,
+    run_python_secure,
+)
 
 
 def test_file_write_read(mock_ollama_config):
@@ -17,6 +31,87 @@ def test_file_write_read(mock_ollama_config):
     assert test_content in read_result
 
 
+def test_use_workspace_isolates_tools(mock_ollama_config):
+    """use_workspace: 현재 컨텍스트의 도구만 하위 워크스페이스 사용, 형제 디렉토리 접근 거부"""
+    root = mock_ollama_config.WORKSPACE_DIR
+    with use_workspace(os.path.join(root, "t1")):
+        file_write.invoke({"file_path": "out.py", "content": "x = 1\n"})
+        with pytest.raises(ValueError, match="Access denied"):
+            get_safe_path(os.path.join(root, "t10", "out.py"))
+    assert os.path.exists(os.path.join(root, "t1", "out.py"))
+    assert get_safe_path("out.py") == os.path.join(root, "out.py")
+
+
+@pytest.mark.parametrize("threshold", [1 << 20, 1], ids=["cached", "mmap"])
+def test_file_read_known_version(mock_ollama_config, monkeypatch, threshold):
+    """같은 version으로 다시 읽으면 내용 생략, 외부 변경 시 새 내용 반환 (두 경로 동일)"""
+    monkeypatch.setattr("config.ToolConfig.FILE_MMAP_THRESHOLD_BYTES", threshold)
+    write_result = file_write.invoke({"file_path": "a.py", "content": "x = 1\n"})
+    version = write_result.split("version: ")[1].rstrip(")")
+
+    unchanged = file_read.invoke({"file_path": "a.py", "known_version": version})
+    assert "Unchanged since your last read" in unchanged
+    assert "x = 1" not in unchanged
+
+    # 다른 프로세스가 수정 (크기 변경 -> stat 검증으로 캐시 무효화)
+    path = os.path.join(mock_ollama_config.WORKSPACE_DIR, "a.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("x = 22\n")
+    changed = file_read.invoke({"file_path": "a.py", "known_version": version})
+    assert "x = 22" in changed
+
+
+@pytest.mark.parametrize("threshold", [1 << 20, 1], ids=["cached", "mmap"])
+def test_file_read_ranges(mock_ollama_config, monkeypatch, threshold):
+    """줄/바이트 범위 읽기와 문자 수 상한 (캐시 경로, mmap 경로 동일 결과)"""
+    monkeypatch.setattr("config.ToolConfig.FILE_MMAP_THRESHOLD_BYTES", threshold)
+    lines = "".join(f"line {i}\n" for i in range(1, 101))
+    file_write.invoke({"file_path": "big.txt", "content": lines})
+
+    result = file_read.invoke(
+        {"file_path": "big.txt", "start_line": 10, "end_line": 12}
+    )
+    assert "lines: 100" in result
+    assert "[Showing lines 10-12 of 100 lines" in result
+    assert result.endswith("line 10\nline 11\nline 12\n")
+
+    result = file_read.invoke({"file_path": "big.txt", "max_chars": 14})
+    assert "line 1\nline 2\n" in result and "line 3" not in result
+    assert "truncated" in result
+
+    result = file_read.invoke(
+        {"file_path": "big.txt", "byte_offset": 7, "byte_length": 7}
+    )
+    assert result.endswith("[Showing bytes 7-14 of 100 lines, 792 bytes]\nline 2\n")
+
+
+def test_file_read_binary(mock_ollama_config):
+    """바이너리 파일은 디코딩하지 않고 요약"""
+    path = os.path.join(mock_ollama_config.WORKSPACE_DIR, "blob.bin")
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n\x00\x00")
+
+    result = file_read.invoke({"file_path": "blob.bin"})
+    assert "(binary, size: 10 bytes)" in result
+    assert "89 50 4e 47" in result
+
+
+def test_file_cache_lru_eviction(tmp_path):
+    """파일 캐시: 문자 수 상한 초과 시 오래된 항목 제거"""
+    cache = FileCache(max_chars=10)
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / name
+        path.write_text(name * 4)
+        paths.append(str(path))
+        cache.read(str(path))
+
+    assert cache.stats()["entries"] == 2
+    cache.read(paths[2])
+    cache.read(paths[0])
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 4)
+
+
 def test_list_directory(mock_ollama_config):
     """디렉토리 목록 조회 검증"""
     os.makedirs(os.path.join(mock_ollama_config.WORKSPACE_DIR, "subdir"), exist_ok=True)
@@ -28,6 +123,61 @@ def test_list_directory(mock_ollama_config):
     assert "[FILE] file1.txt" in result
 
 
+def test_list_directory_recursive(mock_ollama_config):
+    """재귀 목록: 깊이 제한, glob 필터, 기본 제외 디렉토리, 항목 수 제한"""
+    root = mock_ollama_config.WORKSPACE_DIR
+    for rel in ("pkg/a.py", "pkg/sub/b.py", "pkg/notes.md", "__pycache__/x.pyc"):
+        os.makedirs(os.path.dirname(os.path.join(root, rel)), exist_ok=True)
+        with open(os.path.join(root, rel), "w") as f:
+            f.write("x")
+
+    result = list_directory.invoke({"path": ".", "max_depth": 3, "include": "*.py"})
+    assert result.splitlines()[1:] == [
+        "[DIR]  pkg/",
+        "  [FILE] a.py (1 bytes)",
+        "  [DIR]  sub/",
+        "    [FILE] b.py (1 bytes)",
+    ]
+
+    result = list_directory.invoke({"path": ".", "max_depth": 2, "max_entries": 2})
+    assert result.splitlines()[1:] == [
+        "[DIR]  pkg/",
+        "  [FILE] a.py (1 bytes)",
+        "... [truncated at 2 entries; narrow with max_depth/include/exclude]",
+    ]
+
+
+def test_run_linter_batched_incremental(mock_ollama_config):
+    """여러 경로 일괄 검사, 구조화된 결과, 변경된 파일만 재검사"""
+    reset_lint_state()
+    file_write.invoke({"file_path": "a.py", "content": "import os\n"})
+    file_write.invoke({"file_path": "b.py", "content": "x = 1\n"})
+
+    result = run_linter.invoke({"file_path": "a.py, b.py"})
+    assert result.startswith("⚠️ Lint issues found: 1 (2 files, 2 re-linted)")
+    assert "a.py:1:8 F401" in result
+
+    file_write.invoke({"file_path": "a.py", "content": "import os\n\nprint(os)\n"})
+    result = run_linter.invoke({"file_path": "a.py,b.py"})
+    assert result == "✅ Lint check passed! (2 files, 1 re-linted)"
+
+
+def test_run_linter_missing_path_and_config_change(mock_ollama_config):
+    """없는 경로는 에러로 보고, ruff 설정이 바뀌면 전체 재검사"""
+    reset_lint_state()
+    file_write.invoke({"file_path": "a.py", "content": "import os\n"})
+
+    result = run_linter.invoke({"file_path": "a.py, does_not_exist.py"})
+    assert result == "Error: Path not found: does_not_exist.py"
+
+    assert run_linter.invoke({"file_path": "a.py"}).startswith("⚠️ Lint issues")
+    config = os.path.join(mock_ollama_config.WORKSPACE_DIR, "ruff.toml")
+    with open(config, "w") as f:
+        f.write('[lint]\nignore = ["F401"]\n')
+    result = run_linter.invoke({"file_path": "a.py"})
+    assert result == "✅ Lint check passed! (1 files, 1 re-linted)"
+
+
 def test_security_analyzer():
     """보안 분석기(AST) 검증"""
     # Safe code
@@ -39,3 +189,107 @@ def test_security_analyzer():
 
     # Unsafe code (blocked function)
     assert "Security Violation" in is_safe_code("eval('1+1')")
+
+
+class TestSandboxPool:
+    """Warm Sandbox 워커 풀 검증"""
+
+    @pytest.fixture
+    def pool(self):
+        pool = SandboxPool(size=1, max_runs=2)
+        yield pool
+        pool.close()
+
+    def test_stdout_and_return_code(self, pool, tmp_path):
+        """[HP-01] python -c 와 같은 stdout / 종료 코드"""
+        result = pool.execute("print('hello')", str(tmp_path), timeout=10)
+        assert result == ("hello\n", "", 0)
+
+    def test_exception_traceback(self, pool, tmp_path):
+        """[HP-02] 예외 발생 시 사용자 코드 traceback과 종료 코드 1"""
+        result = pool.execute("raise ValueError('boom')", str(tmp_path), timeout=10)
+        assert result.returncode == 1
+        assert "ValueError: boom" in result.stderr
+        assert "sandbox_worker" not in result.stderr
+
+    def test_state_isolated_between_runs(self, pool, tmp_path):
+        """[HP-03] 실행 간 전역 변수 / import 한 모듈이 남지 않음"""
+        (tmp_path / "helper.py").write_text("VALUE = 1\n")
+        pool.execute("import helper; x = 1", str(tmp_path), timeout=10)
+        (tmp_path / "helper.py").write_text("VALUE = 2\n")
+
+        result = pool.execute(
+            "import helper; print(helper.VALUE, 'x' in globals())",
+            str(tmp_path),
+            timeout=10,
+        )
+        assert result.stdout == "2 False\n"
+
+    def test_leftover_threads_recycle_worker(self, tmp_path):
+        """[EDGE-03] 사용자 코드가 남긴 스레드는 다음 실행에 출력되지 않음 (워커 교체)"""
+        pool = SandboxPool(size=1, max_runs=50)
+        try:
+            leak = (
+                "import threading, time\n"
+                "def spam():\n"
+                "    while True:\n"
+                "        print('LEAK')\n"
+                "        time.sleep(0.01)\n"
+                "threading.Thread(target=spam, daemon=True).start()"
+            )
+            assert pool.execute(leak, str(tmp_path), timeout=10).returncode == 0
+            result = pool.execute(
+                "import time; time.sleep(0.1); print('second session')",
+                str(tmp_path),
+                timeout=10,
+            )
+            assert result.stdout == "second session\n"
+        finally:
+            pool.close()
+
+    def test_module_and_builtin_changes_reverted(self, tmp_path):
+        """[HP-06] 기존 모듈 / builtins 변경이 같은 워커의 다음 실행에 남지 않음"""
+        pool = SandboxPool(size=1, max_runs=50)
+        try:
+            for code in (
+                "import math; math.pi = 3",
+                "import json; json.loads = lambda s: 1",
+                "import builtins; builtins.print = None",
+            ):
+                assert pool.execute(code, str(tmp_path), timeout=10).returncode == 0
+            result = pool.execute(
+                "import math, json; print(math.pi, json.loads('[1]'))",
+                str(tmp_path),
+                timeout=10,
+            )
+            assert result.stdout == "3.141592653589793 [1]\n"
+        finally:
+            pool.close()
+
+    def test_dead_worker_retried_on_fresh_worker(self, pool, tmp_path):
+        """[EDGE-02] 워커가 비정상 종료 상태면 새 워커에서 한 번 재시도"""
+        idle = pool._idle.get()
+        idle.proc.kill()
+        idle.proc.wait()
+        pool._idle.put(idle)
+
+        assert pool.execute("print(1)", str(tmp_path), timeout=10).stdout == "1\n"
+
+    def test_precompiled_code_object(self, pool, tmp_path):
+        """[HP-04] 검증 단계에서 컴파일한 code object를 그대로 실행"""
+        code_object = compile("print(__name__)", "<string>", "exec")
+        result = pool.execute("", str(tmp_path), timeout=10, code_object=code_object)
+        assert result.stdout == "__main__\n"
+
+    def test_timeout_kills_worker(self, pool, tmp_path):
+        """[EDGE-01] 시간 초과 시 SandboxTimeoutError, 이후 새 워커로 계속 실행 가능"""
+        with pytest.raises(SandboxTimeoutError):
+            pool.execute("while True: pass", str(tmp_path), timeout=0.5)
+        assert pool.execute("print(1)", str(tmp_path), timeout=10).stdout == "1\n"
+
+    def test_run_python_secure_output_format(self, mock_ollama_config):
+        """[HP-05] run_python_secure 출력 형식 유지"""
+        result = run_python_secure.invoke({"code": "raise SystemExit(3)"})
+        assert result == "Return code: 3"
+        result = run_python_secure.invoke({"code": "print('hi')"})
+        assert result == "STDOUT:\nhi\n\n"
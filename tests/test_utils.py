@@ -1,4 +1,4 @@
-from utils.json_parser import extract_json
+from utils.json_parser import ToolCallScanner, extract_json, extract_tool_calls
 
 
 def test_extract_json_standard():
@@ -53,3 +53,61 @@ def test_extract_json_with_trailing_commas():
     result = extract_json(text)
     assert len(result) == 1
     assert result[0]["name"] == "test"
+
+
+def test_extract_json_fence_and_comma_inside_string():
+    """문자열 안의 ``` 및 ',}' 는 펜스 종료/trailing comma로 취급하지 않음"""
+    text = (
+        "```json\n"
+        '{"name": "file_write", "arguments": {"content": "```md\\n{a,}\\n```",},}\n'
+        "```\nObservation: ignored"
+    )
+    result = extract_json(text)
+    assert result == [
+        {"name": "file_write", "arguments": {"content": "```md\n{a,}\n```"}}
+    ]
+
+
+def test_scanner_incremental_feed():
+    """토큰 단위로 입력해도 객체가 닫히는 즉시 후보를 반환"""
+    text = 'Thought\n```json\n{"name": "tool1", "arguments": {"x": "}"}}\n```\nmore'
+    scanner = ToolCallScanner()
+    emitted_at = None
+    for i in range(0, len(text), 3):
+        if scanner.feed(text[i : i + 3]) and emitted_at is None:
+            emitted_at = i
+    assert emitted_at is not None
+    assert text[: scanner.last_block_end].endswith("}}\n```")
+    assert scanner.close() == [{"name": "tool1", "arguments": {"x": "}"}}]
+
+
+def test_extract_tool_calls_validation():
+    """도구 이름/필수 인자 검증 및 'args' 키 보정"""
+    schemas = {"file_read": (frozenset({"file_path"}), frozenset({"file_path"}))}
+    text = """
+    ```json
+    [
+        {"name": "file_read", "args": {"file_path": "a.py"}},
+        {"name": "file_read", "arguments": {}},
+        {"name": "unknown_tool", "arguments": {}}
+    ]
+    ```
+    """
+    calls, errors = extract_tool_calls(text, schemas)
+    assert calls == [{"name": "file_read", "arguments": {"file_path": "a.py"}}]
+    assert len(errors) == 2
+    assert "missing required arguments ['file_path']" in errors[0]
+    assert "Unknown tool 'unknown_tool'" in errors[1]
+
+
+def test_stray_brace_and_apostrophe_before_fence():
+    """산문의 '{' 뒤 아포스트로피가 이후 ```json 펜스를 삼키지 않아야 함 (회귀)"""
+    call = '{"name": "file_read", "arguments": {"file_path": "a.py"}}'
+    texts = [
+        f"Python dicts use {{ and it's simple.\n```json\n{call}\n```",
+        f"Note: the {{ char. Let's go\n```json\n{call}\n```",
+    ]
+    for text in texts:
+        calls, errors = extract_tool_calls(text)
+        assert calls == [{"name": "file_read", "arguments": {"file_path": "a.py"}}]
+        assert errors == []
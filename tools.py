@@ -2,38 +2,31 @@
 에이전트가 사용할 도구 및 유틸리티 함수 정의
 """
 
+import fnmatch
 import os
 import subprocess
+from typing import List
 
-from langchain_community.tools import DuckDuckGoSearchRun
 from langchain_core.tools import tool
 
-from config import OllamaConfig
-from core.security import is_safe_code
+from config import ToolConfig
+from core.file_cache import get_file_cache
+from core.file_reader import read_file
+from core.linter import collect_files, fix_diff, lint_files
+from core.sandbox import SandboxTimeoutError, get_sandbox_pool
+from core.search import get_search_service
+from core.security import analyze_code, is_safe_code  # noqa: F401 (re-export)
+from core.workspace import current_workspace, resolve_path
 
 
 def get_safe_path(path: str) -> str:
     """워크스페이스 내부로 경로 제한 및 절대 경로 변환"""
-    # 상대 경로를 절대 경로로 변환
-    if not os.path.isabs(path):
-        # 만약 path가 'workspace/'로 시작하면 제거 (중복 방지)
-        workspace_name = os.path.basename(OllamaConfig.WORKSPACE_DIR)
+    workspace = os.path.abspath(current_workspace())
+    path = resolve_path(path)
 
-        # Normalize path separators
-        clean_path = path.replace("\\", "/")
-        if clean_path.startswith(f"{workspace_name}/"):
-            path = clean_path[len(workspace_name) + 1 :]
-
-        path = os.path.join(OllamaConfig.WORKSPACE_DIR, path)
-
-    # 경로 정규화
-    path = os.path.normpath(path)
-
-    # 워크스페이스 내부에 있는지 확인
-    if not path.startswith(os.path.normpath(OllamaConfig.WORKSPACE_DIR)):
-        raise ValueError(
-            f"Access denied: Path must be within {OllamaConfig.WORKSPACE_DIR}"
-        )
+    # 워크스페이스 내부에 있는지 확인 (접두사가 같은 형제 디렉토리도 거부)
+    if os.path.commonpath([path, workspace]) != workspace:
+        raise ValueError(f"Access denied: Path must be within {workspace}")
     return path
 
 
@@ -41,20 +34,41 @@ def get_safe_path(path: str) -> str:
 # Tools
 # =============================================================================
 @tool
-def file_read(file_path: str) -> str:
-    """파일의 내용을 읽습니다.
+def file_read(
+    file_path: str,
+    known_version: str = "",
+    start_line: int = 1,
+    end_line: int = 0,
+    byte_offset: int = 0,
+    byte_length: int = 0,
+    max_chars: int = 0,
+) -> str:
+    """파일의 내용을 읽습니다. 큰 파일은 줄/바이트 범위를 지정해 나누어 읽습니다.
 
     Args:
         file_path: 읽을 파일의 경로
+        known_version: 이전에 읽은 결과의 version 값. 범위 지정 없이 읽을 때 변경이 없으면 내용을 생략합니다.
+        start_line: 시작 줄 번호 (1부터)
+        end_line: 끝 줄 번호 (포함, 0 = 파일 끝)
+        byte_offset: 바이트 범위 시작 위치 (byte_length와 함께 사용)
+        byte_length: 읽을 바이트 수 (0 = 줄 범위 사용)
+        max_chars: 반환할 최대 문자 수 (0 = 기본값)
     """
     try:
         safe_path = get_safe_path(file_path)
         if not os.path.exists(safe_path):
             return f"Error: File not found at {file_path}"
 
-        with open(safe_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        return f"=== File: {file_path} ===\n{content}"
+        return read_file(
+            safe_path,
+            file_path,
+            known_version=known_version,
+            start_line=start_line,
+            end_line=end_line,
+            byte_offset=byte_offset,
+            byte_length=byte_length,
+            max_chars=max_chars,
+        )
     except Exception as e:
         return f"Error reading file: {e}"
 
@@ -72,29 +86,110 @@ def file_write(file_path: str, content: str) -> str:
         os.makedirs(os.path.dirname(safe_path), exist_ok=True)
         with open(safe_path, "w", encoding="utf-8") as f:
             f.write(content)
-        return f"Successfully wrote {len(content)} bytes to {file_path}"
+        cached = get_file_cache().update(safe_path, content)
+        return (
+            f"Successfully wrote {len(content)} bytes to {file_path} "
+            f"(version: {cached.version})"
+        )
     except Exception as e:
         return f"Error writing file: {e}"
 
 
+def _match_any(name: str, rel_path: str, patterns: List[str]) -> bool:
+    return any(
+        fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p) for p in patterns
+    )
+
+
+def _walk_directory(
+    root: str,
+    rel: str,
+    depth: int,
+    max_depth: int,
+    include: List[str],
+    exclude: List[str],
+    budget: list,
+) -> List[str]:
+    """os.scandir 기반 재귀 목록 (항목당 stat 1회). budget: [남은 항목 수, 잘림 여부]"""
+    with os.scandir(root) as it:
+        entries = sorted(it, key=lambda e: e.name)
+
+    indent = "  " * depth
+    lines = []
+    for entry in entries:
+        if budget[0] <= 0:
+            budget[1] = True  # 남은 항목이 있는 상태에서 중단
+            break
+        rel_path = f"{rel}{entry.name}"
+        if entry.name in ToolConfig.LIST_IGNORE or _match_any(
+            entry.name, rel_path, exclude
+        ):
+            continue
+
+        if not entry.is_dir():
+            if not include or _match_any(entry.name, rel_path, include):
+                lines.append(
+                    f"{indent}[FILE] {entry.name} ({entry.stat().st_size} bytes)"
+                )
+                budget[0] -= 1
+            continue
+
+        budget[0] -= 1  # 디렉토리 줄 자리 예약
+        children = []
+        # 심볼릭 링크 디렉토리는 순환 방지를 위해 내려가지 않음
+        if depth + 1 < max_depth and not entry.is_symlink():
+            children = _walk_directory(
+                entry.path,
+                f"{rel_path}/",
+                depth + 1,
+                max_depth,
+                include,
+                exclude,
+                budget,
+            )
+        if include and not children:
+            budget[0] += 1  # 일치하는 파일이 없는 디렉토리는 표시하지 않음
+            continue
+        lines.append(f"{indent}[DIR]  {entry.name}/")
+        lines.extend(children)
+    return lines
+
+
 @tool
-def list_directory(path: str = ".") -> str:
-    """디렉토리의 파일 목록을 반환합니다.
+def list_directory(
+    path: str = ".",
+    max_depth: int = 1,
+    include: str = "",
+    exclude: str = "",
+    max_entries: int = 0,
+) -> str:
+    """디렉토리의 파일 목록을 트리 형태로 반환합니다.
 
     Args:
         path: 디렉토리 경로 (기본값: 현재 디렉토리)
+        max_depth: 탐색할 최대 깊이 (1 = 해당 디렉토리만)
+        include: 포함할 파일 glob 패턴 (쉼표로 구분, 예: "*.py,*.md")
+        exclude: 제외할 glob 패턴 (쉼표로 구분)
+        max_entries: 최대 항목 수 (0 = 기본값)
     """
     try:
         safe_path = get_safe_path(path)
-        items = os.listdir(safe_path)
-        result = []
-        for item in sorted(items):
-            full_path = os.path.join(safe_path, item)
-            if os.path.isdir(full_path):
-                result.append(f"[DIR]  {item}/")
-            else:
-                size = os.path.getsize(full_path)
-                result.append(f"[FILE] {item} ({size} bytes)")
+        limit = max_entries or ToolConfig.LIST_MAX_ENTRIES
+        budget = [limit, False]
+        result = _walk_directory(
+            safe_path,
+            "",
+            0,
+            max(1, max_depth),
+            [p.strip() for p in include.split(",") if p.strip()],
+            [p.strip() for p in exclude.split(",") if p.strip()],
+            budget,
+        )
+        if budget[1]:
+            result.append(
+                f"... [truncated at {limit} entries; "
+                "narrow with max_depth/include/exclude]"
+            )
         return f"=== Directory: {path} ===\n" + "\n".join(result)
     except Exception as e:
         return f"Error listing directory: {e}"
@@ -113,19 +208,25 @@ def run_python_secure(code: str) -> str:
         code: 실행할 Python 코드
     """
     # 1. 정적 분석 (AST)
-    security_error = is_safe_code(code)
-    if security_error:
-        return f"🚫 Security Blocked:\n{security_error}"
+    analysis = analyze_code(code)
+    if analysis.error:
+        return f"🚫 Security Blocked:\n{analysis.error}"
 
-    # 2. 실행 (Subprocess)
+    # 2. 실행 (Warm Sandbox 워커, 풀 비활성화 시 Subprocess)
+    timeout = ToolConfig.SANDBOX_TIMEOUT_SECONDS
     try:
-        result = subprocess.run(
-            ["python", "-c", code],
-            capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=OllamaConfig.WORKSPACE_DIR,
-        )
+        if ToolConfig.SANDBOX_POOL_SIZE > 0:
+            result = get_sandbox_pool().execute(
+                code, current_workspace(), timeout, analysis.code_object
+            )
+        else:
+            result = subprocess.run(
+                ["python", "-c", code],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                cwd=current_workspace(),
+            )
         output = ""
         if result.stdout:
             output += f"STDOUT:\n{result.stdout}\n"
@@ -134,8 +235,8 @@ def run_python_secure(code: str) -> str:
         if result.returncode != 0:
             output += f"Return code: {result.returncode}"
         return output or "Code executed successfully with no output."
-    except subprocess.TimeoutExpired:
-        return "Error: Code execution timed out (30s limit)"
+    except (subprocess.TimeoutExpired, SandboxTimeoutError):
+        return f"Error: Code execution timed out ({timeout:g}s limit)"
     except Exception as e:
         return f"Error executing code: {e}"
 
@@ -148,35 +249,52 @@ def web_search(query: str) -> str:
         query: 검색어
     """
     try:
-        search = DuckDuckGoSearchRun()
-        return search.invoke(query)
+        return get_search_service().search(query)
     except Exception as e:
         return f"Error searching web: {e}"
 
 
 @tool
-def run_linter(file_path: str = ".") -> str:
-    """Ruff를 사용하여 코드 린팅 및 포맷팅 검사를 수행합니다.
+def run_linter(
+    file_path: str = ".", incremental: bool = True, show_fixes: bool = False
+) -> str:
+    """Ruff를 사용하여 코드 린팅 검사를 수행합니다. 여러 경로를 한 번에 검사할 수 있습니다.
 
     Args:
-        file_path: 검사할 파일 또는 디렉토리 경로 (기본값: 현재 디렉토리)
+        file_path: 검사할 파일 또는 디렉토리 경로 (쉼표로 여러 개 지정 가능, 기본값: 현재 디렉토리)
+        incremental: True이면 마지막 검사 이후 변경된 파일만 다시 검사
+        show_fixes: True이면 자동 수정 가능한 항목의 diff 표시 (파일은 변경하지 않음)
     """
     try:
-        safe_path = get_safe_path(file_path)
-        # ruff check
-        result = subprocess.run(
-            ["ruff", "check", safe_path],
-            capture_output=True,
-            text=True,
-            cwd=OllamaConfig.WORKSPACE_DIR,
-        )
-
-        output = ""
-        if result.returncode == 0:
-            output = "✅ Lint check passed!"
+        names = [p.strip() for p in file_path.split(",") if p.strip()] or ["."]
+        paths = [get_safe_path(name) for name in names]
+        missing = [name for name, path in zip(names, paths) if not os.path.exists(path)]
+        if missing:
+            return f"Error: Path not found: {', '.join(missing)}"
+        files = collect_files(paths)
+        if not files:
+            return "✅ Lint check passed! (no Python files found)"
+
+        workspace = current_workspace()
+        findings, relinted = lint_files(files, workspace, incremental)
+        stats = f"{len(files)} files, {relinted} re-linted"
+        if not findings:
+            output = f"✅ Lint check passed! ({stats})"
         else:
-            output = f"⚠️ Lint issues found:\n{result.stdout}"
-
+            limit = ToolConfig.LINT_MAX_FINDINGS
+            lines = [f.format() for f in findings[:limit]]
+            if len(findings) > limit:
+                lines.append(f"... [{len(findings) - limit} more issues not shown]")
+            output = f"⚠️ Lint issues found: {len(findings)} ({stats})\n" + "\n".join(
+                lines
+            )
+
+        if show_fixes:
+            diff = fix_diff(files, workspace)
+            cap = ToolConfig.FILE_READ_MAX_CHARS
+            if len(diff) > cap:
+                diff = diff[:cap] + "\n... [diff truncated]"
+            output += f"\n\nSuggested fixes (dry run):\n{diff or '(none)'}"
         return output
     except FileNotFoundError:
         return "Error: 'ruff' is not installed. Please install it first."
@@ -1,60 +1,273 @@
 import ast
 import json
 import re
-from typing import Any, Dict, List
-
-
-def _extract_from_code_blocks(text: str) -> List[Dict[str, Any]]:
-    """```json ... ``` 패턴에서 JSON을 추출합니다."""
-    blocks = []
-    pattern = r"```json(.*?)```"
-    matches = re.findall(pattern, text, re.DOTALL)
-
-    for match in matches:
-        try:
-            clean_json = match.strip()
-            # Common fix: cleanup trailing commas which LLMs often add
-            clean_json = re.sub(r",\s*([\]}])", r"\1", clean_json)
-            data = json.loads(clean_json)
-            if isinstance(data, (dict, list)):
-                blocks.append(data) if isinstance(data, dict) else blocks.extend(data)
-        except json.JSONDecodeError:
-            try:
-                data = ast.literal_eval(clean_json)
-                if isinstance(data, (dict, list)):
-                    blocks.append(data) if isinstance(data, dict) else blocks.extend(
-                        data
-                    )
-            except Exception:
-                pass
-    return blocks
-
-
-def _extract_from_text_fallback(text: str) -> List[Dict[str, Any]]:
-    """코드 블록이 없을 때 텍스트 전반에서 {} 패턴을 찾아 추출합니다."""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_FENCE_OPEN = "```json"
+_FENCE = "```"
+
+# TEXT 모드: 펜스 시작 또는 펜스 밖 raw 객체 시작
+_TEXT_STOP = re.compile(r"```json|\{")
+# 값 내부(문자열 밖)에서 의미 있는 문자
+_STRUCTURAL = re.compile(r"[{}\[\]\"',`]")
+_TEXT, _FENCED, _RAW = range(3)
+
+# 도구 이름 -> (필수 인자, 전체 인자)
+ToolSchemas = Dict[str, Tuple[frozenset, frozenset]]
+
+
+def build_tool_schemas(tools: Iterable) -> ToolSchemas:
+    """LangChain 도구 목록에서 인자 스키마(필수/전체 인자 이름) 추출"""
+    schemas = {}
+    for t in tools:
+        props = dict(getattr(t, "args", {}) or {})
+        required = frozenset(k for k, v in props.items() if "default" not in v)
+        schemas[t.name] = (required, frozenset(props))
+    return schemas
+
+
+def _parse_candidate(candidate: str) -> Any:
+    """JSON 파싱, 실패 시 Python 리터럴로 재시도"""
     try:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1:
-            sub = text[start : end + 1]
-            sub = re.sub(r",\s*([\]}])", r"\1", sub)
-            try:
-                data = json.loads(sub)
-            except Exception:
-                data = ast.literal_eval(sub)
-
-            if isinstance(data, dict):
-                return [data]
-    except Exception:
+        return json.loads(candidate)
+    except ValueError:
         pass
-    return []
+    try:
+        return ast.literal_eval(candidate)
+    except Exception:
+        return None
 
 
-def extract_json(text: str) -> List[Dict[str, Any]]:
-    """텍스트에서 JSON 블록을 추출합니다. (Modular & Robust Version)"""
-    json_blocks = _extract_from_code_blocks(text)
+def _validate(call: Dict[str, Any], schemas: ToolSchemas) -> Optional[str]:
+    """도구 호출 검증. 문제가 있으면 에러 메시지 반환 ('args' 키는 'arguments'로 보정)"""
+    name = call.get("name")
+    if name not in schemas:
+        return f"Unknown tool '{name}'. Available tools: {sorted(schemas)}"
+
+    if "arguments" not in call and isinstance(call.get("args"), dict):
+        call["arguments"] = call.pop("args")
+    arguments = call.setdefault("arguments", {})
+    if not isinstance(arguments, dict):
+        return f"Tool '{name}': 'arguments' must be a JSON object."
+
+    missing = schemas[name][0] - set(arguments)
+    if missing:
+        return f"Tool '{name}': missing required arguments {sorted(missing)}."
+    return None
+
+
+class ToolCallScanner:
+    """
+    도구 호출 JSON 단일 패스 스캐너.
+
+    ```json 펜스와 중괄호/대괄호 중첩, 문자열(이스케이프 포함)을 추적하며
+    최상위 객체가 닫히는 즉시 후보로 파싱합니다. feed()로 토큰 스트림을 증분 입력할 수 있고,
+    trailing comma는 구조적으로 탐지하여 문자열 내용은 건드리지 않습니다.
+    펜스 안에서 후보를 찾지 못한 경우에만 펜스 밖 raw 객체를 사용합니다.
+    """
+
+    def __init__(self, schemas: Optional[ToolSchemas] = None):
+        self.schemas = schemas
+        self.text = ""
+        self.calls: List[Dict[str, Any]] = []  # 펜스 안 후보
+        self.fallback: List[Dict[str, Any]] = []  # 펜스 밖 raw 후보
+        self.errors: List[str] = []
+        # 후보를 하나 이상 포함한 마지막 ```json 블록의 끝 위치 (-1: 없음)
+        self.last_block_end = -1
+
+        self._pos = 0
+        self._mode = _TEXT
+        self._depth = 0
+        self._quote = ""  # 현재 문자열 구분자
+        self._start = -1  # 현재 후보 시작 위치
+        self._last_sig = -1  # 마지막 구조 문자 위치
+        self._last_sig_char = ""
+        self._drop: List[int] = []  # 후보에서 제외할 trailing comma 위치
+        self._block_candidates = 0
+        self._fenced_seen = False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """텍스트를 추가하고 새로 완성된 (펜스 안) 도구 호출 목록 반환"""
+        self.text += chunk
+        before = len(self.calls)
+        self._scan(final=False)
+        return self.calls[before:]
+
+    def close(self) -> List[Dict[str, Any]]:
+        """입력 종료. 펜스 안 후보가 있으면 그것을, 없으면 raw 후보를 반환"""
+        self._scan(final=True)
+        return self.calls if self._fenced_seen else self.fallback
 
-    if not json_blocks:
-        json_blocks = _extract_from_text_fallback(text)
+    # ------------------------------------------------------------------
+    # Scanner
+    # ------------------------------------------------------------------
+    def _scan(self, final: bool):
+        text = self.text
+        while self._pos < len(text):
+            if self._quote:
+                progressed = self._scan_string(text)
+            elif self._mode == _TEXT:
+                progressed = self._scan_text(text)
+            else:
+                progressed = self._scan_value(text, final)
+            if not progressed:
+                return
 
-    return json_blocks
+    def _scan_text(self, text: str) -> bool:
+        """펜스/값 밖: 다음 ```json 또는 raw 객체 시작 위치로 이동"""
+        m = _TEXT_STOP.search(text, self._pos)
+        if m is None:
+            # 청크 경계에 걸친 여는 펜스를 놓치지 않도록 여유를 둠
+            self._pos = max(self._pos, len(text) - len(_FENCE_OPEN) + 1)
+            return False
+        if m.group() == "{":
+            self._mode = _RAW
+            self._open_value(m.start())
+        else:
+            self._mode = _FENCED
+            self._block_candidates = 0
+        self._pos = m.end()
+        return True
+
+    def _scan_value(self, text: str, final: bool) -> bool:
+        """펜스 또는 raw 값 내부: 다음 구조 문자 처리"""
+        m = _STRUCTURAL.search(text, self._pos)
+        if m is None:
+            self._pos = len(text)
+            return False
+        i, ch = m.start(), m.group()
+
+        if ch == "`":
+            return self._on_backtick(text, i, final)
+
+        self._pos = i + 1
+        if ch in "\"'":
+            self._on_quote(ch)
+            return True
+        if ch in "{[":
+            if self._depth:
+                self._depth += 1
+            else:
+                self._open_value(i)
+        elif ch in "}]":
+            if not self._depth:
+                return True
+            self._close_value(text, i)
+            if not self._depth:
+                return True
+        self._last_sig, self._last_sig_char = i, ch
+        return True
+
+    def _on_quote(self, ch: str):
+        # 최상위 문자열(후보 밖)은 추적하지 않음 (예: 펜스 안의 설명 문장)
+        if not self._depth:
+            return
+        # 펜스 밖 raw 후보는 산문의 '{' 일 수 있으므로 아포스트로피("it's")를
+        # 문자열 시작으로 보지 않음 (이후의 ```json 펜스를 삼키지 않도록)
+        if ch == "'" and self._mode == _RAW:
+            return
+        self._quote = ch
+
+    def _on_backtick(self, text: str, i: int, final: bool) -> bool:
+        if len(text) - i < len(_FENCE) and not final:
+            self._pos = i  # 펜스인지 판단하려면 입력이 더 필요
+            return False
+        if text.startswith(_FENCE, i):
+            self._end_fence(i)
+        else:
+            self._pos = i + 1
+        return True
+
+    def _close_value(self, text: str, i: int):
+        """닫는 괄호 처리: trailing comma 기록, 최상위 값이 닫히면 후보 방출"""
+        if self._last_sig_char == "," and not text[self._last_sig + 1 : i].strip():
+            self._drop.append(self._last_sig)
+        self._depth -= 1
+        if not self._depth:
+            self._emit(i + 1)
+
+    def _scan_string(self, text: str) -> bool:
+        """
+        문자열 끝까지 이동. 입력이 더 필요하면 False.
+        따옴표 위치는 str.find로 찾고, 앞선 백슬래시 개수가 홀수면 이스케이프로 간주합니다.
+        """
+        while True:
+            q = text.find(self._quote, self._pos)
+            if q == -1:
+                self._pos = len(text)
+                return False
+            backslashes = 0
+            while text[q - 1 - backslashes] == "\\":
+                backslashes += 1
+            self._pos = q + 1
+            if backslashes % 2 == 0:
+                self._quote = ""
+                self._last_sig, self._last_sig_char = q, '"'
+                return True
+
+    def _open_value(self, i: int):
+        self._start = i
+        self._depth = 1
+        self._drop = []
+        self._last_sig, self._last_sig_char = i, "{"
+
+    def _end_fence(self, i: int):
+        """``` 발견: 펜스 종료 또는 (raw 모드) 미완성 후보 폐기"""
+        if self._mode == _FENCED:
+            if self._block_candidates:
+                self.last_block_end = i + len(_FENCE)
+            self._pos = i + len(_FENCE)
+        else:
+            # raw 후보 도중의 펜스는 다시 TEXT 모드에서 처리
+            self._pos = i
+        self._depth = 0
+        self._mode = _TEXT
+
+    def _emit(self, end: int):
+        """닫힌 최상위 값을 파싱하여 후보 목록에 추가"""
+        pieces, prev = [], self._start
+        for d in self._drop:
+            pieces.append(self.text[prev:d])
+            prev = d + 1
+        pieces.append(self.text[prev:end])
+        data = _parse_candidate("".join(pieces))
+
+        fenced = self._mode == _FENCED
+        if not fenced:
+            self._mode = _TEXT
+
+        if isinstance(data, dict):
+            items = [data]
+        elif isinstance(data, list):
+            items = [x for x in data if isinstance(x, dict)]
+        else:
+            return
+
+        target = self.calls if fenced else self.fallback
+        for item in items:
+            error = _validate(item, self.schemas) if self.schemas is not None else None
+            if error:
+                self.errors.append(error)
+            else:
+                target.append(item)
+
+        if fenced:
+            self._fenced_seen = True
+            self._block_candidates += 1
+
+
+def extract_tool_calls(
+    text: str, schemas: Optional[ToolSchemas] = None
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """텍스트에서 도구 호출과 검증 에러 목록을 추출합니다."""
+    scanner = ToolCallScanner(schemas)
+    scanner.feed(text)
+    return scanner.close(), scanner.errors
+
+
+def extract_json(text: str) -> List[Dict[str, Any]]:
+    """텍스트에서 JSON 블록을 추출합니다. (Single-pass Scanner Version)"""
+    return extract_tool_calls(text)[0]